@@ -2,10 +2,17 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from sqlalchemy import create_engine, inspect
 import os
-import json
+import traceback
+from functools import partial
+
+import agregacoes
+import aquecimento
+import configuracao
+import exportacao
+import figuras
+from agendador import executar_em_paralelo
+from backends import backend_padrao
 
 # --------------------------------------------------
 # 1) Configuração inicial do Streamlit e do título
@@ -19,20 +26,21 @@ st.set_page_config(
 st.title("📊 Dashboard Tributária: Análise por Tipo de Imposto (v1)")
 st.markdown("""
 Neste dashboard (v1), você poderá:
-1. Ver a **série temporal** de qualquer tributo (ou receita total) por UF, com opção de **drill-down** (mensal) ou **drill-up** (anual), mostrando apenas as 5 UFs de maior arrecadação por padrão.  
-2. Visualizar um **mapa choropleth** do Brasil, pintando cada UF de acordo com a média mensal do tributo selecionado.  
+1. Ver a **série temporal** de qualquer tributo (ou receita total) por UF, com opção de **drill-down** (mensal) ou **drill-up** (anual), mostrando apenas as 5 UFs de maior arrecadação por padrão — ou somada por **região**. No nível mensal, dá para sobrepor a **série dessazonalizada** e a **previsão dos próximos 12 meses**.  
+2. Visualizar um **mapa choropleth** do Brasil, pintando cada UF de acordo com a média mensal do tributo selecionado (ou com a média da sua região). Selecionar UFs ou regiões no mapa filtra a série e o crescimento.  
 3. Conferir um mini-relatório (CTA) ao final, indicando os estados com maior queda e maior crescimento, de acordo com o intervalo de anos selecionado.
 
 Use os filtros na barra lateral para escolher:
-- A UF (ou “Todas”)  
+- A UF, uma região (ou “Todas”)  
+- O agrupamento (por UF ou por região)  
 - O intervalo de anos (2000–2024)  
 - O tributo para a série temporal (com nomes limpos)  
-- O nível de detalhe (“Anual” vs “Mensal”)  
+- O nível de detalhe (“Anual” vs “Mensal”) e, no mensal, a previsão  
 - O tributo para o mapa (média mensal)  
 """)
 
 # --------------------------------------------------
-# 2) Conexão com o banco SQLite (caminho relativo)
+# 2) Banco SQLite (caminho relativo)
 # --------------------------------------------------
 
 DB_PATH = os.path.join("base_de_dados", "tributos.db")
@@ -43,44 +51,24 @@ if not os.path.isfile(DB_PATH):
     )
     st.stop()
 
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
-inspector = inspect(engine)
-
 # --------------------------------------------------
-# 3) Carregamento da tabela de arrecadação (cacheado)
+# 3) Backend das consultas (um por processo, compartilhado entre sessões)
 # --------------------------------------------------
 
-@st.cache_data(show_spinner=False)
-def load_arrecadacao():
-    df = pd.read_sql("SELECT * FROM arrecadacao_federal", engine)
-
-    colunas_fixas = {"ano", "mes", "sigla_uf", "sigla_uf_nome", "ano_mes"}
-    todas_colunas = set(df.columns)
-    colunas_tributos = sorted(list(todas_colunas - colunas_fixas))
-
-    for col in colunas_tributos:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-
-    if "receita_total" not in df.columns:
-        df["receita_total"] = df[colunas_tributos].sum(axis=1)
-
-    if "ano_mes" not in df.columns:
-        df["ano_mes"] = pd.to_datetime(
-            df["ano"].astype(str) + "-" + df["mes"].astype(str).str.zfill(2),
-            format="%Y-%m",
-            errors="coerce"
-        )
-
-    return df, colunas_tributos
+# pandas ou DuckDB, conforme DASHBOARD_BACKEND (ver backends.py). O backend
+# recarrega os dados sozinho quando os arquivos mudam, e o aquecimento deixa
+# a visão padrão das duas páginas pronta em segundo plano.
+backend = backend_padrao()
+if configuracao.AQUECER:
+    aquecimento.iniciar_em_segundo_plano()
 
-df_arrec, colunas_tributos = load_arrecadacao()
+colunas_tributos = backend.colunas_tributos()
 
 # --------------------------------------------------
 # 4) Função para “limpar” nomes de coluna
 # --------------------------------------------------
 
-def limpar_nome(col):
-    return col.replace("_", " ").capitalize()
+limpar_nome = agregacoes.limpar_nome
 
 dicionario_limpo_para_original = {"Receita Total": "receita_total"}
 for trib in colunas_tributos:
@@ -95,16 +83,35 @@ opcoes_tributos_limpos.sort()
 
 st.sidebar.header("Filtros de Análise")
 
-# 5.1) Filtro de UF
-ufs = sorted(df_arrec["sigla_uf"].unique().tolist())
+# 5.1) Filtro de UF (ou de região) e agrupamento
+ufs = backend.ufs()
 uf_selecionada = st.sidebar.selectbox(
     "Unidade da Federação (UF):",
-    options=["Todas"] + ufs,
-    index=0
+    options=["Todas"] + list(agregacoes.REGIOES) + ufs,
+    index=0,
+    format_func=lambda opcao: f"Região {opcao}" if opcao in agregacoes.REGIOES else opcao,
 )
+# Chave do st.plotly_chart do mapa: o session_state guarda nela a seleção que
+# filtra a série e o crescimento (ver seção 10)
+CHAVE_SELECAO_MAPA = "mapa_selecao"
+
+
+def limpar_selecao_mapa():
+    # Uma seleção feita no mapa por UF não vale no mapa por região, e vice-versa
+    st.session_state.pop(CHAVE_SELECAO_MAPA, None)
+
+
+agrupamento = st.sidebar.radio(
+    "Agrupar por:",
+    options=["UF", "Região"],
+    index=0,
+    horizontal=True,
+    on_change=limpar_selecao_mapa,
+)
+por_regiao = agrupamento == "Região"
 
 # 5.2) Filtro de intervalo de anos (2000–2024)
-anos_disponiveis = sorted(df_arrec["ano"].unique().tolist())
+anos_disponiveis = backend.anos()
 anos_validos = [ano for ano in anos_disponiveis if 2000 <= ano <= 2024]
 if not anos_validos:
     st.warning("Não há registros de arrecadação entre 2000 e 2024.")
@@ -131,7 +138,15 @@ nivel_detail = st.sidebar.radio(
     index=1  # Mensal por padrão
 )
 
-# 5.5) Tributo para Mapa (nome limpo)
+# 5.5) Previsão e série dessazonalizada (só no nível mensal; ver previsao.py)
+mostrar_previsao = st.sidebar.checkbox(
+    "Previsão (12 meses) e série dessazonalizada",
+    value=False,
+    disabled=nivel_detail != "Mensal",
+    help="Sobrepõe à série mensal a série sem sazonalidade e a previsão Holt-Winters dos 12 meses após o fim da base.",
+) and nivel_detail == "Mensal"
+
+# 5.6) Tributo para Mapa (nome limpo)
 tributo_mapa_limpo = st.sidebar.selectbox(
     "Tributo para Mapa (Média Mensal por UF):",
     options=opcoes_tributos_limpos,
@@ -139,197 +154,117 @@ tributo_mapa_limpo = st.sidebar.selectbox(
 )
 tributo_mapa = dicionario_limpo_para_original[tributo_mapa_limpo]
 
+# 5.7) Selo de qualidade da base (verificada na carga; ver qualidade.py)
+relatorio_qualidade = backend.relatorio_qualidade("arrecadacao")
+texto_selo, icone_selo, cor_selo = relatorio_qualidade.selo()
+st.sidebar.badge(
+    texto_selo, icon=icone_selo, color=cor_selo,
+    help=f"{relatorio_qualidade.resumo()}. Nada foi removido da base: as linhas com problema "
+         "podem ser baixadas em “Exportar resultados filtrados” (tabela de quarentena).",
+)
+
 # --------------------------------------------------
-# 6) Filtragem do DataFrame de arrecadação
+# 6) Filtros comuns às consultas
 # --------------------------------------------------
 
-df_filtrado = df_arrec.copy()
-
-if uf_selecionada != "Todas":
-    df_filtrado = df_filtrado[df_filtrado["sigla_uf"] == uf_selecionada]
-
-df_filtrado = df_filtrado[
-    (df_filtrado["ano"] >= ano_inicio) &
-    (df_filtrado["ano"] <= ano_fim)
-]
+# A filtragem em si acontece dentro do backend, em cada consulta
+filtros = (uf_selecionada, ano_inicio, ano_fim)
 
 # --------------------------------------------------
 # 7) Gráfico 1: Série Temporal com Drill-Down/Up e Top-5
 # --------------------------------------------------
 
-st.subheader("1. Evolução do Tributo Selecionado")
-
-if df_filtrado.empty:
-    st.warning("Não há dados de arrecadação para esses filtros (UF ou período).")
-else:
-    if nivel_detail == "Mensal":
-        if "ano_mes" not in df_filtrado.columns or df_filtrado["ano_mes"].isna().all():
-            df_filtrado["ano_mes"] = pd.to_datetime(
-                df_filtrado["ano"].astype(str) + "-" +
-                df_filtrado["mes"].astype(str).str.zfill(2),
-                format="%Y-%m",
-                errors="coerce"
-            )
-
-    if nivel_detail == "Anual":
-        df_agrupado = (
-            df_filtrado
-            .groupby(["ano", "sigla_uf"], as_index=False)[[tributo_serie]]
-            .sum()
-            .rename(columns={tributo_serie: "valor_agrupado"})
-        )
-        eixo_x = "ano"
-        label_x = "Ano"
-        titulo_tempo = f"Série Anual de {tributo_serie_limpo} ({ano_inicio}–{ano_fim})"
+def preparar_serie(filtros, tributo_serie, tributo_serie_limpo, nivel_detail, por_regiao, mostrar_previsao):
+    """
+    Gráfico das 5 UFs de maior arrecadação (ver figuras.figura_serie) ou,
+    agrupado por região, de todas as regiões do filtro (figuras.figura_serie_regiao);
+    com a previsão, o mesmo gráfico com as linhas de figuras.figura_serie_com_previsao.
+    """
+    if mostrar_previsao:
+        return figuras.figura_serie_com_previsao(backend, *filtros, tributo_serie, tributo_serie_limpo, por_regiao)
+    figura = figuras.figura_serie_regiao if por_regiao else figuras.figura_serie
+    return figura(backend, *filtros, tributo_serie, tributo_serie_limpo, nivel_detail)
+
+
+def exibir_serie(fig_tempo, por_regiao, mostrar_previsao):
+    if fig_tempo is None:
+        st.warning("Não há dados de arrecadação para esses filtros (UF ou período).")
+        return
+
+    st.plotly_chart(fig_tempo, use_container_width=True)
+    if por_regiao:
+        st.markdown("*Cada linha soma todas as UFs da região que passam pelo filtro de UF.*")
     else:
-        df_agrupado = df_filtrado.rename(columns={tributo_serie: "valor_agrupado"})
-        eixo_x = "ano_mes"
-        label_x = "Ano-Mês"
-        titulo_tempo = f"Série Mensal de {tributo_serie_limpo} ({ano_inicio}–{ano_fim})"
-
-    soma_por_uf = (
-        df_agrupado
-        .groupby("sigla_uf")["valor_agrupado"]
-        .sum()
-        .sort_values(ascending=False)
-    )
-    top5_ufs = soma_por_uf.head(5).index.tolist()
-    df_top5 = df_agrupado[df_agrupado["sigla_uf"].isin(top5_ufs)]
-
-    fig_tempo = px.line(
-        df_top5.sort_values(eixo_x),
-        x=eixo_x,
-        y="valor_agrupado",
-        color="sigla_uf",
-        labels={
-            eixo_x: label_x,
-            "valor_agrupado": tributo_serie_limpo + " (R$)",
-            "sigla_uf": "UF"
-        },
-        title=titulo_tempo + "  (Top 5 UFs por Arrecadação)"
-    )
-    fig_tempo.update_layout(legend_title_text="UF")
-
-    if nivel_detail == "Mensal":
-        fig_tempo.update_traces(
-            hovertemplate=(
-                "<b>UF: %{color}</b><br>"
-                f"{label_x}: %{{x|%Y-%m}}<br>"
-                f"{tributo_serie_limpo}: R$ %{{y:,.2f}}<extra></extra>"
-            )
+        st.markdown(
+            "*Observe que, por padrão, estamos exibindo apenas as 5 UFs com maior soma de receita no período filtrado.*"
         )
-    else:
-        fig_tempo.update_traces(
-            hovertemplate=(
-                "<b>UF: %{color}</b><br>"
-                f"Ano: %{{x}}<br>"
-                f"{tributo_serie_limpo}: R$ %{{y:,.2f}}<extra></extra>"
-            )
+    if mostrar_previsao:
+        st.markdown(
+            "*Linhas pontilhadas: série dessazonalizada. Tracejadas: previsão dos 12 meses seguintes ao fim da base "
+            "(aparece só se a faixa de anos chega ao último ano). Clique numa linha da legenda para ocultá-la com as suas.*"
         )
 
-    st.plotly_chart(fig_tempo, use_container_width=True)
-    st.markdown(
-        "*Observe que, por padrão, estamos exibindo apenas as 5 UFs com maior soma de receita no período filtrado.*"
-    )
-
 # --------------------------------------------------
 # 8) Mapa e Tabela: Média Mensal do Tributo por UF
 # --------------------------------------------------
 
-st.subheader("2. Tabela e Mapa: Média Mensal do Tributo por UF")
-
 CAMINHO_GEOJSON = "geojson/ufs_brasil.json"
-if not os.path.isfile(CAMINHO_GEOJSON):
-    st.warning(
-        f"GeoJSON não encontrado em `{CAMINHO_GEOJSON}`.\n"
-        "Certifique-se de gerar `ufs_brasil.json` dentro da pasta `geojson/`, "
-        "com `properties.sigla` para cada UF."
-    )
-else:
-    with open(CAMINHO_GEOJSON, "r", encoding="utf-8") as f:
-        geojson_uf = json.load(f)
-
-    df_mapa = (
-        df_filtrado
-        .groupby("sigla_uf", as_index=False)[[tributo_mapa]]
-        .mean()
-        .rename(columns={tributo_mapa: "valor_medio"})
-    )
-
-    if df_mapa.empty:
-        st.info("Não há dados suficientes para gerar a tabela ou o mapa.")
-    else:
-        df_mapa["sigla_uf"] = df_mapa["sigla_uf"].str.upper().str.strip()
-        df_mapa["Valor Médio (R$)"] = df_mapa["valor_medio"].apply(lambda x: f"R$ {x:,.2f}")
-
-        df_exibir = df_mapa[["sigla_uf", "Valor Médio (R$)"]].rename(columns={"sigla_uf": "UF"})
-        st.markdown("**Tabela de Amostra: Média Mensal por UF**")
-        st.dataframe(df_exibir, use_container_width=True)
-
-        fig_mapa = px.choropleth(
-            df_mapa,
-            geojson=geojson_uf,
-            locations="sigla_uf",
-            featureidkey="properties.sigla",
-            color="valor_medio",
-            color_continuous_scale="plasma",
-            labels={"valor_medio": f"Média de {tributo_mapa_limpo} (R$)"},
-            title=f"Média Mensal de {tributo_mapa_limpo} por UF",
-        )
 
-        fig_mapa.update_geos(fitbounds="locations", visible=False)
-        fig_mapa.update_traces(marker_line_color="white", marker_line_width=0.8)
 
-        hover_map = (
-            "<b>UF: %{location}</b><br>"
-            f"Média de {tributo_mapa_limpo}: R$ %{{z:,.2f}}<extra></extra>"
-        )
-        fig_mapa.update_traces(hovertemplate=hover_map)
+def preparar_mapa(filtros, tributo_mapa, tributo_mapa_limpo, por_regiao):
+    """
+    Tabela e choropleth da média mensal por UF ou por região (ver
+    figuras.figura_mapa e figuras.figura_mapa_regiao). Devolve (tabela,
+    figura); ambos None se o GeoJSON não existir, e a figura None se não
+    houver dados.
+    """
+    figura = figuras.figura_mapa_regiao if por_regiao else figuras.figura_mapa
+    return figura(backend, *filtros, tributo_mapa, tributo_mapa_limpo)
 
-        fig_mapa.update_coloraxes(
-            colorbar_title_text=f"Média de {tributo_mapa_limpo} (R$)",
-            colorbar_tickprefix="R$ ",
-            colorbar_tickformat=",.0f"
-        )
 
-        fig_mapa.update_layout(
-            margin={"r": 0, "t": 40, "l": 0, "b": 0},
-            template="plotly_dark",
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)"
+def exibir_mapa(df_exibir, fig_mapa):
+    if df_exibir is None:
+        st.warning(
+            f"GeoJSON não encontrado em `{CAMINHO_GEOJSON}`.\n"
+            "Certifique-se de gerar `ufs_brasil.json` dentro da pasta `geojson/`, "
+            "com `properties.sigla` para cada UF."
         )
+        return
 
-        st.plotly_chart(fig_mapa, use_container_width=True)
+    if fig_mapa is None:
+        st.info("Não há dados suficientes para gerar a tabela ou o mapa.")
+        return
+
+    st.markdown(f"**Tabela de Amostra: Média Mensal por {agrupamento}**")
+    st.dataframe(df_exibir, use_container_width=True)
+    st.caption("Clique numa UF, ou use a caixa ou o laço da barra do mapa, para filtrar a série e o crescimento.")
+    st.plotly_chart(
+        fig_mapa, use_container_width=True, key=CHAVE_SELECAO_MAPA,
+        on_select="rerun", selection_mode=("points", "box", "lasso"),
+    )
 
 # --------------------------------------------------
 # 9) CTA: Crescimento percentual dinâmico no intervalo selecionado
 # --------------------------------------------------
 
-st.subheader("3. Crescimento Percentual no Intervalo Selecionado")
+def preparar_crescimento(filtros, tributo_serie):
+    """
+    Calcula o crescimento percentual de cada UF entre ano_inicio e ano_fim.
+    Devolve (top_quedas, top_crescimentos) ou None se faltar um dos anos.
+    """
+    crescimento = backend.crescimento_percentual(*filtros, tributo_serie)
+    if crescimento is None:
+        return None
 
-# 9.1) Soma anual do tributo_serie por UF, mas só dentro do intervalo de anos filtrado
-soma_ano = (
-    df_filtrado
-    .groupby(["ano", "sigla_uf"])[tributo_serie]
-    .sum()
-    .reset_index()
-)
+    return crescimento.head(3), crescimento.tail(3)
 
-# 9.2) Agora usamos ano_inicio e ano_fim do filtro (em vez de "2000" e "2024" fixos)
-if ano_inicio in soma_ano["ano"].values and ano_fim in soma_ano["ano"].values:
-    soma_start = (
-        soma_ano[soma_ano["ano"] == ano_inicio]
-        .set_index("sigla_uf")[tributo_serie]
-    )
-    soma_end = (
-        soma_ano[soma_ano["ano"] == ano_fim]
-        .set_index("sigla_uf")[tributo_serie]
-    )
-    comuns = soma_start.index.intersection(soma_end.index)
-    crescimento = ((soma_end[comuns] - soma_start[comuns]) / soma_start[comuns] * 100).sort_values()
 
-    top_quedas = crescimento.head(3)
-    top_crescimentos = crescimento.tail(3)
+def exibir_crescimento(resultado, ano_inicio, ano_fim):
+    if resultado is None:
+        st.info(f"Não há valores de {ano_inicio} e/ou {ano_fim} suficientes para calcular crescimento percentual neste intervalo.")
+        return
+
+    top_quedas, top_crescimentos = resultado
 
     st.markdown(f"**Três UFs com maior queda percentual ({ano_inicio} → {ano_fim}):**")
     if not top_quedas.empty:
@@ -352,5 +287,183 @@ if ano_inicio in soma_ano["ano"].values and ano_fim in soma_ano["ano"].values:
         st.table(df_cres)
     else:
         st.write("Não há dados completos para calcular crescimentos neste intervalo.")
-else:
-    st.info(f"Não há valores de {ano_inicio} e/ou {ano_fim} suficientes para calcular crescimento percentual neste intervalo.")
+
+# --------------------------------------------------
+# 10) Preparação paralela e renderização progressiva das seções
+# --------------------------------------------------
+
+# As três seções dependem apenas dos filtros, então são
+# calculadas ao mesmo tempo; cada uma ocupa um placeholder que mostra um aviso
+# de carregamento até o resultado ficar pronto. O tempo total da página tende
+# ao da seção mais lenta, e não à soma de todas.
+#
+# Filtro cruzado: UFs (ou regiões) selecionadas no mapa, com clique, caixa ou
+# laço, restringem a série e o crescimento. As três seções ficam num único
+# fragmento, de modo que uma seleção no mapa reexecuta só elas, sem a sidebar
+# nem a exportação. O mapa continua com os filtros da sidebar, para que a
+# seleção possa ser trocada.
+
+
+def ufs_selecionadas_no_mapa(selecao):
+    """
+    Siglas dos pontos selecionados no mapa. No mapa por região, qualquer UF
+    selecionada traz a região inteira (a região vem em customdata).
+    """
+    ufs = set()
+    for ponto in selecao["points"] if selecao else ():
+        regiao = (ponto.get("customdata") or [None])[0] if por_regiao else None
+        if regiao in agregacoes.REGIOES:
+            ufs.update(agregacoes.REGIOES[regiao])
+        elif ponto.get("location"):
+            ufs.add(ponto["location"])
+    return ufs
+
+
+def filtro_uf_cruzado(uf_selecionada, ufs_no_mapa):
+    """
+    Filtro de UF da série e do crescimento: o da sidebar restrito às UFs
+    selecionadas no mapa (uma sigla, ou uma tupla de siglas na ordem de
+    agregacoes.SIGLAS_UF). Sem seleção, ou com todas as UFs do filtro
+    selecionadas, fica o da sidebar, que já tem as consultas em cache.
+    """
+    ufs_do_filtro = agregacoes.ufs_do_filtro(uf_selecionada)
+    ufs = tuple(s for s in agregacoes.SIGLAS_UF if s in ufs_no_mapa and s in ufs_do_filtro)
+    if not ufs or len(ufs) == len(ufs_do_filtro):
+        return uf_selecionada
+    return ufs[0] if len(ufs) == 1 else ufs
+
+
+def exibir_filtro_cruzado(uf_cruzada):
+    if uf_cruzada == uf_selecionada:
+        return
+    ufs = uf_cruzada if isinstance(uf_cruzada, tuple) else (uf_cruzada,)
+    if por_regiao:
+        ufs = [regiao for regiao, siglas in agregacoes.REGIOES.items() if set(siglas) & set(ufs)]
+    st.caption(
+        f"🔎 Filtrado pela seleção no mapa: **{', '.join(ufs)}**. "
+        "Dê um duplo clique no mapa para limpar a seleção."
+    )
+
+
+@st.fragment
+def secoes_filtradas():
+    estado_mapa = st.session_state.get(CHAVE_SELECAO_MAPA)
+    uf_cruzada = filtro_uf_cruzado(uf_selecionada, ufs_selecionadas_no_mapa(estado_mapa and estado_mapa["selection"]))
+    filtros_cruzados = (uf_cruzada, ano_inicio, ano_fim)
+
+    st.subheader("1. Evolução do Tributo Selecionado")
+    placeholder_serie = st.empty()
+    placeholder_serie.info("⏳ Calculando a série temporal...")
+
+    st.subheader(f"2. Tabela e Mapa: Média Mensal do Tributo por {agrupamento}")
+    placeholder_mapa = st.empty()
+    placeholder_mapa.info(f"⏳ Carregando o GeoJSON e calculando as médias por {agrupamento}...")
+
+    st.subheader("3. Crescimento Percentual no Intervalo Selecionado")
+    placeholder_crescimento = st.empty()
+    placeholder_crescimento.info("⏳ Calculando o crescimento percentual...")
+
+    tarefas = {
+        "serie": (preparar_serie, (filtros_cruzados, tributo_serie, tributo_serie_limpo, nivel_detail, por_regiao, mostrar_previsao)),
+        "mapa": (preparar_mapa, (filtros, tributo_mapa, tributo_mapa_limpo, por_regiao)),
+        "crescimento": (preparar_crescimento, (filtros_cruzados, tributo_serie)),
+    }
+
+    placeholders = {"serie": placeholder_serie, "mapa": placeholder_mapa, "crescimento": placeholder_crescimento}
+    for nome, resultado, erro in executar_em_paralelo(tarefas):
+        if erro is not None:
+            # Só esta seção fica com o erro; as outras seguem sendo desenhadas
+            placeholders[nome].error(f"Não foi possível montar esta seção: {type(erro).__name__}: {erro}")
+            traceback.print_exception(erro)
+        elif nome == "serie":
+            with placeholder_serie.container():
+                exibir_filtro_cruzado(uf_cruzada)
+                exibir_serie(resultado, por_regiao, mostrar_previsao)
+        elif nome == "mapa":
+            with placeholder_mapa.container():
+                exibir_mapa(*resultado)
+        else:
+            with placeholder_crescimento.container():
+                exibir_filtro_cruzado(uf_cruzada)
+                exibir_crescimento(resultado, ano_inicio, ano_fim)
+
+
+secoes_filtradas()
+
+# --------------------------------------------------
+# 11) Exportação dos resultados filtrados (CSV / Parquet / XLSX)
+# --------------------------------------------------
+
+TABELAS_EXPORTACAO = {
+    "Série temporal (todas as UFs)": "serie",
+    "Série temporal por região": "serie_regiao",
+    "Tabela do mapa (média mensal por UF)": "mapa",
+    "Média mensal por região": "mapa_regiao",
+    "Crescimento percentual por UF": "crescimento",
+    "Dados filtrados (todos os tributos)": "dados",
+    "Quarentena da base (qualidade)": "quarentena",
+    "Meses faltando na base": "lacunas",
+}
+
+
+def montar_tabela_exportacao(tabela, uf, ano_inicio, ano_fim, tributo, nivel):
+    if tabela == "serie":
+        return (
+            backend.serie_tributo(uf, ano_inicio, ano_fim, tributo, nivel, top=None)
+            .rename(columns={"valor_agrupado": tributo})
+        )
+    if tabela == "serie_regiao":
+        return (
+            backend.serie_regiao(uf, ano_inicio, ano_fim, tributo, nivel)
+            .rename(columns={"valor_agrupado": tributo})
+        )
+    if tabela == "mapa":
+        return backend.media_mensal_por_uf(uf, ano_inicio, ano_fim, tributo).rename(columns={"valor_medio": tributo})
+    if tabela == "mapa_regiao":
+        return backend.media_mensal_por_regiao(uf, ano_inicio, ano_fim, tributo).rename(columns={"valor_medio": tributo})
+    if tabela == "crescimento":
+        crescimento = backend.crescimento_percentual(uf, ano_inicio, ano_fim, tributo)
+        if crescimento is None:
+            crescimento = pd.Series(dtype="float64")
+        return pd.DataFrame({"sigla_uf": crescimento.index, "crescimento_pct": crescimento.values})
+    if tabela in ("quarentena", "lacunas"):
+        return getattr(backend.relatorio_qualidade("arrecadacao"), tabela)
+    return backend.linhas_arrecadacao(uf, ano_inicio, ano_fim)
+
+
+# cache_resource (e não cache_data) para que os bytes exportados sejam
+# compartilhados entre sessões sem serem copiados/serializados a cada acesso.
+@st.cache_resource(show_spinner=False, max_entries=16)
+def exportar_tabela(versao, tabela, formato, uf, ano_inicio, ano_fim, tributo, nivel):
+    df = montar_tabela_exportacao(tabela, uf, ano_inicio, ano_fim, tributo, nivel)
+    return exportacao.exportar(df, formato, nome_planilha=tabela)
+
+
+with st.expander("⬇️ Exportar resultados filtrados"):
+    tabela_exp = TABELAS_EXPORTACAO[st.selectbox("Tabela:", options=list(TABELAS_EXPORTACAO))]
+    formato_exp = st.radio(
+        "Formato:",
+        options=list(exportacao.FORMATOS),
+        format_func=lambda f: exportacao.FORMATOS[f]["rotulo"],
+        horizontal=True,
+    )
+
+    # Só os filtros que afetam a tabela escolhida entram na chave do cache
+    tributo_exp = tributo_mapa if tabela_exp in ("mapa", "mapa_regiao") else tributo_serie
+    nivel_exp = nivel_detail if tabela_exp in ("serie", "serie_regiao") else ""
+    if tabela_exp in ("dados", "quarentena", "lacunas"):
+        tributo_exp = ""
+
+    st.download_button(
+        "Baixar arquivo",
+        # Gerado só no clique, numa thread separada da execução da página
+        data=partial(
+            exportar_tabela, agregacoes.versao_dados(), tabela_exp, formato_exp,
+            uf_selecionada, ano_inicio, ano_fim, tributo_exp, nivel_exp,
+        ),
+        file_name=exportacao.nome_arquivo(
+            f"{tabela_exp}_{uf_selecionada}_{ano_inicio}_{ano_fim}".lower(), formato_exp
+        ),
+        mime=exportacao.FORMATOS[formato_exp]["mime"],
+        on_click="ignore",
+    )
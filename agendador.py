@@ -0,0 +1,85 @@
+# agendador.py
+
+"""
+Agendador mínimo de tarefas para as páginas do dashboard.
+
+As seções de uma página (série temporal, mapa, crescimento...) dependem apenas
+dos filtros e do DataFrame já filtrado, então podem ser preparadas ao mesmo
+tempo. Este módulo executa essas preparações num pool de threads compartilhado
+pelo processo e devolve os resultados à medida que ficam prontos, para que a
+página renderize cada seção no seu placeholder sem esperar pelas demais.
+
+Nenhuma função agendada deve chamar `st.*` para desenhar na tela: elas apenas
+calculam (agregações, figuras, tabelas) e a renderização fica na thread da
+página.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# --------------------------------------------------
+# 1) Pool de threads único por processo
+# --------------------------------------------------
+
+# Pandas libera o GIL em boa parte dos groupby/somas, então algumas poucas
+# threads bastam; o limite evita que várias sessões simultâneas disparem
+# dezenas de threads cada uma.
+MAX_TRABALHADORES = min(8, (os.cpu_count() or 1) + 2)
+
+_executor = ThreadPoolExecutor(
+    max_workers=MAX_TRABALHADORES,
+    thread_name_prefix="secao",
+)
+
+
+# --------------------------------------------------
+# 2) Execução das tarefas
+# --------------------------------------------------
+
+def _com_contexto(ctx, funcao, args, kwargs):
+    """
+    Executa `funcao` anexando o contexto da sessão Streamlit à thread do pool,
+    para que funções com `st.cache_data` continuem usando o cache sem avisos
+    de "missing ScriptRunContext".
+    """
+    thread = threading.current_thread()
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+    try:
+        return funcao(*args, **kwargs)
+    finally:
+        if ctx is not None:
+            add_script_run_ctx(thread, None)
+
+
+def executar_em_paralelo(tarefas):
+    """
+    Recebe um dict {nome: (funcao, args, kwargs)} e devolve um gerador de
+    triplas (nome, resultado, erro) na ordem em que as tarefas terminam.
+
+    `args` e `kwargs` são opcionais: (funcao,) ou (funcao, args) também são
+    aceitos. Uma exceção levantada dentro de uma tarefa não interrompe as
+    demais: vem em `erro` (com `resultado` None), para que a página mostre o
+    erro só no placeholder daquela seção. Se quem consome o gerador parar
+    antes do fim (ex.: o Streamlit interrompe a execução por um novo
+    filtro), as tarefas que ainda não começaram são canceladas.
+    """
+    ctx = get_script_run_ctx()
+    futuros = {}
+    for nome, tarefa in tarefas.items():
+        funcao, *resto = tarefa
+        args = resto[0] if len(resto) > 0 else ()
+        kwargs = resto[1] if len(resto) > 1 else {}
+        futuro = _executor.submit(_com_contexto, ctx, funcao, args, kwargs)
+        futuros[futuro] = nome
+
+    try:
+        for futuro in as_completed(futuros):
+            erro = futuro.exception()
+            yield futuros[futuro], (None if erro else futuro.result()), erro
+    finally:
+        for futuro in futuros:
+            futuro.cancel()
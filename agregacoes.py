@@ -0,0 +1,714 @@
+# agregacoes.py
+
+"""
+Carregamento das bases e agregações do dashboard, sem dependência do Streamlit.
+
+As páginas (`1_Tributos_Federais.py` e `pages/2_Carga_por_CNAE.py`) e a API
+(`api.py`) usam as mesmas funções daqui, de modo que um número exibido na tela
+é exatamente o mesmo devolvido pela API. O cache fica a cargo de quem chama
+(ver `backends.py`), invalidado por `versao_dados()`.
+
+A tabela de arrecadação pode estar em dois formatos, e todas as agregações
+aceitam os dois:
+- completo: como está no SQLite (ano, mes, sigla_uf, sigla_uf_nome, ano_mes e
+  os tributos em float64);
+- compacto (`compactar_arrecadacao`): `uf` como código uint8 em SIGLAS_UF,
+  `periodo` como índice mensal uint16 (ano * 12 + mes - 1) e os tributos em
+  centavos inteiros (int32 ou int64, esparsos quando ocupam menos). Datas e
+  siglas só são reconstruídas nos resultados agregados.
+
+No formato completo, os valores podem estar em reais (float) ou, no modo
+exato (`exato=True` nos loaders), em centavos int64; o compacto sempre guarda
+centavos. No modo exato todas
+as somas e agrupamentos são feitos em aritmética inteira, sem erro de
+arredondamento acumulado, e o resultado agregado volta a reais (dividido por
+100) apenas no final de cada função, já pronto para exibição.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import qualidade
+
+# --------------------------------------------------
+# 1) Caminhos das bases (relativos à pasta do projeto)
+# --------------------------------------------------
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+DB_PATH = os.path.join(PASTA_PROJETO, "base_de_dados", "tributos.db")
+EXCEL_CNAE = os.path.join(PASTA_PROJETO, "base_de_dados", "arrecadacao_CNAE_2016_2024.xlsx")
+CAMINHO_GEOJSON = os.path.join(PASTA_PROJETO, "geojson", "ufs_brasil.json")
+
+# Pasta servida pelo Streamlit em app/static/ (server.enableStaticServing,
+# ligado em .streamlit/config.toml), ao lado da página principal
+PASTA_ESTATICA = os.path.join(PASTA_PROJETO, "static")
+
+COLUNAS_FIXAS = {"ano", "mes", "sigla_uf", "sigla_uf_nome", "ano_mes"}
+
+# Tabela de códigos das UFs no formato compacto (código = posição na tupla)
+SIGLAS_UF = (
+    "AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA",
+    "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO",
+)
+
+# Regiões do IBGE, na ordem oficial. Nos filtros, `uf` aceita também o nome
+# de uma região (ex.: "Nordeste"), que seleciona todas as suas UFs.
+REGIOES = {
+    "Norte": ("AC", "AM", "AP", "PA", "RO", "RR", "TO"),
+    "Nordeste": ("AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"),
+    "Centro-Oeste": ("DF", "GO", "MS", "MT"),
+    "Sudeste": ("ES", "MG", "RJ", "SP"),
+    "Sul": ("PR", "RS", "SC"),
+}
+NOMES_REGIOES = tuple(REGIOES)
+
+# Código da região (posição em NOMES_REGIOES) de cada código de UF (posição em
+# SIGLAS_UF): `REGIAO_DA_UF[codigos_uf]` dá a região de cada linha de uma vez
+REGIAO_DA_UF = np.array(
+    [next(i for i, ufs in enumerate(REGIOES.values()) if sigla in ufs) for sigla in SIGLAS_UF],
+    dtype="uint8",
+)
+
+TRIBUTOS_NATUREZA = [
+    "imposto_importacao", "imposto_exportacao", "ipi", "irpf", "irpj", "irrf",
+    "iof", "itr", "cofins", "pis_pasep", "csll", "cide_combustiveis",
+    "contribuicao_previdenciaria", "cpsss", "pagamento_unificado",
+    "outras_receitas_rfb", "demais_receitas"
+]
+
+# --------------------------------------------------
+# 2) Versão dos dados
+# --------------------------------------------------
+
+def versao_dados(caminhos=(DB_PATH, EXCEL_CNAE, CAMINHO_GEOJSON)):
+    """
+    Identificador curto que muda sempre que algum arquivo de dados muda
+    (tamanho ou data de modificação). Serve de chave de cache e de ETag.
+    """
+    h = hashlib.sha1()
+    for caminho in caminhos:
+        if os.path.isfile(caminho):
+            info = os.stat(caminho)
+            h.update(f"{caminho}:{info.st_size}:{info.st_mtime_ns};".encode())
+        else:
+            h.update(f"{caminho}:ausente;".encode())
+    return h.hexdigest()[:16]
+
+
+def ultima_modificacao(caminhos=(DB_PATH, EXCEL_CNAE, CAMINHO_GEOJSON)):
+    """Maior data de modificação (epoch, em segundos) entre os arquivos existentes."""
+    datas = [os.stat(c).st_mtime for c in caminhos if os.path.isfile(c)]
+    return max(datas) if datas else 0.0
+
+# --------------------------------------------------
+# 3) Loaders
+# --------------------------------------------------
+
+def load_arrecadacao(db_path=DB_PATH, compacto=False, exato=False, com_relatorio=False):
+    """
+    Lê `arrecadacao_federal` do SQLite e devolve (df, colunas_tributos).
+    Com `compacto=True`, o df sai no formato de `compactar_arrecadacao`; com
+    `exato=True`, os tributos e `receita_total` ficam em centavos int64. Com
+    `com_relatorio=True`, devolve (df, colunas_tributos, relatório) com as
+    verificações de `qualidade.py`, feitas antes das conversões dos modos.
+    """
+    # sqlite3 da biblioteca padrão: evita importar o SQLAlchemy só para uma leitura
+    with closing(sqlite3.connect(db_path)) as conexao:
+        df = pd.read_sql("SELECT * FROM arrecadacao_federal", conexao)
+
+    todas_colunas = set(df.columns)
+    colunas_tributos = sorted(list(todas_colunas - COLUNAS_FIXAS))
+
+    conversao = qualidade.converter_numericos(df, colunas_tributos)
+    relatorio = qualidade.verificar("arrecadacao", df, colunas_tributos, "sigla_uf", conversao)
+    if exato:
+        for col in colunas_tributos:
+            df[col] = para_centavos(df[col])
+
+    if "receita_total" not in df.columns:
+        df["receita_total"] = df[colunas_tributos].sum(axis=1)
+
+    if "ano_mes" not in df.columns:
+        df["ano_mes"] = pd.to_datetime(
+            df["ano"].astype(str) + "-" + df["mes"].astype(str).str.zfill(2),
+            format="%Y-%m",
+            errors="coerce"
+        )
+
+    if compacto:
+        df = compactar_arrecadacao(df, colunas_tributos)
+
+    if com_relatorio:
+        return df, colunas_tributos, relatorio
+    return df, colunas_tributos
+
+
+def compactar_arrecadacao(df, colunas_tributos):
+    """
+    Converte a tabela de arrecadação para o formato compacto: `uf` (uint8,
+    índice em SIGLAS_UF), `periodo` (uint16, ano * 12 + mes - 1) e os tributos
+    e `receita_total` em centavos inteiros (como no modo exato), cada coluna
+    no menor formato que guarda todos os valores: int32 se couber, senão
+    int64, e esparso (só os valores diferentes de zero) quando ocupa menos.
+    Os valores não mudam até o centavo, a precisão que os gráficos mostram, e
+    as somas ficam em aritmética inteira.
+
+    Ocupa cerca de 56% da memória do original (2,1 MB contra 3,7 MB na base
+    atual, 1,8x menos). Não há formato sem perda menor: os maiores valores
+    (1,1e11 reais) pedem 44 bits em centavos, 81 mil dos 374 mil valores não
+    cabem em int32, e float32 ou milhares de reais mudariam o hover.
+    """
+    codigos = pd.Categorical(df["sigla_uf"].str.upper().str.strip(), categories=SIGLAS_UF).codes
+    if (codigos < 0).any():
+        desconhecidas = sorted(set(df["sigla_uf"][codigos < 0]))
+        raise ValueError(f"UF fora de SIGLAS_UF: {desconhecidas}")
+
+    colunas = {
+        "uf": codigos.astype("uint8"),
+        "periodo": (df["ano"].to_numpy() * 12 + df["mes"].to_numpy() - 1).astype("uint16"),
+    }
+    for col in colunas_tributos + ["receita_total"]:
+        colunas[col] = _centavos_compactos(df[col])
+    return pd.DataFrame(colunas)
+
+
+def _centavos_compactos(serie):
+    """Centavos de `serie` (reais ou já centavos) em int32 ou int64, esparsos se ocuparem menos."""
+    centavos = (serie if _exato(serie) else para_centavos(serie)).to_numpy(dtype="int64")
+    limite = np.iinfo("int32")
+    if centavos.size and limite.min <= centavos.min() and centavos.max() <= limite.max:
+        centavos = centavos.astype("int32")
+    # O esparso guarda, por valor não nulo, o valor e a posição (int32)
+    nao_nulos = np.count_nonzero(centavos)
+    if nao_nulos * (centavos.itemsize + 4) < centavos.nbytes:
+        return pd.arrays.SparseArray(centavos, fill_value=0)
+    return centavos
+
+
+def eh_compacto(df):
+    return "periodo" in df.columns
+
+
+def linhas_para_exibicao(df, colunas_valores):
+    """
+    Devolve as linhas (não agregadas) no formato original, para exportação:
+    reconstrói ano, mes, sigla_uf e ano_mes de um df compacto e converte as
+    `colunas_valores` em centavos de volta para reais.
+    """
+    if eh_compacto(df):
+        periodo = df["periodo"].to_numpy().astype("int64")
+        chaves = pd.DataFrame({
+            "ano": periodo // 12,
+            "mes": periodo % 12 + 1,
+            "sigla_uf": _siglas(df["uf"].to_numpy()),
+            "ano_mes": _datas(periodo),
+        }, index=df.index)
+        df = pd.concat([chaves, df.drop(columns=["uf", "periodo"])], axis=1)
+
+    convertidas = {
+        col: _valores(df, col) / 100 if _exato(df[col]) else df[col].astype("float64")
+        for col in colunas_valores
+    }
+    return df.assign(**convertidas)
+
+
+def para_centavos(valores):
+    """Converte valores em reais (float) para centavos exatos em int64."""
+    return pd.Series(
+        np.round(valores.to_numpy(dtype="float64") * 100).astype("int64"),
+        index=valores.index,
+        name=valores.name,
+    )
+
+
+def _exato(serie):
+    return pd.api.types.is_integer_dtype(serie.dtype)
+
+
+def _valores(df, coluna):
+    """
+    Coluna pronta para somar: centavos int64 (densos) no modo exato e no
+    compacto, float64 nos demais.
+    """
+    serie = df[coluna]
+    return serie.astype("int64") if _exato(serie) else serie.astype("float64")
+
+
+def _media(valores, chaves):
+    """Média por grupo; no modo exato, soma inteira dividida pela contagem."""
+    grupos = valores.groupby(chaves)
+    if _exato(valores):
+        return grupos.sum() / grupos.count()
+    return grupos.mean()
+
+
+def _em_reais(resultado, exato):
+    return resultado / 100 if exato else resultado
+
+
+def _siglas(codigos):
+    return np.asarray(SIGLAS_UF, dtype=object)[np.asarray(codigos, dtype="int64")]
+
+
+def _datas(periodo):
+    # Meses desde 1970 direto em datetime64[M]: evita o pd.to_datetime de um
+    # DataFrame ano/mês/dia, dezenas de vezes mais lento
+    meses = np.asarray(periodo, dtype="int64") - 1970 * 12
+    return pd.Series(meses.astype("datetime64[M]").astype("datetime64[us]"))
+
+
+def _chave_ano(df):
+    return (df["periodo"] // 12).rename("ano") if eh_compacto(df) else df["ano"]
+
+
+def _chave_uf(df):
+    return df["uf"] if eh_compacto(df) else df["sigla_uf"]
+
+
+def _rotular_ufs(df, coluna="sigla_uf"):
+    """Troca os códigos de UF de um resultado agregado pelas siglas (formato compacto)."""
+    if "uf" in df.columns:
+        df = df.rename(columns={"uf": coluna})
+        df[coluna] = _siglas(df[coluna].to_numpy())
+    return df
+
+
+def ufs_disponiveis(df):
+    if eh_compacto(df):
+        return sorted(_siglas(np.unique(df["uf"].to_numpy())).tolist())
+    return sorted(df["sigla_uf"].unique().tolist())
+
+
+def anos_disponiveis(df):
+    return sorted(int(a) for a in _chave_ano(df).unique())
+
+
+def load_natureza(excel_path=EXCEL_CNAE, exato=False, com_relatorio=False):
+    """
+    Lê a planilha de arrecadação por Natureza Jurídica e cria `receita_total`
+    (em centavos int64 com `exato=True`). Com `com_relatorio=True`, devolve
+    (df, relatório), como em `load_arrecadacao`.
+    """
+    df = pd.read_excel(excel_path)
+    conversao = qualidade.converter_numericos(df, TRIBUTOS_NATUREZA)
+    relatorio = qualidade.verificar("natureza", df, TRIBUTOS_NATUREZA, "natureza_juridica_codigo", conversao)
+    if exato:
+        for c in TRIBUTOS_NATUREZA:
+            df[c] = para_centavos(df[c])
+    df["receita_total"] = df[TRIBUTOS_NATUREZA].sum(axis=1)
+    if "ano_mes" not in df.columns:
+        df["ano_mes"] = pd.to_datetime(
+            df["ano"].astype(str) + "-" + df["mes"].astype(str).str.zfill(2),
+            format="%Y-%m", errors="coerce"
+        )
+    if com_relatorio:
+        return df, relatorio
+    return df
+
+
+# Casas decimais das coordenadas no GeoJSON compacto: 3 casas ≈ 100 m, muito
+# abaixo do que se distingue num mapa do Brasil inteiro
+CASAS_GEOJSON = 3
+
+
+def load_geojson(caminho=CAMINHO_GEOJSON, compacto=False):
+    """
+    Lê o GeoJSON das UFs (com `properties.sigla`); None se o arquivo não existir.
+    Com `compacto=True`, as coordenadas vêm arredondadas a CASAS_GEOJSON casas
+    e cada UF mantém só `properties.sigla` (o que o mapa usa), o que encolhe o
+    JSON enviado ao navegador. O arquivo é lido uma vez por processo e relido
+    só se for modificado; o dict devolvido é compartilhado e não deve ser alterado.
+    """
+    if not os.path.isfile(caminho):
+        return None
+    return _ler_geojson(os.path.abspath(caminho), os.stat(caminho).st_mtime_ns, compacto)
+
+
+@lru_cache(maxsize=4)
+def _ler_geojson(caminho, mtime_ns, compacto):
+    if compacto:
+        return _compactar_geojson(_ler_geojson(caminho, mtime_ns, False))
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _arredondar_coordenadas(coordenadas):
+    if isinstance(coordenadas, (int, float)):
+        return round(coordenadas, CASAS_GEOJSON)
+    return [_arredondar_coordenadas(c) for c in coordenadas]
+
+
+def _compactar_geometria(geometria):
+    if geometria is None:
+        return None
+    if geometria["type"] == "GeometryCollection":
+        return {
+            "type": "GeometryCollection",
+            "geometries": [_compactar_geometria(g) for g in geometria["geometries"]],
+        }
+    return {"type": geometria["type"], "coordinates": _arredondar_coordenadas(geometria["coordinates"])}
+
+
+def _compactar_geojson(geojson):
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"sigla": feature["properties"]["sigla"]},
+                "geometry": _compactar_geometria(feature["geometry"]),
+            }
+            for feature in geojson["features"]
+        ],
+    }
+
+
+def publicar_geojson(pasta=PASTA_ESTATICA, caminho=CAMINHO_GEOJSON):
+    """
+    Grava o GeoJSON compacto em `pasta`, para o navegador baixá-lo uma vez em
+    vez de recebê-lo dentro de cada mapa; só regrava se o original for mais
+    novo. Devolve o caminho gravado, ou None se o original não existir.
+    """
+    geojson = load_geojson(caminho, compacto=True)
+    if geojson is None:
+        return None
+    destino = os.path.join(pasta, os.path.basename(caminho))
+    if not os.path.isfile(destino) or os.path.getmtime(destino) < os.path.getmtime(caminho):
+        os.makedirs(pasta, exist_ok=True)
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(geojson, f, separators=(",", ":"))
+        os.replace(temporario, destino)
+    return destino
+
+
+def limpar_nome(col):
+    return col.replace("_", " ").capitalize()
+
+# --------------------------------------------------
+# 4) Agregações da página "Tributos Federais"
+# --------------------------------------------------
+
+def filtrar_arrecadacao(df, uf, ano_inicio, ano_fim):
+    """
+    Aplica os filtros de UF (uma sigla, uma tupla de siglas, o nome de uma
+    região em REGIOES ou "Todas" = sem filtro) e de intervalo de anos.
+    """
+    if eh_compacto(df):
+        mascara = (df["periodo"] >= ano_inicio * 12) & (df["periodo"] <= ano_fim * 12 + 11)
+        if isinstance(uf, tuple):
+            mascara &= np.isin(df["uf"].to_numpy(), [SIGLAS_UF.index(s) for s in uf if s in SIGLAS_UF])
+        elif uf in REGIOES:
+            mascara &= REGIAO_DA_UF[df["uf"].to_numpy()] == NOMES_REGIOES.index(uf)
+        elif uf != "Todas":
+            mascara &= df["uf"] == (SIGLAS_UF.index(uf) if uf in SIGLAS_UF else -1)
+        return df[mascara]
+
+    df_filtrado = df
+    if isinstance(uf, tuple):
+        df_filtrado = df_filtrado[df_filtrado["sigla_uf"].isin(uf)]
+    elif uf in REGIOES:
+        df_filtrado = df_filtrado[df_filtrado["sigla_uf"].isin(REGIOES[uf])]
+    elif uf != "Todas":
+        df_filtrado = df_filtrado[df_filtrado["sigla_uf"] == uf]
+
+    return df_filtrado[
+        (df_filtrado["ano"] >= ano_inicio) &
+        (df_filtrado["ano"] <= ano_fim)
+    ]
+
+
+def serie_tributo(df_filtrado, tributo, nivel, top=5):
+    """
+    Série temporal do tributo por UF, com colunas (ano ou ano_mes, sigla_uf,
+    valor_agrupado), restrita às `top` UFs de maior soma no período
+    (`top=None` mantém todas).
+    """
+    if eh_compacto(df_filtrado):
+        df_agrupado = _serie_tributo_compacta(df_filtrado, tributo, nivel, top)
+    else:
+        df_agrupado = _serie_tributo_completa(df_filtrado, tributo, nivel, top)
+
+    df_agrupado["valor_agrupado"] = _em_reais(df_agrupado["valor_agrupado"], _exato(df_filtrado[tributo]))
+    return df_agrupado
+
+
+def _serie_tributo_completa(df_filtrado, tributo, nivel, top):
+    if nivel == "Anual":
+        df_agrupado = (
+            df_filtrado
+            .groupby(["ano", "sigla_uf"], as_index=False)[[tributo]]
+            .sum()
+            .rename(columns={tributo: "valor_agrupado"})
+        )
+        eixo_x = "ano"
+    else:
+        ano_mes = df_filtrado["ano_mes"]
+        if ano_mes.isna().all():
+            ano_mes = pd.to_datetime(
+                df_filtrado["ano"].astype(str) + "-" +
+                df_filtrado["mes"].astype(str).str.zfill(2),
+                format="%Y-%m",
+                errors="coerce"
+            )
+        df_agrupado = pd.DataFrame({
+            "ano_mes": ano_mes,
+            "sigla_uf": df_filtrado["sigla_uf"],
+            "valor_agrupado": df_filtrado[tributo],
+        })
+        eixo_x = "ano_mes"
+
+    if top is not None:
+        soma_por_uf = (
+            df_agrupado
+            .groupby("sigla_uf")["valor_agrupado"]
+            .sum()
+            .sort_values(ascending=False)
+        )
+        top_ufs = soma_por_uf.head(top).index.tolist()
+        df_agrupado = df_agrupado[df_agrupado["sigla_uf"].isin(top_ufs)]
+
+    return df_agrupado.sort_values(eixo_x).reset_index(drop=True)
+
+
+def _serie_tributo_compacta(df_filtrado, tributo, nivel, top):
+    # Agrupa pelos códigos inteiros e só reconstrói siglas/datas no resultado
+    valores = _valores(df_filtrado, tributo)
+    if nivel == "Anual":
+        df_agrupado = (
+            valores
+            .groupby([_chave_ano(df_filtrado), df_filtrado["uf"]])
+            .sum()
+            .rename("valor_agrupado")
+            .reset_index()
+        )
+        eixo_x = "ano"
+    else:
+        df_agrupado = pd.DataFrame({
+            "periodo": df_filtrado["periodo"],
+            "uf": df_filtrado["uf"],
+            "valor_agrupado": valores,
+        })
+        eixo_x = "periodo"
+
+    if top is not None:
+        soma_por_uf = df_agrupado.groupby("uf")["valor_agrupado"].sum().sort_values(ascending=False)
+        df_agrupado = df_agrupado[df_agrupado["uf"].isin(soma_por_uf.head(top).index)]
+
+    df_agrupado = df_agrupado.sort_values(eixo_x).reset_index(drop=True)
+    if nivel != "Anual":
+        df_agrupado.insert(0, "ano_mes", _datas(df_agrupado.pop("periodo")).to_numpy())
+    return _rotular_ufs(df_agrupado)[[
+        "ano" if nivel == "Anual" else "ano_mes", "sigla_uf", "valor_agrupado"
+    ]]
+
+
+def media_mensal_por_uf(df_filtrado, tributo):
+    """Média mensal do tributo por UF, com colunas (sigla_uf, valor_medio)."""
+    valores = _valores(df_filtrado, tributo)
+    df_mapa = (
+        _em_reais(_media(valores, _chave_uf(df_filtrado)), _exato(valores))
+        .rename("valor_medio")
+        .reset_index()
+    )
+    df_mapa = _rotular_ufs(df_mapa)
+    df_mapa["sigla_uf"] = df_mapa["sigla_uf"].str.upper().str.strip()
+    return df_mapa
+
+
+def crescimento_percentual(df_filtrado, tributo, ano_inicio, ano_fim):
+    """
+    Crescimento percentual de cada UF entre ano_inicio e ano_fim, em ordem
+    crescente (quedas primeiro). None se um dos dois anos não tiver dados.
+    """
+    soma_ano = _rotular_ufs(
+        _valores(df_filtrado, tributo)
+        .groupby([_chave_ano(df_filtrado), _chave_uf(df_filtrado)])
+        .sum()
+        .reset_index()
+    )
+    return crescimento_entre_anos(soma_ano, tributo, ano_inicio, ano_fim)
+
+
+def crescimento_entre_anos(soma_ano, coluna, ano_inicio, ano_fim):
+    """
+    Parte final de `crescimento_percentual`, a partir das somas anuais por UF
+    (colunas ano, sigla_uf e `coluna`). Separada para que outros backends
+    façam só o group-by e reaproveitem esta aritmética.
+    """
+    if not (ano_inicio in soma_ano["ano"].values and ano_fim in soma_ano["ano"].values):
+        return None
+
+    soma_start = (
+        soma_ano[soma_ano["ano"] == ano_inicio]
+        .set_index("sigla_uf")[coluna]
+    )
+    soma_end = (
+        soma_ano[soma_ano["ano"] == ano_fim]
+        .set_index("sigla_uf")[coluna]
+    )
+    comuns = soma_start.index.intersection(soma_end.index)
+    return ((soma_end[comuns] - soma_start[comuns]) / soma_start[comuns] * 100).sort_values()
+
+
+def ufs_do_filtro(uf):
+    """Siglas selecionadas pelo filtro de UF: todas, as de uma região, as de uma tupla ou uma só."""
+    if isinstance(uf, tuple):
+        return uf
+    if uf == "Todas":
+        return SIGLAS_UF
+    return REGIOES.get(uf, (uf,))
+
+# --------------------------------------------------
+# 4.1) Agregações por região
+# --------------------------------------------------
+
+# Não há group-by: cada linha ganha um código de grupo inteiro (período e
+# região, via REGIAO_DA_UF) e as somas saem de um único np.bincount sobre a
+# tabela filtrada, sem reconstruir siglas nem datas linha a linha. No formato
+# compacto, os códigos de UF e o período já estão na tabela.
+
+def _regiao_e_periodo(df_filtrado):
+    """
+    Código da região e período (ano * 12 + mes - 1) de cada linha, em int64.
+    Linhas de UF fora de SIGLAS_UF (só possíveis no formato completo) ficam
+    com região -1.
+    """
+    if eh_compacto(df_filtrado):
+        regiao = REGIAO_DA_UF[df_filtrado["uf"].to_numpy()].astype("int64")
+        return regiao, df_filtrado["periodo"].to_numpy().astype("int64")
+
+    # factorize devolve códigos sobre as siglas distintas (no máximo 27), e só
+    # essas passam pela tabela de regiões
+    codigos, siglas = pd.factorize(df_filtrado["sigla_uf"])
+    regiao_da_sigla = np.array(
+        [REGIAO_DA_UF[SIGLAS_UF.index(s)] if s in SIGLAS_UF else -1 for s in siglas] + [-1],
+        dtype="int64",
+    )
+    regiao = regiao_da_sigla[codigos]  # código -1 (sigla ausente) cai no -1 final
+    periodo = (
+        df_filtrado["ano"].to_numpy().astype("int64") * 12
+        + df_filtrado["mes"].to_numpy().astype("int64") - 1
+    )
+    return regiao, periodo
+
+
+def _somar_por_grupo(grupos, valores, n_grupos):
+    """
+    Soma de `valores` por código de grupo (0 a n_grupos - 1). Em float, um
+    np.bincount; em centavos int64 (modo exato), np.add.at, que soma em
+    aritmética inteira.
+    """
+    if np.issubdtype(valores.dtype, np.integer):
+        somas = np.zeros(n_grupos, dtype="int64")
+        np.add.at(somas, grupos, valores)
+        return somas
+    return np.bincount(grupos, weights=valores, minlength=n_grupos)
+
+
+def _por_regiao(df_filtrado, tributo):
+    """(região, período, valores) das linhas com região conhecida, e se os valores estão em centavos."""
+    regiao, periodo = _regiao_e_periodo(df_filtrado)
+    valores = _valores(df_filtrado, tributo).to_numpy()
+    conhecidas = regiao >= 0
+    return regiao[conhecidas], periodo[conhecidas], valores[conhecidas], _exato(df_filtrado[tributo])
+
+
+def serie_regiao(df_filtrado, tributo, nivel):
+    """
+    Série temporal do tributo somado por região, com colunas (ano ou ano_mes,
+    regiao, valor_agrupado), em ordem de tempo e de NOMES_REGIOES.
+    """
+    eixo_x = "ano" if nivel == "Anual" else "ano_mes"
+    regiao, periodo, valores, exato = _por_regiao(df_filtrado, tributo)
+    if regiao.size == 0:
+        return pd.DataFrame({eixo_x: [], "regiao": [], "valor_agrupado": []})
+
+    tempo = periodo // 12 if nivel == "Anual" else periodo
+    inicio = tempo.min()
+    n_regioes = len(NOMES_REGIOES)
+    n_grupos = (tempo.max() - inicio + 1) * n_regioes
+    grupos = (tempo - inicio) * n_regioes + regiao
+
+    somas = _somar_por_grupo(grupos, valores, n_grupos)
+    presentes = np.flatnonzero(np.bincount(grupos, minlength=n_grupos))
+    tempo_grupo = presentes // n_regioes + inicio
+    return pd.DataFrame({
+        eixo_x: tempo_grupo if nivel == "Anual" else _datas(tempo_grupo).to_numpy(),
+        "regiao": np.asarray(NOMES_REGIOES, dtype=object)[presentes % n_regioes],
+        "valor_agrupado": _em_reais(somas[presentes], exato),
+    })
+
+
+def media_mensal_por_regiao(df_filtrado, tributo):
+    """
+    Média mensal do tributo por região, com colunas (regiao, valor_medio): a
+    soma da região dividida pelo número de meses com dados na região.
+    """
+    regiao, periodo, valores, exato = _por_regiao(df_filtrado, tributo)
+    if regiao.size == 0:
+        return pd.DataFrame({"regiao": [], "valor_medio": []})
+
+    n_regioes = len(NOMES_REGIOES)
+    somas = _somar_por_grupo(regiao, valores, n_regioes)
+    inicio = periodo.min()
+    meses = (
+        np.bincount((periodo - inicio) * n_regioes + regiao,
+                    minlength=(periodo.max() - inicio + 1) * n_regioes)
+        .reshape(-1, n_regioes)
+        .astype(bool)
+        .sum(axis=0)
+    )
+    presentes = np.flatnonzero(meses)
+    return pd.DataFrame({
+        "regiao": np.asarray(NOMES_REGIOES, dtype=object)[presentes],
+        "valor_medio": _em_reais(somas[presentes] / meses[presentes], exato),
+    })
+
+# --------------------------------------------------
+# 5) Agregações da página "Carga por Natureza Jurídica"
+# --------------------------------------------------
+
+def filtrar_natureza(df, ano_inicio, ano_fim, meses, natureza):
+    """Aplica intervalo de anos, meses selecionados e natureza ("Todas" = sem filtro)."""
+    df_filtrado = df[
+        (df["ano"] >= ano_inicio) &
+        (df["ano"] <= ano_fim) &
+        (df["mes"].isin(meses))
+    ]
+    if natureza != "Todas":
+        df_filtrado = df_filtrado[df_filtrado["natureza_juridica_codigo_descricao"] == natureza]
+    return df_filtrado
+
+
+def serie_natureza(df_filtrado, nivel):
+    """Receita total por mês (ano_mes) ou por ano, ordenada no tempo."""
+    eixo_x = "ano_mes" if nivel == "Mensal" else "ano"
+    df_series = (
+        df_filtrado
+        .groupby(eixo_x, as_index=False)["receita_total"]
+        .sum()
+        .sort_values(eixo_x)
+    )
+    df_series["receita_total"] = _em_reais(df_series["receita_total"], _exato(df_filtrado["receita_total"]))
+    return df_series
+
+
+def ranking_natureza(df_filtrado):
+    """Receita total por natureza jurídica, em ordem ascendente."""
+    df_rank = (
+        df_filtrado
+        .groupby("natureza_juridica_codigo_descricao", as_index=False)["receita_total"]
+        .sum()
+        .sort_values("receita_total", ascending=True)
+    )
+    df_rank["receita_total"] = _em_reais(df_rank["receita_total"], _exato(df_filtrado["receita_total"]))
+    return df_rank
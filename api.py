@@ -0,0 +1,374 @@
+# api.py
+
+"""
+API HTTP local (sem Streamlit) sobre as mesmas agregações das páginas, pelo
+mesmo backend (DASHBOARD_BACKEND, ver `backends.py`).
+
+Uso:
+    python api.py                      # http://127.0.0.1:8000
+    python api.py --host 0.0.0.0 --porta 8080
+
+Rotas (todas GET, parâmetros na query string):
+    /versao             versão dos dados e data da última modificação
+    /tributos           colunas de tributos disponíveis (nome original e limpo)
+    /serie              uf, tributo, nivel (Mensal|Anual), ano_inicio, ano_fim, top, agrupar
+    /mapa               uf, tributo, ano_inicio, ano_fim, agrupar  -> média mensal por UF
+    /crescimento        uf, tributo, ano_inicio, ano_fim  -> crescimento % por UF
+    /natureza/serie     ano_inicio, ano_fim, meses (ex.: 1,2,3), natureza, nivel
+    /natureza/ranking   ano_inicio, ano_fim, meses, natureza
+    /dados              uf, ano_inicio, ano_fim -> linhas filtradas, todos os tributos
+
+Em todas as rotas de arrecadação, `uf` aceita também o nome de uma região
+(ex.: `uf=Nordeste`); em /serie e /mapa, `agrupar=regiao` soma por região em
+vez de por UF.
+
+As tabelas são devolvidas em JSON compacto ({"colunas": [...], "dados": [[...]]})
+ou em Arrow IPC (stream) com `formato=arrow` ou `Accept:
+application/vnd.apache.arrow.stream`. Para download, `formato=csv` envia o CSV
+em blocos à medida que é gerado, e `formato=parquet`/`formato=xlsx` devolvem o
+arquivo pronto (ver `exportacao.py`). Cada resposta leva ETag e Last-Modified
+derivados da versão dos dados: um cliente que reenvia If-None-Match ou
+If-Modified-Since recebe 304 sem que nada seja recalculado, e respostas
+repetidas saem de um cache em memória enquanto os arquivos não mudarem.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import traceback
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import agregacoes
+import exportacao
+from backends import backend_padrao
+
+MIME_JSON = "application/json; charset=utf-8"
+MIME_ARROW = "application/vnd.apache.arrow.stream"
+
+
+class ErroParametro(ValueError):
+    """Parâmetro de consulta ausente ou inválido (vira HTTP 400)."""
+
+# --------------------------------------------------
+# 1) Backend das consultas (ver backends.py)
+# --------------------------------------------------
+
+# O backend recarrega os dados sozinho quando `agregacoes.versao_dados()` muda
+backend = backend_padrao()
+
+# --------------------------------------------------
+# 2) Leitura e validação dos parâmetros
+# --------------------------------------------------
+
+def _inteiro(params, nome, padrao):
+    valor = params.get(nome, padrao)
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErroParametro(f"'{nome}' deve ser um número inteiro (recebido: {valor!r}).")
+
+
+def _intervalo(params, padrao_inicio, padrao_fim):
+    ano_inicio = _inteiro(params, "ano_inicio", padrao_inicio)
+    ano_fim = _inteiro(params, "ano_fim", padrao_fim)
+    if ano_inicio > ano_fim:
+        raise ErroParametro(f"'ano_inicio' ({ano_inicio}) não pode ser maior que 'ano_fim' ({ano_fim}).")
+    return ano_inicio, ano_fim
+
+
+def _nivel(params):
+    nivel = params.get("nivel", "Mensal").capitalize()
+    if nivel not in ("Mensal", "Anual"):
+        raise ErroParametro("'nivel' deve ser Mensal ou Anual.")
+    return nivel
+
+
+def _filtro_arrecadacao(params):
+    """Devolve ((uf, ano_inicio, ano_fim), tributo) validados."""
+    tributo = params.get("tributo", "receita_total")
+    if tributo != "receita_total" and tributo not in backend.colunas_tributos():
+        raise ErroParametro(f"Tributo desconhecido: {tributo!r}. Consulte /tributos.")
+
+    uf = params.get("uf", "Todas")
+    regioes = {regiao.lower(): regiao for regiao in agregacoes.REGIOES}
+    if uf.lower() == "todas":
+        uf = "Todas"
+    elif uf.lower() in regioes:
+        uf = regioes[uf.lower()]
+    else:
+        uf = uf.upper()
+        if uf not in backend.ufs():
+            raise ErroParametro(f"UF desconhecida: {uf!r}.")
+
+    return (uf, *_intervalo(params, 2000, 2024)), tributo
+
+
+def _por_regiao(params):
+    agrupar = params.get("agrupar", "uf").lower()
+    if agrupar not in ("uf", "regiao"):
+        raise ErroParametro("'agrupar' deve ser uf ou regiao.")
+    return agrupar == "regiao"
+
+
+def _filtro_natureza(params):
+    """Devolve (ano_inicio, ano_fim, meses, natureza) validados."""
+    meses = params.get("meses")
+    if meses:
+        try:
+            meses = [int(m) for m in meses.split(",")]
+        except ValueError:
+            raise ErroParametro("'meses' deve ser uma lista de números separados por vírgula.")
+    else:
+        meses = list(range(1, 13))
+
+    return (
+        *_intervalo(params, 2016, 2024),
+        meses,
+        params.get("natureza", "Todas"),
+    )
+
+# --------------------------------------------------
+# 3) Consultas (uma por rota)
+# --------------------------------------------------
+
+def _formatar_ano_mes(df):
+    if "ano_mes" in df.columns:
+        df = df.assign(ano_mes=pd.to_datetime(df["ano_mes"]).dt.strftime("%Y-%m"))
+    return df
+
+
+def consultar_tributos(params):
+    colunas_tributos = backend.colunas_tributos()
+    colunas = ["receita_total"] + colunas_tributos
+    return pd.DataFrame({
+        "tributo": colunas,
+        "nome": ["Receita Total"] + [agregacoes.limpar_nome(c) for c in colunas_tributos],
+    })
+
+
+def consultar_serie(params):
+    filtros, tributo = _filtro_arrecadacao(params)
+    if _por_regiao(params):
+        return _formatar_ano_mes(backend.serie_regiao(*filtros, tributo, _nivel(params)))
+    top = params.get("top", "5")
+    top = None if top.lower() == "todas" else _inteiro(params, "top", 5)
+    if top is not None and top < 1:
+        raise ErroParametro("'top' deve ser um inteiro maior que zero ou 'todas'.")
+    df = backend.serie_tributo(*filtros, tributo, _nivel(params), top=top)
+    return _formatar_ano_mes(df)
+
+
+def consultar_mapa(params):
+    filtros, tributo = _filtro_arrecadacao(params)
+    if _por_regiao(params):
+        return backend.media_mensal_por_regiao(*filtros, tributo)
+    return backend.media_mensal_por_uf(*filtros, tributo)
+
+
+def consultar_crescimento(params):
+    filtros, tributo = _filtro_arrecadacao(params)
+    crescimento = backend.crescimento_percentual(*filtros, tributo)
+    if crescimento is None:
+        crescimento = pd.Series(dtype="float64")
+    return pd.DataFrame({
+        "sigla_uf": crescimento.index,
+        "crescimento_pct": crescimento.values,
+    })
+
+
+def consultar_serie_natureza(params):
+    return _formatar_ano_mes(backend.serie_natureza(*_filtro_natureza(params), _nivel(params)))
+
+
+def consultar_ranking_natureza(params):
+    return backend.ranking_natureza(*_filtro_natureza(params))
+
+
+def consultar_dados(params):
+    filtros, _ = _filtro_arrecadacao(dict(params, tributo="receita_total"))
+    return backend.linhas_arrecadacao(*filtros)
+
+
+ROTAS = {
+    "/tributos": consultar_tributos,
+    "/serie": consultar_serie,
+    "/mapa": consultar_mapa,
+    "/crescimento": consultar_crescimento,
+    "/natureza/serie": consultar_serie_natureza,
+    "/natureza/ranking": consultar_ranking_natureza,
+    "/dados": consultar_dados,
+}
+
+FORMATOS = {"json": MIME_JSON, "arrow": MIME_ARROW}
+FORMATOS.update({nome: f["mime"] for nome, f in exportacao.FORMATOS.items()})
+
+# --------------------------------------------------
+# 4) Serialização (cacheada por versão + consulta)
+# --------------------------------------------------
+
+def serializar(df, formato):
+    """Converte a tabela em bytes JSON compacto, Arrow IPC, Parquet ou XLSX."""
+    if formato in exportacao.FORMATOS:
+        return exportacao.exportar(df, formato)
+
+    if formato == "arrow":
+        import pyarrow as pa
+
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        buffer = io.BytesIO()
+        with pa.ipc.new_stream(buffer, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        return buffer.getvalue()
+
+    corpo = json.loads(df.to_json(orient="split", index=False, double_precision=4))
+    return json.dumps(
+        {"colunas": corpo["columns"], "dados": corpo["data"]},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+@lru_cache(maxsize=128)
+def _corpo(versao, rota, consulta, formato):
+    # `versao` só entra na chave do cache; `consulta` é uma tupla ordenada de
+    # pares (nome, valor), para ser hasheável
+    return serializar(ROTAS[rota](dict(consulta)), formato)
+
+# --------------------------------------------------
+# 5) Servidor HTTP
+# --------------------------------------------------
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "DashboardTributaria/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        rota = url.path.rstrip("/") or "/"
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if rota == "/":
+            return self._json(200, {"rotas": ["/versao"] + sorted(ROTAS)})
+
+        versao = agregacoes.versao_dados()
+        modificado = agregacoes.ultima_modificacao()
+
+        if rota == "/versao":
+            return self._json(200, {
+                "versao": versao,
+                "ultima_modificacao": formatdate(modificado, usegmt=True),
+            })
+
+        if rota not in ROTAS:
+            return self._json(404, {"erro": f"Rota desconhecida: {rota}"})
+
+        formato = params.pop("formato", None)
+        if formato is None:
+            formato = "arrow" if MIME_ARROW in self.headers.get("Accept", "") else "json"
+        if formato not in FORMATOS:
+            return self._json(400, {"erro": "'formato' deve ser um de: " + ", ".join(FORMATOS)})
+
+        consulta = tuple(sorted(params.items()))
+        etag = '"{}-{}"'.format(
+            versao,
+            hashlib.sha1(repr((rota, consulta, formato)).encode()).hexdigest()[:12],
+        )
+        cabecalhos_cache = {
+            "ETag": etag,
+            "Last-Modified": formatdate(modificado, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+
+        if self._nao_modificado(etag, modificado):
+            return self._enviar(304, b"", None, cabecalhos_cache)
+
+        if formato in exportacao.FORMATOS:
+            nome = rota.strip("/").replace("/", "_")
+            cabecalhos_cache["Content-Disposition"] = (
+                f'attachment; filename="{exportacao.nome_arquivo(nome, formato)}"'
+            )
+
+        try:
+            if formato == "csv":
+                # Não passa pelo cache de corpos: o CSV é enviado bloco a bloco
+                df = ROTAS[rota](params)
+            else:
+                corpo = _corpo(versao, rota, consulta, formato)
+        except ErroParametro as erro:
+            return self._json(400, {"erro": str(erro)})
+        except ImportError as erro:
+            return self._json(406, {"erro": f"Formato {formato} indisponível: falta o pacote {erro.name}."})
+        except Exception as erro:
+            # Sem isso o servidor só fecharia a conexão, sem resposta
+            self.log_error("Erro ao responder %s: %r", self.path, erro)
+            traceback.print_exc()
+            return self._json(500, {"erro": "Erro interno ao calcular a consulta."})
+
+        if formato == "csv":
+            return self._enviar_blocos(200, exportacao.gerar_csv(df), FORMATOS[formato], cabecalhos_cache)
+
+        self._enviar(200, corpo, FORMATOS[formato], cabecalhos_cache)
+
+    def _nao_modificado(self, etag, modificado):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(modificado) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _json(self, status, conteudo):
+        corpo = json.dumps(conteudo, ensure_ascii=False).encode("utf-8")
+        self._enviar(status, corpo, MIME_JSON, {})
+
+    def _enviar(self, status, corpo, tipo, cabecalhos):
+        self.send_response(status)
+        if tipo:
+            self.send_header("Content-Type", tipo)
+        if status != 304:
+            self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        if corpo:
+            self.wfile.write(corpo)
+
+    def _enviar_blocos(self, status, blocos, tipo, cabecalhos):
+        # HTTP/1.0 sem Content-Length: o fim do corpo é o fechamento da conexão
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        for bloco in blocos:
+            self.wfile.write(bloco)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API JSON/Arrow da Dashboard Tributária.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    args = parser.parse_args()
+
+    servidor = ThreadingHTTPServer((args.host, args.porta), Handler)
+    print(f"API disponível em http://{args.host}:{args.porta}/  (Ctrl+C para encerrar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# aquecimento.py
+
+"""
+Aquecimento dos caches antes do primeiro acesso.
+
+Carrega as bases no backend do processo (`backends.backend_padrao()`), lê o
+GeoJSON e monta as agregações e figuras da visão padrão das duas páginas
+(todas as UFs, 2000–2024, Receita Total; todas as naturezas jurídicas,
+2016–2024, todos os meses). Formas de uso:
+
+- no mesmo processo do servidor, antes do tráfego chegar:
+      python aquecimento.py --servir [opções do `streamlit run`]
+  inicia o aquecimento em segundo plano e sobe o Streamlit em seguida;
+- pelas próprias páginas: `iniciar_em_segundo_plano()` roda na primeira
+  execução de qualquer página (uma vez por processo; DASHBOARD_AQUECER=0
+  desliga), e a outra página já encontra as bases carregadas;
+- pela linha de comando, só para medir (e gerar os caches em disco, como as
+  cópias Parquet do backend DuckDB):
+      python aquecimento.py
+
+Ao final, um relatório com o tempo de cada etapa é impresso na saída padrão.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import agregacoes
+import configuracao
+import figuras
+import previsao
+from backends import backend_padrao
+
+PAGINA_PRINCIPAL = os.path.join(agregacoes.PASTA_PROJETO, "1_Tributos_Federais.py")
+
+# Visão padrão das páginas (valores iniciais dos filtros)
+PADRAO_ARRECADACAO = ("Todas", 2000, 2024)
+PADRAO_TRIBUTO = ("receita_total", "Receita Total")
+PADRAO_NIVEL = "Mensal"
+PADRAO_NATUREZA = (2016, 2024)
+
+# --------------------------------------------------
+# 1) Etapas
+# --------------------------------------------------
+
+def _etapas(backend):
+    """Lista de (descrição, função) na ordem em que devem rodar."""
+    tributo, tributo_limpo = PADRAO_TRIBUTO
+
+    def meses_padrao():
+        return [m for m in backend.meses_natureza() if 1 <= m <= 12]
+
+    def importar_plotly():
+        import plotly.express  # noqa: F401
+
+    return [
+        # Primeiro o que a página principal usa; a planilha de natureza jurídica
+        # (a leitura mais lenta) fica para depois
+        ("Base de arrecadação", lambda: (backend.colunas_tributos(), backend.ufs(), backend.anos())),
+        ("GeoJSON das UFs", lambda: agregacoes.load_geojson(compacto=configuracao.FIGURAS_COMPACTAS)),
+        ("Import do plotly.express", importar_plotly),
+        ("Série temporal padrão", lambda: figuras.figura_serie(
+            backend, *PADRAO_ARRECADACAO, tributo, tributo_limpo, PADRAO_NIVEL)),
+        ("Mapa padrão", lambda: figuras.figura_mapa(
+            backend, *PADRAO_ARRECADACAO, tributo, tributo_limpo)),
+        ("Crescimento padrão", lambda: backend.crescimento_percentual(*PADRAO_ARRECADACAO, tributo)),
+        ("Base de natureza jurídica", lambda: (backend.naturezas(), backend.anos_natureza(), meses_padrao())),
+        ("Série de natureza jurídica padrão", lambda: figuras.figura_serie_natureza(
+            backend, *PADRAO_NATUREZA, meses_padrao(), "Todas", PADRAO_NIVEL)),
+        ("Ranking de naturezas jurídicas padrão", lambda: figuras.figura_ranking_natureza(
+            backend, *PADRAO_NATUREZA, meses_padrao(), "Todas")),
+        # No pandas já saem da carga das bases; no DuckDB, relêem as fontes
+        ("Qualidade das bases", lambda: (
+            backend.relatorio_qualidade("arrecadacao"), backend.relatorio_qualidade("natureza"))),
+        # Opcional nas páginas, mas ajusta todas as séries de uma vez
+        ("Previsões (todas as séries)", lambda: previsao.previsoes(backend)),
+    ]
+
+
+def aquecer(backend=None):
+    """
+    Roda todas as etapas e devolve o relatório: lista de (descrição, segundos,
+    erro ou None). Uma etapa que falha não interrompe as seguintes; o erro real
+    aparece de novo quando a página fizer a mesma consulta.
+    """
+    backend = backend or backend_padrao()
+    relatorio = []
+    for descricao, etapa in _etapas(backend):
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            etapa()
+        except Exception as e:  # noqa: BLE001
+            erro = f"{type(e).__name__}: {e}"
+        relatorio.append((descricao, time.perf_counter() - inicio, erro))
+    return relatorio
+
+
+def formatar_relatorio(relatorio):
+    linhas = ["Aquecimento dos caches:"]
+    for descricao, segundos, erro in relatorio:
+        linhas.append(f"  {descricao:<40}{segundos * 1000:9.1f} ms" + (f"  FALHOU ({erro})" if erro else ""))
+    total = sum(segundos for _, segundos, _ in relatorio)
+    linhas.append(f"  {'Total':<40}{total * 1000:9.1f} ms")
+    return "\n".join(linhas)
+
+# --------------------------------------------------
+# 2) Aquecimento em segundo plano (uma vez por processo)
+# --------------------------------------------------
+
+_lock = threading.Lock()
+_thread = None
+ultimo_relatorio = None
+
+
+def _aquecer_e_relatar():
+    global ultimo_relatorio
+    ultimo_relatorio = aquecer()
+    print(formatar_relatorio(ultimo_relatorio), flush=True)
+
+
+def iniciar_em_segundo_plano():
+    """Dispara o aquecimento numa thread daemon, se ainda não foi disparado neste processo."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_aquecer_e_relatar, name="aquecimento", daemon=True)
+            _thread.start()
+        return _thread
+
+# --------------------------------------------------
+# 3) Linha de comando
+# --------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Aquecimento dos caches da Dashboard Tributária.")
+    parser.add_argument("--servir", action="store_true",
+                        help="aquece em segundo plano e sobe o Streamlit neste mesmo processo")
+    args, opcoes_streamlit = parser.parse_known_args()
+
+    if not args.servir:
+        print(formatar_relatorio(aquecer()))
+        return
+
+    # As páginas fazem `import aquecimento`; sem isto, ganhariam uma segunda
+    # cópia do módulo (este arquivo roda como __main__) e aqueceriam de novo.
+    sys.modules.setdefault("aquecimento", sys.modules[__name__])
+    iniciar_em_segundo_plano()
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run", PAGINA_PRINCIPAL, *opcoes_streamlit]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
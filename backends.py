@@ -0,0 +1,819 @@
+# backends.py
+
+"""
+Backends analíticos por trás das páginas e da API.
+
+Os dois backends expõem os mesmos métodos (ver `Backend`) e devolvem tabelas
+no mesmo formato das funções de `agregacoes.py`:
+
+- "pandas": carrega `arrecadacao_federal` e a planilha de Natureza Jurídica
+  inteiras em memória e agrega com as funções de `agregacoes.py` (respeita os
+  modos compacto e exato);
+- "duckdb": não carrega nada inteiro. Anexa `tributos.db` direto pelo
+  DuckDB (extensão sqlite) e lê cópias Parquet das planilhas; os filtros e
+  group-bys rodam no motor vetorizado e multi-thread do DuckDB e só o
+  resultado agregado chega ao pandas. Se a extensão sqlite não puder ser
+  carregada (ex.: sem acesso à internet para instalá-la), a tabela é lida de
+  uma cópia Parquet do SQLite.
+
+Escolha com DASHBOARD_BACKEND=pandas|duckdb (ver `configuracao.py`).
+
+Uso:
+    python backends.py --parquet      # (re)gera as cópias Parquet das bases
+    python backends.py --verificar    # compara os dois backends numa grade de filtros
+    python -m pytest tests            # a mesma comparação, como teste (float e exato)
+"""
+
+import argparse
+import functools
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+import agregacoes
+import configuracao
+import qualidade
+
+PASTA_CACHE = os.path.join(agregacoes.PASTA_PROJETO, "base_de_dados", "cache")
+PARQUET_ARRECADACAO = os.path.join(PASTA_CACHE, "arrecadacao_federal.parquet")
+PARQUET_NATUREZA = os.path.join(PASTA_CACHE, "arrecadacao_CNAE_2016_2024.parquet")
+
+# --------------------------------------------------
+# 1) Cópias Parquet das bases
+# --------------------------------------------------
+
+def _desatualizado(destino, origem):
+    return not os.path.isfile(destino) or os.stat(destino).st_mtime < os.stat(origem).st_mtime
+
+
+def _gravar_parquet(df, destino):
+    # Grava num arquivo temporário e renomeia, para que outro processo nunca
+    # leia um Parquet pela metade
+    import exportacao
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    exportacao.escrever_parquet(df, temporario)
+    os.replace(temporario, destino)
+
+
+def caminho_quarentena(destino):
+    """
+    Quarentena das verificações que precisam do valor original
+    (qualidade.VERIFICACOES_DA_FONTE), gravada ao lado da cópia `destino`.
+    """
+    return os.path.splitext(destino)[0] + ".quarentena.parquet"
+
+
+def _gravar_copia(df, relatorio, destino):
+    # A quarentena vai primeiro: uma cópia em dia sempre tem a sua
+    _gravar_parquet(relatorio.quarentena_da_fonte(), caminho_quarentena(destino))
+    _gravar_parquet(df, destino)
+
+
+def _precisa_gerar(destino, origem, forcar):
+    # A quarentena também envelhece com qualidade.py (verificações novas ou mudadas)
+    quarentena = caminho_quarentena(destino)
+    return (
+        forcar or _desatualizado(destino, origem)
+        or _desatualizado(quarentena, origem) or _desatualizado(quarentena, qualidade.__file__)
+    )
+
+
+def gerar_parquet_arrecadacao(db_path=agregacoes.DB_PATH, destino=PARQUET_ARRECADACAO, forcar=False):
+    """Cópia Parquet de `arrecadacao_federal` (tributos já numéricos; receita_total fica para a view)."""
+    if _precisa_gerar(destino, db_path, forcar):
+        df, _, relatorio = agregacoes.load_arrecadacao(db_path, com_relatorio=True)
+        _gravar_copia(df.drop(columns=["receita_total"]), relatorio, destino)
+    return destino
+
+
+def gerar_parquet_natureza(excel_path=agregacoes.EXCEL_CNAE, destino=PARQUET_NATUREZA, forcar=False):
+    """Cópia Parquet da planilha de Natureza Jurídica (tributos já numéricos; sem as colunas derivadas)."""
+    if _precisa_gerar(destino, excel_path, forcar):
+        df, relatorio = agregacoes.load_natureza(excel_path, com_relatorio=True)
+        _gravar_copia(df.drop(columns=["receita_total", "ano_mes"]), relatorio, destino)
+    return destino
+
+# --------------------------------------------------
+# 2) Cache de resultados (compartilhado entre sessões)
+# --------------------------------------------------
+
+def chave_de_cache(*partes):
+    """Converte listas (ex.: meses) em tuplas para que a chave seja hasheável."""
+    return tuple(tuple(p) if isinstance(p, list) else p for p in partes)
+
+
+class CacheResultados:
+    """
+    LRU thread-safe de resultados já calculados, com contagem de acertos e
+    faltas. Se duas threads pedem a mesma chave ao mesmo tempo, só a primeira
+    calcula; a outra espera e recebe o mesmo valor. Os valores são
+    compartilhados entre sessões: quem os recebe não deve modificá-los.
+    """
+
+    def __init__(self, max_itens=256):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._pendentes = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave, calcular):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            pendente = self._pendentes.get(chave)
+            calcular_aqui = pendente is None
+            if calcular_aqui:
+                pendente = self._pendentes[chave] = Future()
+                self.faltas += 1
+            else:
+                # Já está sendo calculado por outra thread: conta como acerto
+                self.acertos += 1
+
+        if not calcular_aqui:
+            return pendente.result()
+
+        # Calculado fora do lock: consultas diferentes não esperam umas pelas outras
+        try:
+            valor = calcular()
+        except BaseException as erro:
+            with self._lock:
+                del self._pendentes[chave]
+            pendente.set_exception(erro)
+            raise
+
+        with self._lock:
+            del self._pendentes[chave]
+            self._itens[chave] = valor
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        pendente.set_result(valor)
+        return valor
+
+    def estatisticas(self):
+        with self._lock:
+            return {"itens": len(self._itens), "acertos": self.acertos, "faltas": self.faltas}
+
+
+def _memorizado(metodo):
+    """Guarda o resultado de `metodo` em `self.cache`, por versão dos dados e argumentos."""
+    @functools.wraps(metodo)
+    def envolvido(self, *args, **kwargs):
+        chave = chave_de_cache(agregacoes.versao_dados(), metodo.__name__, *args, *sorted(kwargs.items()))
+        return self.cache.obter(chave, lambda: metodo(self, *args, **kwargs))
+    return envolvido
+
+# --------------------------------------------------
+# 3) Interface comum
+# --------------------------------------------------
+
+class Backend:
+    """
+    Interface dos backends. Os filtros seguem as páginas: `uf` e `natureza`
+    aceitam "Todas", e `uf` também o nome de uma região (agregacoes.REGIOES) ou
+    uma tupla de siglas (seleção no mapa); `nivel` é "Mensal" ou "Anual"; `meses` é uma lista de
+    números de 1 a 12. Valores monetários sempre saem em reais.
+
+    Os métodos em MEMORIZADOS passam pelo `cache` da instância; as linhas não
+    agregadas ficam de fora (são grandes e só servem à exportação).
+    """
+
+    nome = None
+
+    MEMORIZADOS = (
+        "colunas_tributos", "ufs", "anos", "serie_tributo", "media_mensal_por_uf",
+        "crescimento_percentual", "serie_regiao", "media_mensal_por_regiao", "anos_natureza", "meses_natureza", "naturezas",
+        "serie_natureza", "ranking_natureza", "relatorio_qualidade",
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for nome in Backend.MEMORIZADOS:
+            if nome in cls.__dict__:
+                setattr(cls, nome, _memorizado(cls.__dict__[nome]))
+
+    def __init__(self):
+        self.cache = CacheResultados()
+
+    # Tributos Federais por UF
+    def colunas_tributos(self):
+        raise NotImplementedError
+
+    def ufs(self):
+        raise NotImplementedError
+
+    def anos(self):
+        raise NotImplementedError
+
+    def serie_tributo(self, uf, ano_inicio, ano_fim, tributo, nivel, top=5):
+        raise NotImplementedError
+
+    def media_mensal_por_uf(self, uf, ano_inicio, ano_fim, tributo):
+        raise NotImplementedError
+
+    def crescimento_percentual(self, uf, ano_inicio, ano_fim, tributo):
+        raise NotImplementedError
+
+    def serie_regiao(self, uf, ano_inicio, ano_fim, tributo, nivel):
+        raise NotImplementedError
+
+    def media_mensal_por_regiao(self, uf, ano_inicio, ano_fim, tributo):
+        raise NotImplementedError
+
+    def linhas_arrecadacao(self, uf, ano_inicio, ano_fim):
+        raise NotImplementedError
+
+    # Natureza Jurídica
+    def anos_natureza(self):
+        raise NotImplementedError
+
+    def meses_natureza(self):
+        raise NotImplementedError
+
+    def naturezas(self):
+        raise NotImplementedError
+
+    def serie_natureza(self, ano_inicio, ano_fim, meses, natureza, nivel):
+        raise NotImplementedError
+
+    def ranking_natureza(self, ano_inicio, ano_fim, meses, natureza):
+        raise NotImplementedError
+
+    def linhas_natureza(self, ano_inicio, ano_fim, meses, natureza):
+        raise NotImplementedError
+
+    # Qualidade dos dados
+    def relatorio_qualidade(self, base):
+        """RelatorioQualidade (ver qualidade.py) de "arrecadacao" ou "natureza"."""
+        raise NotImplementedError
+
+# --------------------------------------------------
+# 4) Backend pandas (tabelas inteiras em memória)
+# --------------------------------------------------
+
+class BackendPandas(Backend):
+    nome = "pandas"
+
+    def __init__(self, compacto=False, exato=False):
+        super().__init__()
+        self.compacto = compacto
+        self.exato = exato
+        self._lock = threading.Lock()
+        self._bases = {}
+
+    def _carregada(self, nome):
+        """
+        (base, relatório de qualidade) já carregados, recarregados quando
+        `agregacoes.versao_dados()` muda. As verificações rodam na mesma carga.
+        """
+        versao = agregacoes.versao_dados()
+        with self._lock:
+            atual = self._bases.get(nome)
+            if atual is None or atual[0] != versao:
+                if nome == "arrecadacao":
+                    df, colunas, relatorio = agregacoes.load_arrecadacao(
+                        compacto=self.compacto, exato=self.exato, com_relatorio=True
+                    )
+                    dados = (df, colunas)
+                else:
+                    dados, relatorio = agregacoes.load_natureza(exato=self.exato, com_relatorio=True)
+                self._bases[nome] = (versao, dados, relatorio)
+            return self._bases[nome][1:]
+
+    def _base(self, nome):
+        """Base carregada (ver _carregada)."""
+        return self._carregada(nome)[0]
+
+    def _arrecadacao(self, uf, ano_inicio, ano_fim):
+        df, _ = self._base("arrecadacao")
+        return agregacoes.filtrar_arrecadacao(df, uf, ano_inicio, ano_fim)
+
+    def _natureza(self, ano_inicio, ano_fim, meses, natureza):
+        return agregacoes.filtrar_natureza(self._base("natureza"), ano_inicio, ano_fim, list(meses), natureza)
+
+    def colunas_tributos(self):
+        return list(self._base("arrecadacao")[1])
+
+    def ufs(self):
+        return agregacoes.ufs_disponiveis(self._base("arrecadacao")[0])
+
+    def anos(self):
+        return agregacoes.anos_disponiveis(self._base("arrecadacao")[0])
+
+    def serie_tributo(self, uf, ano_inicio, ano_fim, tributo, nivel, top=5):
+        return agregacoes.serie_tributo(self._arrecadacao(uf, ano_inicio, ano_fim), tributo, nivel, top=top)
+
+    def media_mensal_por_uf(self, uf, ano_inicio, ano_fim, tributo):
+        return agregacoes.media_mensal_por_uf(self._arrecadacao(uf, ano_inicio, ano_fim), tributo)
+
+    def crescimento_percentual(self, uf, ano_inicio, ano_fim, tributo):
+        return agregacoes.crescimento_percentual(
+            self._arrecadacao(uf, ano_inicio, ano_fim), tributo, ano_inicio, ano_fim
+        )
+
+    def serie_regiao(self, uf, ano_inicio, ano_fim, tributo, nivel):
+        return agregacoes.serie_regiao(self._arrecadacao(uf, ano_inicio, ano_fim), tributo, nivel)
+
+    def media_mensal_por_regiao(self, uf, ano_inicio, ano_fim, tributo):
+        return agregacoes.media_mensal_por_regiao(self._arrecadacao(uf, ano_inicio, ano_fim), tributo)
+
+    def linhas_arrecadacao(self, uf, ano_inicio, ano_fim):
+        colunas = self.colunas_tributos() + ["receita_total"]
+        return agregacoes.linhas_para_exibicao(self._arrecadacao(uf, ano_inicio, ano_fim), colunas)
+
+    def anos_natureza(self):
+        return sorted(self._base("natureza")["ano"].unique().tolist())
+
+    def meses_natureza(self):
+        return sorted(self._base("natureza")["mes"].unique().tolist())
+
+    def naturezas(self):
+        return sorted(self._base("natureza")["natureza_juridica_codigo_descricao"].dropna().unique().tolist())
+
+    def serie_natureza(self, ano_inicio, ano_fim, meses, natureza, nivel):
+        return agregacoes.serie_natureza(self._natureza(ano_inicio, ano_fim, meses, natureza), nivel)
+
+    def ranking_natureza(self, ano_inicio, ano_fim, meses, natureza):
+        return agregacoes.ranking_natureza(self._natureza(ano_inicio, ano_fim, meses, natureza))
+
+    def linhas_natureza(self, ano_inicio, ano_fim, meses, natureza):
+        return agregacoes.linhas_para_exibicao(
+            self._natureza(ano_inicio, ano_fim, meses, natureza),
+            agregacoes.TRIBUTOS_NATUREZA + ["receita_total"],
+        )
+
+    def relatorio_qualidade(self, base):
+        return self._carregada(base)[1]
+
+# --------------------------------------------------
+# 5) Backend DuckDB (consultas direto nos arquivos)
+# --------------------------------------------------
+
+class BackendDuckDB(Backend):
+    nome = "duckdb"
+
+    def __init__(self, exato=False, db_path=agregacoes.DB_PATH, excel_path=agregacoes.EXCEL_CNAE):
+        import duckdb
+
+        super().__init__()
+        self.exato = exato
+        self.db_path = db_path
+        self.excel_path = excel_path
+        self._duckdb = duckdb
+        self._con = duckdb.connect()
+        self._lock = threading.Lock()
+        self._versao = None
+        self._colunas_tributos = None
+        self.fonte_arrecadacao = None
+        # base -> (relação SQL com a posição `linha` de cada linha, quarentena
+        # gravada ao lado da cópia Parquet ou None); ver relatorio_qualidade
+        self._qualidade = {}
+
+    # 5.1) Views sobre as fontes -------------------------------------------
+
+    def _valor(self, coluna):
+        """Expressão SQL do valor de um tributo: reais (DOUBLE) ou centavos (BIGINT)."""
+        expr = f'COALESCE(TRY_CAST("{coluna}" AS DOUBLE), 0)'
+        if self.exato:
+            # round_even = mesmo arredondamento do np.round em agregacoes.para_centavos
+            return f"CAST(ROUND_EVEN({expr} * 100, 0) AS BIGINT)"
+        return expr
+
+    def _em_reais(self, expr):
+        return f"(CAST({expr} AS BIGINT) / 100)" if self.exato else expr
+
+    def _fonte_arrecadacao(self):
+        try:
+            self._con.execute("DETACH DATABASE IF EXISTS tributos")
+            self._con.execute(f"ATTACH '{self.db_path}' AS tributos (TYPE sqlite, READ_ONLY)")
+            fonte = "tributos.arrecadacao_federal"
+            self._con.execute(f"SELECT MAX(rowid) FROM {fonte}")
+            self.fonte_arrecadacao = "sqlite"
+            # Ordem do rowid: a mesma em que o loader do pandas lê a tabela
+            self._qualidade["arrecadacao"] = (
+                f"(SELECT *, row_number() OVER (ORDER BY rowid) - 1 AS linha FROM {fonte})", None,
+            )
+            return fonte
+        except self._duckdb.Error:
+            self.fonte_arrecadacao = "parquet"
+            copia = gerar_parquet_arrecadacao(self.db_path)
+            self._qualidade["arrecadacao"] = self._relacao_da_copia(copia)
+            return f"read_parquet('{copia}')"
+
+    @staticmethod
+    def _relacao_da_copia(copia):
+        # A cópia é gravada na ordem do DataFrame do loader: a linha do
+        # arquivo é a posição no pandas
+        return (
+            f"(SELECT *, file_row_number AS linha FROM read_parquet('{copia}', file_row_number = true))",
+            caminho_quarentena(copia),
+        )
+
+    def _selecao(self, fonte, colunas_valores):
+        """Colunas de `fonte` na ordem original, com os tributos já numéricos."""
+        colunas = [linha[0] for linha in self._con.execute(f"DESCRIBE SELECT * FROM {fonte}").fetchall()]
+        return colunas, ", ".join(
+            f'{self._valor(c)} AS "{c}"' if c in colunas_valores else f'"{c}"'
+            for c in colunas
+        )
+
+    def _preparar(self):
+        # As views repetem o que agregacoes.load_* faz no pandas: tributos
+        # numéricos (inválidos = 0) e receita_total como soma dos tributos
+        fonte = self._fonte_arrecadacao()
+        colunas = [linha[0] for linha in self._con.execute(f"DESCRIBE SELECT * FROM {fonte}").fetchall()]
+        self._colunas_tributos = sorted(set(colunas) - agregacoes.COLUNAS_FIXAS)
+        _, selecao = self._selecao(fonte, self._colunas_tributos)
+        soma = " + ".join(f'"{c}"' for c in self._colunas_tributos)
+        if "ano_mes" not in colunas:
+            soma += ", make_date(ano, mes, 1)::TIMESTAMP AS ano_mes"
+        self._con.execute(f"""
+            CREATE OR REPLACE VIEW arrecadacao AS
+            SELECT *, {soma} AS receita_total FROM (SELECT {selecao} FROM {fonte})
+        """)
+
+        regioes = ", ".join(
+            f"('{sigla}', '{regiao}', {codigo})"
+            for codigo, (regiao, siglas) in enumerate(agregacoes.REGIOES.items())
+            for sigla in siglas
+        )
+        self._con.execute(f"""
+            CREATE OR REPLACE TABLE regioes AS
+            SELECT * FROM (VALUES {regioes}) AS t(sigla_uf, regiao, codigo)
+        """)
+
+        copia = gerar_parquet_natureza(self.excel_path)
+        self._qualidade["natureza"] = self._relacao_da_copia(copia)
+        fonte = f"read_parquet('{copia}')"
+        _, selecao = self._selecao(fonte, agregacoes.TRIBUTOS_NATUREZA)
+        soma = " + ".join(f'"{c}"' for c in agregacoes.TRIBUTOS_NATUREZA)
+        self._con.execute(f"""
+            CREATE OR REPLACE VIEW natureza AS
+            SELECT *, {soma} AS receita_total, make_date(ano, mes, 1)::TIMESTAMP AS ano_mes
+            FROM (SELECT {selecao} FROM {fonte})
+        """)
+
+    def _consultar(self, sql, parametros=()):
+        """Executa `sql` num cursor próprio (seguro entre threads) e devolve um DataFrame."""
+        versao = agregacoes.versao_dados()
+        with self._lock:
+            if versao != self._versao:
+                self._preparar()
+                self._versao = versao
+        return self._con.cursor().execute(sql, list(parametros)).df()
+
+    def _linhas(self, colunas_valores):
+        """SELECT das linhas não agregadas, com os valores convertidos para reais."""
+        if not self.exato:
+            return "SELECT *"
+        return "SELECT * REPLACE ({})".format(
+            ", ".join(f'"{c}" / 100 AS "{c}"' for c in colunas_valores)
+        )
+
+    # 5.2) Tributos Federais por UF -----------------------------------------
+
+    @staticmethod
+    def _filtro_uf(uf, ano_inicio, ano_fim):
+        if isinstance(uf, tuple):
+            marcadores = ", ".join("?" * len(uf)) or "NULL"
+            return f"sigla_uf IN ({marcadores}) AND ano BETWEEN ? AND ?", [*uf, ano_inicio, ano_fim]
+        return (
+            "(? = 'Todas' OR sigla_uf = ? OR sigla_uf IN (SELECT sigla_uf FROM regioes WHERE regiao = ?)) "
+            "AND ano BETWEEN ? AND ?",
+            [uf, uf, uf, ano_inicio, ano_fim],
+        )
+
+    def colunas_tributos(self):
+        self._consultar("SELECT 1")
+        return list(self._colunas_tributos)
+
+    def ufs(self):
+        return self._consultar("SELECT DISTINCT sigla_uf FROM arrecadacao ORDER BY 1")["sigla_uf"].tolist()
+
+    def anos(self):
+        return [int(a) for a in self._consultar("SELECT DISTINCT ano FROM arrecadacao ORDER BY 1")["ano"]]
+
+    def serie_tributo(self, uf, ano_inicio, ano_fim, tributo, nivel, top=5):
+        filtro, parametros = self._filtro_uf(uf, ano_inicio, ano_fim)
+        if nivel == "Anual":
+            eixo_x = "ano"
+            base = f'SELECT ano, sigla_uf, SUM("{tributo}") AS v FROM arrecadacao WHERE {filtro} GROUP BY ALL'
+        else:
+            eixo_x = "ano_mes"
+            base = f'SELECT ano_mes, sigla_uf, "{tributo}" AS v FROM arrecadacao WHERE {filtro}'
+        limite = "" if top is None else f"LIMIT {int(top)}"
+        return self._consultar(f"""
+            WITH base AS ({base}),
+            top_ufs AS (SELECT sigla_uf FROM base GROUP BY sigla_uf ORDER BY SUM(v) DESC {limite})
+            SELECT {eixo_x}, sigla_uf, {self._em_reais("v")} AS valor_agrupado
+            FROM base WHERE sigla_uf IN (SELECT sigla_uf FROM top_ufs)
+            ORDER BY {eixo_x}, sigla_uf
+        """, parametros)
+
+    def media_mensal_por_uf(self, uf, ano_inicio, ano_fim, tributo):
+        filtro, parametros = self._filtro_uf(uf, ano_inicio, ano_fim)
+        media = f'SUM("{tributo}") / COUNT(*) / 100' if self.exato else f'AVG("{tributo}")'
+        return self._consultar(f"""
+            SELECT sigla_uf, {media} AS valor_medio
+            FROM arrecadacao WHERE {filtro}
+            GROUP BY sigla_uf ORDER BY sigla_uf
+        """, parametros)
+
+    def crescimento_percentual(self, uf, ano_inicio, ano_fim, tributo):
+        filtro, parametros = self._filtro_uf(uf, ano_inicio, ano_fim)
+        tipo = "BIGINT" if self.exato else "DOUBLE"
+        soma_ano = self._consultar(f"""
+            SELECT ano, sigla_uf, CAST(SUM("{tributo}") AS {tipo}) AS valor
+            FROM arrecadacao WHERE {filtro} AND ano IN (?, ?)
+            GROUP BY ALL ORDER BY ano, sigla_uf
+        """, parametros + [ano_inicio, ano_fim])
+        return agregacoes.crescimento_entre_anos(soma_ano, "valor", ano_inicio, ano_fim)
+
+    def serie_regiao(self, uf, ano_inicio, ano_fim, tributo, nivel):
+        filtro, parametros = self._filtro_uf(uf, ano_inicio, ano_fim)
+        eixo_x = "ano" if nivel == "Anual" else "make_date(ano, mes, 1)::TIMESTAMP AS ano_mes"
+        return self._consultar(f"""
+            SELECT {eixo_x}, regiao, {self._em_reais(f'SUM("{tributo}")')} AS valor_agrupado
+            FROM arrecadacao JOIN regioes USING (sigla_uf) WHERE {filtro}
+            GROUP BY 1, regiao, codigo ORDER BY 1, codigo
+        """, parametros)
+
+    def media_mensal_por_regiao(self, uf, ano_inicio, ano_fim, tributo):
+        filtro, parametros = self._filtro_uf(uf, ano_inicio, ano_fim)
+        media = f'SUM("{tributo}") / COUNT(DISTINCT ano * 12 + mes)'
+        return self._consultar(f"""
+            SELECT regiao, {media}{" / 100" if self.exato else ""} AS valor_medio
+            FROM arrecadacao JOIN regioes USING (sigla_uf) WHERE {filtro}
+            GROUP BY regiao, codigo ORDER BY codigo
+        """, parametros)
+
+    def linhas_arrecadacao(self, uf, ano_inicio, ano_fim):
+        filtro, parametros = self._filtro_uf(uf, ano_inicio, ano_fim)
+        selecao = self._linhas(self.colunas_tributos() + ["receita_total"])
+        return self._consultar(f"{selecao} FROM arrecadacao WHERE {filtro}", parametros)
+
+    # 5.3) Natureza Jurídica -------------------------------------------------
+
+    @staticmethod
+    def _filtro_natureza(ano_inicio, ano_fim, meses, natureza):
+        return (
+            "ano BETWEEN ? AND ? AND list_contains(?, mes) "
+            "AND (? = 'Todas' OR natureza_juridica_codigo_descricao = ?)",
+            [ano_inicio, ano_fim, [int(m) for m in meses], natureza, natureza],
+        )
+
+    def anos_natureza(self):
+        return [int(a) for a in self._consultar("SELECT DISTINCT ano FROM natureza ORDER BY 1")["ano"]]
+
+    def meses_natureza(self):
+        return [int(m) for m in self._consultar("SELECT DISTINCT mes FROM natureza ORDER BY 1")["mes"]]
+
+    def naturezas(self):
+        return self._consultar("""
+            SELECT DISTINCT natureza_juridica_codigo_descricao AS nj FROM natureza
+            WHERE natureza_juridica_codigo_descricao IS NOT NULL ORDER BY 1
+        """)["nj"].tolist()
+
+    def serie_natureza(self, ano_inicio, ano_fim, meses, natureza, nivel):
+        filtro, parametros = self._filtro_natureza(ano_inicio, ano_fim, meses, natureza)
+        eixo_x = "ano_mes" if nivel == "Mensal" else "ano"
+        return self._consultar(f"""
+            SELECT {eixo_x}, {self._em_reais("SUM(receita_total)")} AS receita_total
+            FROM natureza WHERE {filtro}
+            GROUP BY {eixo_x} ORDER BY {eixo_x}
+        """, parametros)
+
+    def ranking_natureza(self, ano_inicio, ano_fim, meses, natureza):
+        filtro, parametros = self._filtro_natureza(ano_inicio, ano_fim, meses, natureza)
+        return self._consultar(f"""
+            SELECT natureza_juridica_codigo_descricao,
+                   {self._em_reais("SUM(receita_total)")} AS receita_total
+            FROM natureza WHERE {filtro}
+            GROUP BY natureza_juridica_codigo_descricao
+            ORDER BY SUM(receita_total) ASC, natureza_juridica_codigo_descricao
+        """, parametros)
+
+    def linhas_natureza(self, ano_inicio, ano_fim, meses, natureza):
+        filtro, parametros = self._filtro_natureza(ano_inicio, ano_fim, meses, natureza)
+        selecao = self._linhas(agregacoes.TRIBUTOS_NATUREZA + ["receita_total"])
+        return self._consultar(f"{selecao} FROM natureza WHERE {filtro}", parametros)
+
+    # 5.4) Qualidade dos dados ----------------------------------------------
+
+    def relatorio_qualidade(self, base):
+        # As verificações rodam em SQL sobre a fonte, sem passar a base pelo
+        # pandas; a posição `linha` é a mesma que o loader do pandas daria, e
+        # as verificações que precisam do valor original vêm da quarentena
+        # gravada com a cópia Parquet (qualidade.VERIFICACOES_DA_FONTE)
+        self._consultar("SELECT 1")
+        relacao, quarentena_fonte = self._qualidade[base]
+        if base == "arrecadacao":
+            colunas, coluna_serie = self._colunas_tributos, "sigla_uf"
+        else:
+            colunas, coluna_serie = agregacoes.TRIBUTOS_NATUREZA, "natureza_juridica_codigo"
+
+        if quarentena_fonte:
+            da_fonte = [f"SELECT linha, verificacao, coluna, valor_original FROM read_parquet('{quarentena_fonte}')"]
+        else:
+            vazio = """("{c}" IS NULL OR TRIM(CAST("{c}" AS VARCHAR)) = '')"""
+            da_fonte = [
+                f"""SELECT linha, 'conversao', '{c}', CAST("{c}" AS VARCHAR) FROM {relacao}
+                    WHERE NOT {vazio.format(c=c)} AND TRY_CAST("{c}" AS DOUBLE) IS NULL"""
+                for c in colunas
+            ] + [
+                f"SELECT linha, 'vazio', '{c}', '' FROM {relacao} WHERE {vazio.format(c=c)}"
+                for c in colunas
+            ]
+        partes = da_fonte + [
+            f"""SELECT linha, 'duplicada', '', '' FROM (
+                    SELECT linha, COUNT(*) OVER (PARTITION BY "{coluna_serie}", ano, mes) AS n FROM {relacao}
+                ) WHERE n > 1""",
+        ] + [
+            f"""SELECT linha, 'negativo', '{c}', CAST(TRY_CAST("{c}" AS DOUBLE) AS VARCHAR) FROM {relacao}
+                WHERE TRY_CAST("{c}" AS DOUBLE) < 0"""
+            for c in colunas
+        ]
+        ordem = ", ".join(f"'{nome}'" for nome in qualidade.VERIFICACOES)
+        quarentena = self._consultar(f"""
+            SELECT q.linha, q.verificacao, q.coluna, q.valor_original, r.ano, r.mes, r."{coluna_serie}"
+            FROM ({" UNION ALL ".join(partes)}) AS q(linha, verificacao, coluna, valor_original)
+            JOIN {relacao} AS r USING (linha)
+            ORDER BY list_position([{ordem}], q.verificacao), q.linha, q.coluna
+        """).astype({"linha": "int64", "ano": "int64", "mes": "int64"})
+
+        # Lacunas: entre meses vizinhos da mesma série e, nas pontas, até o
+        # primeiro e o último mês da base inteira; séries na ordem em que
+        # aparecem, como no pandas
+        lacunas = self._consultar(f"""
+            WITH periodos AS (
+                SELECT "{coluna_serie}" AS serie, ano * 12 + mes - 1 AS periodo, MIN(linha) AS primeira
+                FROM {relacao} GROUP BY 1, 2
+            ),
+            limites AS (SELECT MIN(periodo) AS inicio, MAX(periodo) AS fim FROM periodos),
+            vizinhos AS (
+                SELECT serie, periodo, MIN(primeira) OVER (PARTITION BY serie) AS primeira,
+                       LAG(periodo) OVER w AS anterior, LEAD(periodo) OVER w AS proximo
+                FROM periodos WINDOW w AS (PARTITION BY serie ORDER BY periodo)
+            )
+            SELECT serie, de, ate FROM (
+                SELECT serie, primeira, COALESCE(anterior + 1, inicio) AS de, periodo - 1 AS ate
+                FROM vizinhos, limites
+                UNION ALL
+                SELECT serie, primeira, periodo + 1, fim FROM vizinhos, limites WHERE proximo IS NULL
+            ) WHERE ate >= de
+            ORDER BY primeira, de
+        """)
+        linhas = int(self._consultar(f"SELECT COUNT(*) AS n FROM {relacao}")["n"].iloc[0])
+        return qualidade.RelatorioQualidade.de_tabelas(
+            base, linhas, coluna_serie, quarentena,
+            qualidade.tabela_lacunas(
+                coluna_serie, lacunas["serie"].to_numpy(dtype=object),
+                lacunas["de"].to_numpy(dtype="int64"), lacunas["ate"].to_numpy(dtype="int64"),
+            ),
+        )
+
+# --------------------------------------------------
+# 6) Escolha do backend
+# --------------------------------------------------
+
+BACKENDS = {"pandas": BackendPandas, "duckdb": BackendDuckDB}
+
+
+def obter_backend(nome=None):
+    """Instancia o backend `nome` (padrão: configuracao.BACKEND) com os modos configurados."""
+    nome = (nome or configuracao.BACKEND).lower()
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {nome!r} (opções: {', '.join(BACKENDS)})")
+    if nome == "duckdb":
+        return BackendDuckDB(exato=configuracao.MODO_EXATO)
+    return BackendPandas(compacto=configuracao.MODO_COMPACTO, exato=configuracao.MODO_EXATO)
+
+
+_lock_padrao = threading.Lock()
+_padrao = None
+
+
+def backend_padrao():
+    """
+    Backend configurado, único no processo: páginas, API e aquecimento
+    (`aquecimento.py`) compartilham os mesmos dados carregados e o mesmo cache.
+    """
+    global _padrao
+    with _lock_padrao:
+        if _padrao is None:
+            _padrao = obter_backend()
+        return _padrao
+
+# --------------------------------------------------
+# 7) Verificação de equivalência entre backends
+# --------------------------------------------------
+
+def _normalizar(resultado):
+    """Ordena e padroniza tipos para comparar tabelas vindas de backends diferentes."""
+    if resultado is None:
+        return None
+    if isinstance(resultado, pd.Series):
+        return resultado.sort_index()
+    df = resultado.copy()
+    if "ano_mes" in df.columns:
+        df["ano_mes"] = pd.to_datetime(df["ano_mes"])
+    for coluna in df.columns:
+        if df[coluna].dtype == object or pd.api.types.is_string_dtype(df[coluna]):
+            df[coluna] = df[coluna].astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def _iguais(a, b, rtol):
+    if a is None or b is None:
+        return a is None and b is None
+    try:
+        if isinstance(a, pd.Series):
+            pd.testing.assert_series_equal(a, b, check_names=False, check_dtype=False, rtol=rtol)
+        else:
+            pd.testing.assert_frame_equal(a, b, check_dtype=False, rtol=rtol)
+        return True
+    except AssertionError:
+        return False
+
+
+def verificar_equivalencia(a, b, rtol=1e-9):
+    """
+    Compara os backends `a` e `b` numa grade de filtros das duas páginas.
+    Devolve a lista de consultas divergentes (vazia se forem equivalentes).
+    """
+    consultas = [
+        ("colunas_tributos", ()), ("ufs", ()), ("anos", ()),
+        ("anos_natureza", ()), ("meses_natureza", ()), ("naturezas", ()),
+    ]
+    for uf in ("Todas", "SP", "AC", "Nordeste", ("RJ", "SP")):
+        for ano_inicio, ano_fim in ((2000, 2024), (2010, 2015), (2023, 2023)):
+            for tributo in ("receita_total", "irpf", "cofins_demais_empresas"):
+                for nivel in ("Mensal", "Anual"):
+                    consultas.append(("serie_tributo", (uf, ano_inicio, ano_fim, tributo, nivel)))
+                    consultas.append(("serie_regiao", (uf, ano_inicio, ano_fim, tributo, nivel)))
+                consultas.append(("media_mensal_por_uf", (uf, ano_inicio, ano_fim, tributo)))
+                consultas.append(("media_mensal_por_regiao", (uf, ano_inicio, ano_fim, tributo)))
+                consultas.append(("crescimento_percentual", (uf, ano_inicio, ano_fim, tributo)))
+            consultas.append(("linhas_arrecadacao", (uf, ano_inicio, ano_fim)))
+    primeira_natureza = a.naturezas()[0]
+    for natureza in ("Todas", primeira_natureza):
+        for meses in (list(range(1, 13)), [1, 6, 12]):
+            for ano_inicio, ano_fim in ((2016, 2024), (2019, 2020)):
+                filtros = (ano_inicio, ano_fim, meses, natureza)
+                for nivel in ("Mensal", "Anual"):
+                    consultas.append(("serie_natureza", filtros + (nivel,)))
+                consultas.append(("ranking_natureza", filtros))
+                consultas.append(("linhas_natureza", filtros))
+
+    divergentes = []
+    for metodo, argumentos in consultas:
+        ra = getattr(a, metodo)(*argumentos)
+        rb = getattr(b, metodo)(*argumentos)
+        if isinstance(ra, list):
+            iguais = ra == rb
+        else:
+            iguais = _iguais(_normalizar(ra), _normalizar(rb), rtol)
+        if not iguais:
+            divergentes.append((metodo, argumentos))
+    return divergentes, len(consultas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backends analíticos da Dashboard Tributária.")
+    parser.add_argument("--parquet", action="store_true", help="(re)gera as cópias Parquet das bases")
+    parser.add_argument("--verificar", action="store_true", help="compara os backends pandas e duckdb")
+    args = parser.parse_args()
+
+    if args.parquet:
+        print("Gerado:", gerar_parquet_arrecadacao(forcar=True))
+        print("Gerado:", gerar_parquet_natureza(forcar=True))
+
+    if args.verificar:
+        falhas = 0
+        for exato in (False, True):
+            pandas_ = BackendPandas(exato=exato)
+            duckdb_ = BackendDuckDB(exato=exato)
+            divergentes, total = verificar_equivalencia(pandas_, duckdb_)
+            modo = "exato" if exato else "float"
+            print(f"[{modo}] fonte da arrecadação no duckdb: {duckdb_.fonte_arrecadacao}")
+            print(f"[{modo}] {total - len(divergentes)}/{total} consultas equivalentes")
+            for metodo, argumentos in divergentes:
+                print(f"    divergente: {metodo}{argumentos}")
+            falhas += len(divergentes)
+        sys.exit(1 if falhas else 0)
+
+    if not (args.parquet or args.verificar):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# configuracao.py
+
+"""
+Configurações do dashboard, lidas de variáveis de ambiente.
+
+Valem tanto para as páginas Streamlit quanto para a API e os scripts de linha
+de comando. Exemplo:
+
+    DASHBOARD_COMPACTO=1 streamlit run 1_Tributos_Federais.py
+"""
+
+import os
+
+
+def _booleano(nome, padrao=False):
+    valor = os.environ.get(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ("1", "true", "sim", "yes", "on")
+
+
+# Carrega `arrecadacao_federal` no formato compacto (tributos em centavos
+# int32/int64, esparsos quando ocupam menos, UF como código uint8 e período
+# como índice mensal uint16). Ver agregacoes.compactar_arrecadacao.
+MODO_COMPACTO = _booleano("DASHBOARD_COMPACTO")
+
+# Guarda os valores em centavos int64 e faz todas as somas em aritmética
+# inteira, convertendo para reais só no resultado agregado. Ver agregacoes.py.
+MODO_EXATO = _booleano("DASHBOARD_EXATO")
+
+# Motor das agregações: "pandas" (tabelas inteiras em memória) ou "duckdb"
+# (consultas direto nos arquivos). Ver backends.py.
+BACKEND = os.environ.get("DASHBOARD_BACKEND", "pandas").strip().lower()
+
+# Ao primeiro acesso a qualquer página, carrega as bases e monta a visão padrão
+# das duas páginas numa thread em segundo plano. Ver aquecimento.py.
+AQUECER = _booleano("DASHBOARD_AQUECER", padrao=True)
+
+# Figuras enxutas: datas e valores em arrays binários, valores arredondados à
+# precisão exibida, template reduzido ao que a figura usa e GeoJSON compacto.
+# Ver figuras.compactar_figura.
+FIGURAS_COMPACTAS = _booleano("DASHBOARD_FIGURAS_COMPACTAS", padrao=True)
+
+# Limite, em KB, do JSON de cada figura; `python figuras.py` mede as figuras
+# padrão das páginas e falha se alguma passar dele.
+ORCAMENTO_FIGURA_KB = float(os.environ.get("DASHBOARD_ORCAMENTO_FIGURA_KB", "64"))
+
+# Endereço de onde o navegador baixa o GeoJSON das UFs; os mapas levam só o
+# endereço, e o navegador baixa o arquivo uma vez. Vazio: nas páginas servidas
+# pelo Streamlit com `server.enableStaticServing` (ligado em
+# .streamlit/config.toml), o GeoJSON publicado em static/; fora delas, embutido.
+GEOJSON_URL = os.environ.get("DASHBOARD_GEOJSON_URL", "").strip() or None
@@ -0,0 +1,93 @@
+# exportacao.py
+
+"""
+Exportação das tabelas do dashboard em CSV, Parquet e XLSX.
+
+Os geradores trabalham direto sobre o DataFrame recebido, sem montar cópias
+intermediárias da tabela inteira:
+- CSV sai em blocos de linhas (`gerar_csv`), que podem ser enviados pela rede
+  um a um (API) ou gravados num único buffer (botão de download);
+- Parquet é escrito a partir de uma tabela Arrow;
+- XLSX usa o modo write-only do openpyxl, que grava linha a linha.
+"""
+
+import io
+import math
+
+# --------------------------------------------------
+# 1) Formatos suportados
+# --------------------------------------------------
+
+FORMATOS = {
+    "csv": {"rotulo": "CSV", "mime": "text/csv", "extensao": ".csv"},
+    "parquet": {"rotulo": "Parquet", "mime": "application/vnd.apache.parquet", "extensao": ".parquet"},
+    "xlsx": {
+        "rotulo": "Excel (XLSX)",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "extensao": ".xlsx",
+    },
+}
+
+LINHAS_POR_BLOCO = 20_000
+
+# --------------------------------------------------
+# 2) Geradores por formato
+# --------------------------------------------------
+
+def gerar_csv(df, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Gera o CSV (UTF-8, com cabeçalho) em blocos de bytes de até `linhas_por_bloco` linhas."""
+    if df.empty:
+        yield df.to_csv(index=False).encode("utf-8")
+        return
+
+    for inicio in range(0, len(df), linhas_por_bloco):
+        bloco = df.iloc[inicio:inicio + linhas_por_bloco]
+        yield bloco.to_csv(index=False, header=(inicio == 0)).encode("utf-8")
+
+
+def escrever_parquet(df, destino):
+    """Converte para Arrow e grava Parquet (zstd) em `destino` (caminho ou arquivo binário)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(tabela, destino, compression="zstd")
+
+
+def escrever_xlsx(df, destino, nome_planilha="dados"):
+    """Grava XLSX linha a linha com o modo write-only do openpyxl."""
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet(title=nome_planilha[:31])
+    planilha.append([str(c) for c in df.columns])
+    for linha in df.itertuples(index=False, name=None):
+        # NaN/inf (ex.: crescimento sobre base zero) não são valores válidos no XLSX
+        planilha.append([
+            None if isinstance(v, float) and not math.isfinite(v) else v
+            for v in linha
+        ])
+    livro.save(destino)
+
+# --------------------------------------------------
+# 3) Exportação em memória (para st.download_button)
+# --------------------------------------------------
+
+def exportar(df, formato, nome_planilha="dados"):
+    """Devolve o conteúdo do arquivo exportado, em bytes, no `formato` pedido."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r}")
+
+    buffer = io.BytesIO()
+    if formato == "csv":
+        for bloco in gerar_csv(df):
+            buffer.write(bloco)
+    elif formato == "parquet":
+        escrever_parquet(df, buffer)
+    else:
+        escrever_xlsx(df, buffer, nome_planilha)
+    return buffer.getvalue()
+
+
+def nome_arquivo(base, formato):
+    return base + FORMATOS[formato]["extensao"]
@@ -0,0 +1,714 @@
+# figuras.py
+
+"""
+Gráficos Plotly das páginas, sem dependência do Streamlit.
+
+Cada função recebe o backend (ver `backends.py`) e os filtros, e devolve a
+figura pronta (ou None quando não há dados). As figuras ficam num cache do
+processo, por versão dos dados e filtros: sessões diferentes com os mesmos
+filtros recebem o mesmo objeto, e o aquecimento (`aquecimento.py`) pode
+montá-las antes do primeiro acesso. Quem recebe uma figura não deve modificá-la.
+
+Antes de entrar no cache, cada figura passa por `compactar_figura` (se
+DASHBOARD_FIGURAS_COMPACTAS estiver ligado), que encolhe o JSON enviado ao
+navegador a cada execução da página sem mudar o que aparece na tela. Para
+medir o tamanho das figuras padrão das páginas contra o orçamento:
+
+    python figuras.py
+"""
+
+import argparse
+import functools
+import os
+import re
+import sys
+
+import numpy as np
+
+import agregacoes
+import configuracao
+from backends import CacheResultados, chave_de_cache
+
+_cache = CacheResultados(max_itens=64)
+
+
+def _memorizada(funcao):
+    @functools.wraps(funcao)
+    def envolvida(backend, *args):
+        chave = chave_de_cache(
+            agregacoes.versao_dados(), id(backend), configuracao.FIGURAS_COMPACTAS,
+            configuracao.GEOJSON_URL, _servido_pelo_streamlit(), funcao.__name__, *args,
+        )
+        return _cache.obter(chave, lambda: _compactar_resultado(funcao(backend, *args)))
+    return envolvida
+
+
+def estatisticas_cache():
+    return _cache.estatisticas()
+
+# --------------------------------------------------
+# 1) Tributos Federais por UF
+# --------------------------------------------------
+
+def _linhas_no_tempo(df, coluna_cor, rotulo_cor, rotulo_hover, tributo_limpo, nivel, titulo):
+    """Gráfico de linhas de `valor_agrupado` no tempo, uma linha por valor de `coluna_cor`."""
+    # Importado só aqui para não pesar no início das páginas
+    import plotly.express as px
+
+    if nivel == "Anual":
+        eixo_x = "ano"
+        label_x = "Ano"
+    else:
+        eixo_x = "ano_mes"
+        label_x = "Ano-Mês"
+
+    fig_tempo = px.line(
+        df,
+        x=eixo_x,
+        y="valor_agrupado",
+        color=coluna_cor,
+        labels={
+            eixo_x: label_x,
+            "valor_agrupado": tributo_limpo + " (R$)",
+            coluna_cor: rotulo_cor
+        },
+        title=titulo
+    )
+    fig_tempo.update_layout(legend_title_text=rotulo_cor)
+
+    if nivel == "Mensal":
+        fig_tempo.update_traces(
+            hovertemplate=(
+                f"<b>{rotulo_hover}</b><br>"
+                f"{label_x}: %{{x|%Y-%m}}<br>"
+                f"{tributo_limpo}: R$ %{{y:,.2f}}<extra></extra>"
+            )
+        )
+    else:
+        fig_tempo.update_traces(
+            hovertemplate=(
+                f"<b>{rotulo_hover}</b><br>"
+                f"Ano: %{{x}}<br>"
+                f"{tributo_limpo}: R$ %{{y:,.2f}}<extra></extra>"
+            )
+        )
+
+    return fig_tempo
+
+
+def _titulo_serie(tributo_limpo, nivel, ano_inicio, ano_fim):
+    return f"Série {nivel} de {tributo_limpo} ({ano_inicio}–{ano_fim})"
+
+
+@_memorizada
+def figura_serie(backend, uf, ano_inicio, ano_fim, tributo, tributo_limpo, nivel):
+    """Série temporal das 5 UFs de maior arrecadação (None se não houver dados)."""
+    df_top5 = backend.serie_tributo(uf, ano_inicio, ano_fim, tributo, nivel, top=5)
+    if df_top5.empty:
+        return None
+
+    return _linhas_no_tempo(
+        df_top5, "sigla_uf", "UF", "UF: %{color}", tributo_limpo, nivel,
+        _titulo_serie(tributo_limpo, nivel, ano_inicio, ano_fim) + "  (Top 5 UFs por Arrecadação)",
+    )
+
+
+@_memorizada
+def figura_serie_regiao(backend, uf, ano_inicio, ano_fim, tributo, tributo_limpo, nivel):
+    """Série temporal do tributo somado por região (None se não houver dados)."""
+    df_regioes = backend.serie_regiao(uf, ano_inicio, ano_fim, tributo, nivel)
+    if df_regioes.empty:
+        return None
+
+    return _linhas_no_tempo(
+        df_regioes, "regiao", "Região", "Região: %{fullData.name}", tributo_limpo, nivel,
+        _titulo_serie(tributo_limpo, nivel, ano_inicio, ano_fim) + "  (por Região)",
+    )
+
+
+# Mês médio do calendário gregoriano, em milissegundos
+_MES_MEDIO_MS = 365.2425 / 12 * 86_400_000
+
+
+def _eixo_mensal(datas):
+    """
+    Meses consecutivos como x0 + dx, sem array de x no JSON. Com o passo do
+    mês médio, cada ponto se afasta poucos dias do dia 1 do seu mês (menos de
+    5 em séries de décadas); o início é deslocado para que o ponto mais
+    adiantado caia ao meio-dia do dia 1, de modo que todos ficam dentro do
+    próprio mês (o hover %Y-%m não muda), o que não se vê num eixo de anos.
+    """
+    ms = datas.to_numpy().astype("datetime64[ms]").astype(np.int64)
+    desvio = ms[0] + np.arange(len(ms)) * _MES_MEDIO_MS - ms
+    x0 = ms[0] - desvio.min() + 43_200_000
+    return {"x0": str(np.datetime64(int(round(x0)), "ms")), "dx": _MES_MEDIO_MS}
+
+
+def _serie_da_linha(nome_linha, uf, por_regiao):
+    """
+    Série de previsao.py que corresponde a uma linha da figura: a própria UF;
+    ou, agrupada por região, a região se o filtro cobre todas as UFs dela, e
+    nenhuma (None) se cobre parte delas. A linha da região soma todas as
+    linhas da base, inclusive as repetidas, e a série da UF fica com uma por
+    mês: mesmo com uma UF só, a região não usa a série da UF.
+    """
+    if not por_regiao:
+        return nome_linha
+    ufs_da_regiao = agregacoes.REGIOES.get(nome_linha, ())
+    filtradas = [s for s in agregacoes.ufs_do_filtro(uf) if s in ufs_da_regiao]
+    if ufs_da_regiao and len(filtradas) == len(ufs_da_regiao):
+        return nome_linha
+    return None
+
+
+@_memorizada
+def figura_serie_com_previsao(backend, uf, ano_inicio, ano_fim, tributo, tributo_limpo, por_regiao):
+    """
+    Série mensal (por UF ou por região) com, para cada linha, a série
+    dessazonalizada (pontilhada) e a previsão dos 12 meses seguintes ao fim da
+    base (tracejada; só se o filtro de anos chega ao último ano da base). As
+    linhas extras ficam no grupo de legenda da sua UF ou região; a linha de
+    uma região com só parte das UFs no filtro fica sem elas. Ver previsao.py.
+    """
+    import plotly.graph_objects as go
+
+    import previsao
+
+    figura = figura_serie_regiao if por_regiao else figura_serie
+    base = figura(backend, uf, ano_inicio, ano_fim, tributo, tributo_limpo, "Mensal")
+    if base is None:
+        return None
+
+    resultado = previsao.previsoes(backend)
+    mostrar_previsao = ano_fim >= resultado.periodos[-1] // 12
+    fig = go.Figure(base)
+    for trace in base.data:
+        nome = _serie_da_linha(trace.name, uf, por_regiao)
+        if nome is None or not resultado.tem(nome, tributo):
+            continue
+
+        linhas = [("Dessazonalizada", "dot", resultado.dessazonalizada_no_periodo(nome, tributo, ano_inicio, ano_fim))]
+        if mostrar_previsao:
+            linhas.append(("Previsão", "dash", resultado.previsao_de(nome, tributo)))
+        for rotulo, traco, df in linhas:
+            fig.add_trace(go.Scatter(
+                **_eixo_mensal(df["ano_mes"]),
+                # Estimativas: float32 (erro relativo de 1e-7, abaixo do que a linha mostra) ocupa metade do JSON
+                y=df["valor"].to_numpy(dtype="float32"), mode="lines",
+                name=f"{trace.name} ({rotulo.lower()})", legendgroup=trace.legendgroup, showlegend=False,
+                line={"color": trace.line.color, "dash": traco, "width": 1.5},
+                hovertemplate=(
+                    f"<b>{trace.name} · {rotulo}</b><br>"
+                    f"Ano-Mês: %{{x|%Y-%m}}<br>"
+                    f"{tributo_limpo}: R$ %{{y:,.0f}}<extra></extra>"
+                ),
+            ))
+
+    return fig
+
+
+# Endereço da pasta estática do Streamlit, relativo à página (vale também sob
+# server.baseUrlPath, já que as páginas ficam no primeiro nível)
+URL_ESTATICA = "app/static"
+
+
+def _servido_pelo_streamlit():
+    """True se a página roda num servidor Streamlit com a pasta estática ligada."""
+    if "streamlit" not in sys.modules:
+        return False
+    import streamlit as st
+    from streamlit import runtime
+
+    return runtime.exists() and bool(st.get_option("server.enableStaticServing"))
+
+
+def _geojson_do_mapa():
+    """
+    O que vai no `geojson` dos mapas: DASHBOARD_GEOJSON_URL, se definido; o
+    endereço do GeoJSON publicado na pasta estática, se a página é servida pelo
+    Streamlit com ela ligada (o padrão, ver .streamlit/config.toml), para o
+    navegador baixá-lo uma vez só; fora disso, o próprio GeoJSON embutido.
+    """
+    if configuracao.GEOJSON_URL:
+        return configuracao.GEOJSON_URL
+    if _servido_pelo_streamlit():
+        publicado = agregacoes.publicar_geojson()
+        if publicado is not None:
+            return f"{URL_ESTATICA}/{os.path.basename(publicado)}"
+    return agregacoes.load_geojson(compacto=configuracao.FIGURAS_COMPACTAS)
+
+
+@_memorizada
+def figura_mapa(backend, uf, ano_inicio, ano_fim, tributo, tributo_limpo):
+    """
+    Média mensal do tributo por UF: devolve (tabela, choropleth); ambos None
+    se o GeoJSON não existir, e a figura None se não houver dados.
+    """
+    if agregacoes.load_geojson() is None:
+        return None, None
+    geojson_uf = _geojson_do_mapa()
+
+    df_mapa = backend.media_mensal_por_uf(uf, ano_inicio, ano_fim, tributo)
+
+    if df_mapa.empty:
+        return df_mapa, None
+
+    import plotly.express as px
+
+    # assign (e não atribuição direta): df_mapa é compartilhado pelo cache do backend
+    df_mapa = df_mapa.assign(**{
+        "Valor Médio (R$)": df_mapa["valor_medio"].apply(lambda x: f"R$ {x:,.2f}")
+    })
+
+    df_exibir = df_mapa[["sigla_uf", "Valor Médio (R$)"]].rename(columns={"sigla_uf": "UF"})
+
+    fig_mapa = px.choropleth(
+        df_mapa,
+        geojson=geojson_uf,
+        locations="sigla_uf",
+        featureidkey="properties.sigla",
+        color="valor_medio",
+        color_continuous_scale="plasma",
+        labels={"valor_medio": f"Média de {tributo_limpo} (R$)"},
+        title=f"Média Mensal de {tributo_limpo} por UF",
+    )
+
+    hover_map = (
+        "<b>UF: %{location}</b><br>"
+        f"Média de {tributo_limpo}: R$ %{{z:,.2f}}<extra></extra>"
+    )
+    _estilizar_mapa(fig_mapa, hover_map, tributo_limpo)
+
+    return df_exibir, fig_mapa
+
+
+@_memorizada
+def figura_mapa_regiao(backend, uf, ano_inicio, ano_fim, tributo, tributo_limpo):
+    """
+    Média mensal do tributo por região, com cada UF do filtro pintada com o
+    valor da sua região: devolve (tabela por região, choropleth), como figura_mapa.
+    """
+    if agregacoes.load_geojson() is None:
+        return None, None
+    geojson_uf = _geojson_do_mapa()
+
+    df_regioes = backend.media_mensal_por_regiao(uf, ano_inicio, ano_fim, tributo)
+
+    if df_regioes.empty:
+        return df_regioes, None
+
+    import pandas as pd
+    import plotly.express as px
+
+    media_da_regiao = dict(zip(df_regioes["regiao"], df_regioes["valor_medio"]))
+    df_mapa = pd.DataFrame(
+        [
+            (sigla, regiao, media_da_regiao[regiao])
+            for regiao, siglas in agregacoes.REGIOES.items() if regiao in media_da_regiao
+            for sigla in siglas if sigla in agregacoes.ufs_do_filtro(uf)
+        ],
+        columns=["sigla_uf", "regiao", "valor_medio"],
+    )
+
+    df_exibir = pd.DataFrame({
+        "Região": df_regioes["regiao"],
+        "Valor Médio (R$)": df_regioes["valor_medio"].apply(lambda x: f"R$ {x:,.2f}"),
+    })
+
+    fig_mapa = px.choropleth(
+        df_mapa,
+        geojson=geojson_uf,
+        locations="sigla_uf",
+        featureidkey="properties.sigla",
+        color="valor_medio",
+        custom_data=["regiao"],
+        color_continuous_scale="plasma",
+        labels={"valor_medio": f"Média de {tributo_limpo} (R$)"},
+        title=f"Média Mensal de {tributo_limpo} por Região",
+    )
+
+    hover_map = (
+        "<b>Região: %{customdata[0]}</b> (%{location})<br>"
+        f"Média de {tributo_limpo}: R$ %{{z:,.2f}}<extra></extra>"
+    )
+    _estilizar_mapa(fig_mapa, hover_map, tributo_limpo)
+
+    return df_exibir, fig_mapa
+
+
+def _estilizar_mapa(fig_mapa, hover_map, tributo_limpo):
+    fig_mapa.update_geos(fitbounds="locations", visible=False)
+    fig_mapa.update_traces(marker_line_color="white", marker_line_width=0.8)
+
+    fig_mapa.update_traces(hovertemplate=hover_map)
+
+    fig_mapa.update_coloraxes(
+        colorbar_title_text=f"Média de {tributo_limpo} (R$)",
+        colorbar_tickprefix="R$ ",
+        colorbar_tickformat=",.0f"
+    )
+
+    fig_mapa.update_layout(
+        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+
+# --------------------------------------------------
+# 2) Natureza Jurídica
+# --------------------------------------------------
+
+@_memorizada
+def figura_serie_natureza(backend, ano_inicio, ano_fim, meses, natureza, nivel):
+    """Receita total mensal ou anual (None se não houver dados)."""
+    df_series = backend.serie_natureza(ano_inicio, ano_fim, meses, natureza, nivel)
+    if df_series.empty:
+        return None
+
+    import plotly.express as px
+
+    if nivel == "Mensal":
+        eixo_x = "ano_mes"
+        label_x = "Ano-Mês"
+        title_tempo = (
+            "Receita Mensal "
+            + (f"de {natureza} " if natureza != "Todas" else "")
+            + f"({ano_inicio}–{ano_fim})"
+        )
+    else:  # Anual
+        eixo_x = "ano"
+        label_x = "Ano"
+        title_tempo = (
+            "Receita Anual "
+            + (f"de {natureza} " if natureza != "Todas" else "")
+            + f"({ano_inicio}–{ano_fim})"
+        )
+
+    fig1 = px.line(
+        df_series,
+        x=eixo_x,
+        y="receita_total",
+        labels={eixo_x: label_x, "receita_total": "Receita Total (R$)"},
+        title=title_tempo
+    )
+    fig1.update_layout(
+        template="plotly_white",
+        title_font_size=18,
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14,
+        xaxis_tickfont_size=12,
+        yaxis_tickfont_size=12
+    )
+    if nivel == "Mensal":
+        fig1.update_traces(
+            hovertemplate="<b>Ano-Mês:</b> %{x|%Y-%m}<br><b>Receita:</b> R$ %{y:,.2f}<extra></extra>"
+        )
+    else:
+        fig1.update_traces(
+            hovertemplate="<b>Ano:</b> %{x}<br><b>Receita:</b> R$ %{y:,.2f}<extra></extra>"
+        )
+    return fig1
+
+
+# Rótulos do eixo do ranking: as descrições das naturezas jurídicas chegam a
+# 72 caracteres; no eixo vão encurtadas, e a descrição inteira fica no hover
+LIMITE_ROTULO_NATUREZA = 30
+
+
+def _rotulos_curtos(descricoes, limite=LIMITE_ROTULO_NATUREZA):
+    """
+    Encurta cada descrição a `limite` caracteres (cortando numa palavra, com
+    "…"); se dois rótulos curtos coincidirem, os dois ficam com a descrição
+    inteira, para que cada natureza continue com a sua barra.
+    """
+    def encurtar(texto):
+        if len(texto) <= limite:
+            return texto
+        corte = texto[:limite].rsplit(" ", 1)[0].rstrip(" ,-(")
+        return f"{corte}…"
+
+    curtos = [encurtar(t) for t in descricoes]
+    repetidos = {c for c in curtos if curtos.count(c) > 1}
+    return [t if c in repetidos else c for t, c in zip(descricoes, curtos)]
+
+
+@_memorizada
+def figura_ranking_natureza(backend, ano_inicio, ano_fim, meses, natureza):
+    """
+    Barras horizontais de todas as naturezas jurídicas, ascendentes (None se
+    não houver dados). As barras de rótulo encurtado vão num traço à parte,
+    que leva a descrição inteira para o hover; as demais mostram o próprio
+    rótulo, e o texto de cada natureza segue uma vez só no JSON.
+    """
+    df_rank = backend.ranking_natureza(ano_inicio, ano_fim, meses, natureza)
+    if df_rank.empty:
+        return None
+
+    import plotly.graph_objects as go
+
+    descricoes = df_rank["natureza_juridica_codigo_descricao"].tolist()
+    rotulos = _rotulos_curtos(descricoes)
+    encurtado = np.array([r != d for r, d in zip(rotulos, descricoes)])
+    receita = df_rank["receita_total"].to_numpy()
+    hover = "<b>Natureza Jurídica:</b> {}<br><b>Receita:</b> R$ %{{x:,.2f}}<extra></extra>"
+
+    fig2 = go.Figure()
+    for mascara, texto_hover in ((~encurtado, "%{y}"), (encurtado, "%{customdata}")):
+        if not mascara.any():
+            continue
+        fig2.add_bar(
+            x=receita[mascara],
+            y=[r for r, m in zip(rotulos, mascara) if m],
+            customdata=[d for d, m in zip(descricoes, mascara) if m] if texto_hover == "%{customdata}" else None,
+            orientation="h",
+            marker_color="#1f77b4",
+            hovertemplate=hover.format(texto_hover),
+            showlegend=False,
+        )
+    fig2.update_layout(
+        title=f"Naturezas Jurídicas Ordenadas por Receita Total ({ano_inicio}–{ano_fim})",
+        xaxis_title="Receita Total (R$)",
+        # Com dois traços, a ordem das barras vem da receita, e não da ordem dos dados
+        yaxis=dict(title="Natureza Jurídica", categoryorder="total ascending"),
+        template="plotly_white",
+        title_font_size=18,
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14,
+        xaxis_tickfont_size=12,
+        yaxis_tickfont_size=12,
+        margin={"l": 220, "r": 20, "t": 40, "b": 20},
+        height=1200  # altura maior para que toda a lista apareça, e o usuário role a página
+    )
+    return fig2
+
+# --------------------------------------------------
+# 3) Payload enviado ao navegador
+# --------------------------------------------------
+
+# Precisão dos valores nos gráficos: centavos, a mesma do hover (R$ %{y:,.2f})
+CASAS_VALORES = 2
+
+# Chaves do template que só valem para um tipo de subplot, e os traços que o usam
+_SUBPLOTS_DO_TEMPLATE = {
+    "geo": {"choropleth", "scattergeo"},
+    "polar": {"barpolar", "scatterpolar", "scatterpolargl"},
+    "ternary": {"scatterternary"},
+    "scene": {"cone", "isosurface", "mesh3d", "scatter3d", "streamtube", "surface", "volume"},
+    "mapbox": {"choroplethmapbox", "densitymapbox", "scattermapbox"},
+    "map": {"choroplethmap", "densitymap", "scattermap"},
+}
+
+# Padrões de itens do layout (anotações, formas...) que só valem se houver itens
+_ITENS_DO_TEMPLATE = {
+    "annotationdefaults": "annotations",
+    "imagedefaults": "images",
+    "shapedefaults": "shapes",
+    "sliderdefaults": "sliders",
+    "updatemenudefaults": "updatemenus",
+}
+
+# Traços coloridos por escala contínua (usam colorscale/coloraxis do template)
+_TRACOS_COM_ESCALA = {
+    "choropleth", "contour", "densitymap", "densitymapbox", "heatmap",
+    "histogram2d", "histogram2dcontour", "surface",
+}
+
+_DATA_ISO = re.compile(r"^\d{4}-\d{2}(-\d{2})?([ T]|$)")
+
+
+def _valores_compactos(valores):
+    """
+    Arredonda floats a CASAS_VALORES; se todos ficarem inteiros, devolve int64,
+    que o Plotly reduz a int8/16/32 no JSON. None se não houver o que mudar.
+    """
+    arr = np.asarray(valores)
+    if arr.dtype.kind != "f" or arr.size == 0:
+        return None
+    arr = np.round(arr, CASAS_VALORES)
+    if np.isfinite(arr).all() and (arr == np.trunc(arr)).all() and np.abs(arr).max() < 2**31:
+        return arr.astype(np.int64)
+    return arr
+
+
+def _datas_em_ms(valores):
+    """
+    Datas (datetime64 ou texto ISO) como milissegundos desde 1970 em float64,
+    que o Plotly envia em base64 e um eixo "date" mostra como data. None se
+    `valores` não forem datas.
+    """
+    arr = np.asarray(valores)
+    if arr.size == 0:
+        return None
+    if arr.dtype.kind in "OU":
+        if not all(isinstance(v, str) and _DATA_ISO.match(v) for v in arr[:1]):
+            return None
+        try:
+            arr = arr.astype("datetime64[ms]")
+        except ValueError:
+            return None
+    if arr.dtype.kind != "M" or np.isnat(arr).any():
+        return None
+    return arr.astype("datetime64[ms]").astype(np.int64).astype(np.float64)
+
+
+def _template_enxuto(fig):
+    """Template só com os tipos de traço, subplots e itens que a figura usa."""
+    modelo = fig.layout.template.to_plotly_json()
+    tipos = {trace.type for trace in fig.data}
+
+    layout = dict(modelo.get("layout", {}))
+    for chave, tipos_do_subplot in _SUBPLOTS_DO_TEMPLATE.items():
+        if not tipos & tipos_do_subplot:
+            layout.pop(chave, None)
+    for chave, itens in _ITENS_DO_TEMPLATE.items():
+        if not fig.layout[itens]:
+            layout.pop(chave, None)
+    if not tipos & _TRACOS_COM_ESCALA and not fig.layout.coloraxis.to_plotly_json():
+        layout.pop("colorscale", None)
+        layout.pop("coloraxis", None)
+
+    dados = {tipo: v for tipo, v in modelo.get("data", {}).items() if tipo in tipos}
+    return {"data": dados, "layout": layout}
+
+
+def compactar_figura(fig):
+    """
+    Encolhe o JSON da figura (o que o st.plotly_chart envia ao navegador) sem
+    mudar o desenho:
+    - datas do eixo x viram milissegundos em float64 (array binário em base64
+      no JSON), com o eixo marcado como "date";
+    - valores arredondados a centavos, e inteiros como int (int8/16/32);
+    - o template fica só com o que a figura usa (o padrão traz estilos de
+      todos os tipos de traço e subplot do Plotly);
+    - saem do layout e dos traços as chaves iguais ao padrão do plotly.js
+      (eixos "x"/"y", domínio [0, 1] e âncora no único eixo oposto).
+    Altera e devolve `fig`.
+    """
+    eixos_x = set()
+    for trace in fig.data:
+        x = getattr(trace, "x", None)
+        if x is not None:
+            ms = _datas_em_ms(x)
+            if ms is not None:
+                trace.x = ms
+                eixos_x.add(trace.xaxis or "x")
+            else:
+                x = _valores_compactos(x)
+                if x is not None:
+                    trace.x = x
+        for atributo in ("y", "z"):
+            valores = getattr(trace, atributo, None)
+            if valores is not None:
+                valores = _valores_compactos(valores)
+                if valores is not None:
+                    trace[atributo] = valores
+        if getattr(trace, "xaxis", None) == "x":
+            trace.xaxis = None
+        if getattr(trace, "yaxis", None) == "y":
+            trace.yaxis = None
+
+    for eixo in eixos_x:
+        fig.layout["xaxis" + eixo[1:]].type = "date"
+
+    layout = fig.to_plotly_json()["layout"]
+    if not any(re.fullmatch(r"[xy]axis\d+", chave) for chave in layout):
+        for eixo, oposto in (("xaxis", "y"), ("yaxis", "x")):
+            if fig.layout[eixo].anchor == oposto:
+                fig.layout[eixo].anchor = None
+            if fig.layout[eixo].domain == (0, 1):
+                fig.layout[eixo].domain = None
+
+    fig.layout.template = _template_enxuto(fig)
+    return fig
+
+
+def _compactar_resultado(resultado):
+    """Aplica compactar_figura às figuras do resultado (figura ou tupla com figuras)."""
+    if not configuracao.FIGURAS_COMPACTAS or resultado is None:
+        return resultado
+    if isinstance(resultado, tuple):
+        return tuple(_compactar_resultado(r) for r in resultado)
+    if hasattr(resultado, "to_plotly_json"):
+        return compactar_figura(resultado)
+    return resultado
+
+
+def tamanho_payload(fig):
+    """Bytes do JSON da figura, serializada como o st.plotly_chart a envia."""
+    import plotly.io as pio
+
+    return len(pio.to_json(fig, validate=False).encode("utf-8"))
+
+# --------------------------------------------------
+# 4) Linha de comando: tamanho das figuras padrão
+# --------------------------------------------------
+
+def _figuras_padrao(backend):
+    """(nome, função que monta a figura sem cache) das visões padrão das páginas."""
+    from aquecimento import PADRAO_ARRECADACAO, PADRAO_NATUREZA, PADRAO_TRIBUTO
+
+    meses = tuple(backend.meses_natureza())
+    return [
+        (f"Série {nivel.lower()} (Top 5 UFs)", functools.partial(
+            figura_serie.__wrapped__, backend, *PADRAO_ARRECADACAO, *PADRAO_TRIBUTO, nivel))
+        for nivel in ("Mensal", "Anual")
+    ] + [
+        ("Série mensal por região", functools.partial(
+            figura_serie_regiao.__wrapped__, backend, *PADRAO_ARRECADACAO, *PADRAO_TRIBUTO, "Mensal")),
+        ("Série mensal com previsão", functools.partial(
+            figura_serie_com_previsao.__wrapped__, backend, *PADRAO_ARRECADACAO, *PADRAO_TRIBUTO, False)),
+        ("Mapa por UF", lambda: figura_mapa.__wrapped__(
+            backend, *PADRAO_ARRECADACAO, *PADRAO_TRIBUTO)[1]),
+        ("Mapa por região", lambda: figura_mapa_regiao.__wrapped__(
+            backend, *PADRAO_ARRECADACAO, *PADRAO_TRIBUTO)[1]),
+    ] + [
+        (f"Natureza jurídica {nivel.lower()}", functools.partial(
+            figura_serie_natureza.__wrapped__, backend, *PADRAO_NATUREZA, meses, "Todas", nivel))
+        for nivel in ("Mensal", "Anual")
+    ] + [
+        ("Ranking de naturezas", functools.partial(
+            figura_ranking_natureza.__wrapped__, backend, *PADRAO_NATUREZA, meses, "Todas")),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamanho do JSON das figuras padrão das páginas.")
+    parser.add_argument("--orcamento", type=float, default=configuracao.ORCAMENTO_FIGURA_KB,
+                        help="limite por figura, em KB (padrão: DASHBOARD_ORCAMENTO_FIGURA_KB)")
+    args = parser.parse_args()
+
+    # O st.plotly_chart aplica o tema do Streamlit ao importar; sem ele, o
+    # template padrão seria o do Plotly e as medidas não bateriam com as páginas
+    import streamlit.elements.plotly_chart  # noqa: F401
+    from backends import backend_padrao
+
+    backend = backend_padrao()
+    compactas = configuracao.FIGURAS_COMPACTAS
+    acima = []
+    print(f"{'Figura':<30}{'original':>12}{'compacta':>12}{'redução':>10}")
+    for nome, montar in _figuras_padrao(backend):
+        configuracao.FIGURAS_COMPACTAS = False
+        original = montar()
+        configuracao.FIGURAS_COMPACTAS = True
+        compacta = montar()
+        configuracao.FIGURAS_COMPACTAS = compactas
+        if original is None or compacta is None:
+            print(f"{nome:<30}{'sem dados':>12}")
+            continue
+
+        antes = tamanho_payload(original)
+        depois = tamanho_payload(compactar_figura(compacta))
+        enviado = depois if compactas else antes
+        marca = "  ACIMA DO ORÇAMENTO" if enviado > args.orcamento * 1024 else ""
+        if marca:
+            acima.append(nome)
+        print(f"{nome:<30}{antes / 1024:10.1f}KB{depois / 1024:10.1f}KB{1 - depois / antes:10.0%}{marca}")
+
+    print(f"\nOrçamento: {args.orcamento:.0f} KB por figura"
+          + ("" if compactas else " (figuras compactas desligadas: vale a coluna original)"))
+    sys.exit(1 if acima else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 # pages/2_Carga_por_Natureza_Juridica.py
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import os
+from functools import partial
+
+import agregacoes
+import aquecimento
+import configuracao
+import exportacao
+import figuras
+from backends import backend_padrao
 
 st.set_page_config(
     page_title="Carga por Natureza Jurídica",
@@ -33,29 +39,12 @@ if not os.path.isfile(EXCEL_CNAE):
 
 
 # --------------------------------------------------
-# 2) Carregamento do Excel (cacheado)
+# 2) Backend das consultas (o mesmo da página principal; ver backends.py)
 # --------------------------------------------------
 
-@st.cache_data
-def load_natureza():
-    df = pd.read_excel(EXCEL_CNAE)
-    tributos_cols = [
-        "imposto_importacao", "imposto_exportacao", "ipi", "irpf", "irpj", "irrf",
-        "iof", "itr", "cofins", "pis_pasep", "csll", "cide_combustiveis",
-        "contribuicao_previdenciaria", "cpsss", "pagamento_unificado",
-        "outras_receitas_rfb", "demais_receitas"
-    ]
-    for c in tributos_cols:
-        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0)
-    df["receita_total"] = df[tributos_cols].sum(axis=1)
-    if "ano_mes" not in df.columns:
-        df["ano_mes"] = pd.to_datetime(
-            df["ano"].astype(str) + "-" + df["mes"].astype(str).str.zfill(2),
-            format="%Y-%m", errors="coerce"
-        )
-    return df
-
-df_nat = load_natureza()
+backend = backend_padrao()
+if configuracao.AQUECER:
+    aquecimento.iniciar_em_segundo_plano()
 
 # --------------------------------------------------
 # 3) Filtros na sidebar (incluindo nomes de meses e nível de detalhe)
@@ -64,7 +53,7 @@ df_nat = load_natureza()
 st.sidebar.header("Filtros: Natureza Jurídica")
 
 # 3.1) Faixa de Anos (2016–2024)
-anos = sorted(df_nat["ano"].unique().tolist())
+anos = backend.anos_natureza()
 anos_validos = [a for a in anos if 2016 <= a <= 2024]
 if not anos_validos:
     st.warning("Não há dados entre 2016 e 2024.")
@@ -82,7 +71,7 @@ mes_num_to_nome = {
     5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto",
     9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
 }
-meses_disponiveis = sorted(df_nat["mes"].unique().tolist())
+meses_disponiveis = backend.meses_natureza()
 meses_validos = [m for m in meses_disponiveis if 1 <= m <= 12]
 meses_nomeados = [mes_num_to_nome[m] for m in meses_validos]
 
@@ -94,8 +83,7 @@ meses_selecionado_nome = st.sidebar.multiselect(
 meses_selecionado = [k for k, v in mes_num_to_nome.items() if v in meses_selecionado_nome]
 
 # 3.3) Natureza Jurídica
-njs = df_nat["natureza_juridica_codigo_descricao"].dropna().unique().tolist()
-njs.sort()
+njs = backend.naturezas()
 nj_sel = st.sidebar.selectbox(
     "Natureza Jurídica:",
     options=["Todas"] + njs,
@@ -109,18 +97,20 @@ nivel = st.sidebar.radio(
     index=0
 )
 
+# 3.5) Selo de qualidade da planilha (verificada na carga; ver qualidade.py)
+relatorio_qualidade = backend.relatorio_qualidade("natureza")
+texto_selo, icone_selo, cor_selo = relatorio_qualidade.selo()
+st.sidebar.badge(
+    texto_selo, icon=icone_selo, color=cor_selo,
+    help=f"{relatorio_qualidade.resumo()}. Nada foi removido da base: as linhas com problema "
+         "podem ser baixadas em “Exportar resultados filtrados” (tabela de quarentena).",
+)
+
 # --------------------------------------------------
-# 4) Filtragem principal
+# 4) Filtros comuns às consultas (aplicados dentro do backend)
 # --------------------------------------------------
 
-df_filtrado = df_nat[
-    (df_nat["ano"] >= ano_inicio) &
-    (df_nat["ano"] <= ano_fim) &
-    (df_nat["mes"].isin(meses_selecionado))
-].copy()
-
-if nj_sel != "Todas":
-    df_filtrado = df_filtrado[df_filtrado["natureza_juridica_codigo_descricao"] == nj_sel]
+filtros = (ano_inicio, ano_fim, meses_selecionado, nj_sel)
 
 # --------------------------------------------------
 # 5) Série Temporal de Receita Total (Mensal ou Anual)
@@ -128,61 +118,10 @@ if nj_sel != "Todas":
 
 st.subheader("1. Evolução da Receita Total por Natureza Jurídica")
 
-if df_filtrado.empty:
+fig1 = figuras.figura_serie_natureza(backend, *filtros, nivel)
+if fig1 is None:
     st.warning("Sem dados para estes filtros.")
 else:
-    if nivel == "Mensal":
-        df_series = (
-            df_filtrado
-            .groupby("ano_mes", as_index=False)["receita_total"]
-            .sum()
-            .sort_values("ano_mes")
-        )
-        eixo_x = "ano_mes"
-        label_x = "Ano-Mês"
-        title_tempo = (
-            "Receita Mensal "
-            + (f"de {nj_sel} " if nj_sel != "Todas" else "")
-            + f"({ano_inicio}–{ano_fim})"
-        )
-    else:  # Anual
-        df_series = (
-            df_filtrado
-            .groupby("ano", as_index=False)["receita_total"]
-            .sum()
-            .sort_values("ano")
-        )
-        eixo_x = "ano"
-        label_x = "Ano"
-        title_tempo = (
-            "Receita Anual "
-            + (f"de {nj_sel} " if nj_sel != "Todas" else "")
-            + f"({ano_inicio}–{ano_fim})"
-        )
-
-    fig1 = px.line(
-        df_series,
-        x=eixo_x,
-        y="receita_total",
-        labels={eixo_x: label_x, "receita_total": "Receita Total (R$)"},
-        title=title_tempo
-    )
-    fig1.update_layout(
-        template="plotly_white",
-        title_font_size=18,
-        xaxis_title_font_size=14,
-        yaxis_title_font_size=14,
-        xaxis_tickfont_size=12,
-        yaxis_tickfont_size=12
-    )
-    if nivel == "Mensal":
-        fig1.update_traces(
-            hovertemplate="<b>Ano-Mês:</b> %{x|%Y-%m}<br><b>Receita:</b> R$ %{y:,.2f}<extra></extra>"
-        )
-    else:
-        fig1.update_traces(
-            hovertemplate="<b>Ano:</b> %{x}<br><b>Receita:</b> R$ %{y:,.2f}<extra></extra>"
-        )
     st.plotly_chart(fig1, use_container_width=True)
 
 # --------------------------------------------------
@@ -191,56 +130,67 @@ else:
 
 st.subheader("2. Ranking de Naturezas Jurídicas (Receita Total)")
 
-df_para_ranking = df_nat[
-    (df_nat["ano"] >= ano_inicio) &
-    (df_nat["ano"] <= ano_fim) &
-    (df_nat["mes"].isin(meses_selecionado))
-].copy()
-
-if nj_sel != "Todas":
-    df_para_ranking = df_para_ranking[
-        df_para_ranking["natureza_juridica_codigo_descricao"] == nj_sel
-    ]
-
-if df_para_ranking.empty:
+fig2 = figuras.figura_ranking_natureza(backend, *filtros)
+if fig2 is None:
     st.info("Sem dados para ranking.")
 else:
-    df_rank = (
-        df_para_ranking
-        .groupby("natureza_juridica_codigo_descricao", as_index=False)["receita_total"]
-        .sum()
-        .sort_values("receita_total", ascending=True)
-    )
+    st.plotly_chart(fig2, use_container_width=True)
 
-    fig2 = px.bar(
-        df_rank,
-        x="receita_total",
-        y="natureza_juridica_codigo_descricao",
-        orientation="h",
-        labels={
-            "natureza_juridica_codigo_descricao": "Natureza Jurídica",
-            "receita_total": "Receita Total (R$)"
-        },
-        title=f"Naturezas Jurídicas Ordenadas por Receita Total ({ano_inicio}–{ano_fim})"
-    )
-    fig2.update_layout(
-        template="plotly_white",
-        title_font_size=18,
-        xaxis_title_font_size=14,
-        yaxis_title_font_size=14,
-        xaxis_tickfont_size=12,
-        yaxis_tickfont_size=12,
-        margin={"l": 300, "r": 20, "t": 40, "b": 20},
-        height=1200  # altura maior para que toda a lista apareça, e o usuário role a página
+# --------------------------------------------------
+# 7) Exportação dos resultados filtrados (CSV / Parquet / XLSX)
+# --------------------------------------------------
+
+TABELAS_EXPORTACAO = {
+    "Série de receita total": "serie",
+    "Ranking de Naturezas Jurídicas": "ranking",
+    "Dados filtrados (todos os tributos)": "dados",
+    "Quarentena da planilha (qualidade)": "quarentena",
+    "Meses faltando na planilha": "lacunas",
+}
+
+
+def montar_tabela_exportacao(tabela, ano_inicio, ano_fim, meses, natureza, nivel):
+    if tabela == "serie":
+        return backend.serie_natureza(ano_inicio, ano_fim, meses, natureza, nivel)
+    if tabela == "ranking":
+        return backend.ranking_natureza(ano_inicio, ano_fim, meses, natureza)
+    if tabela in ("quarentena", "lacunas"):
+        return getattr(backend.relatorio_qualidade("natureza"), tabela)
+    return backend.linhas_natureza(ano_inicio, ano_fim, meses, natureza)
+
+
+# cache_resource (e não cache_data) para que os bytes exportados sejam
+# compartilhados entre sessões sem serem copiados/serializados a cada acesso.
+@st.cache_resource(show_spinner=False, max_entries=16)
+def exportar_tabela(versao, tabela, formato, ano_inicio, ano_fim, meses, natureza, nivel):
+    df = montar_tabela_exportacao(tabela, ano_inicio, ano_fim, meses, natureza, nivel)
+    return exportacao.exportar(df, formato, nome_planilha=tabela)
+
+
+with st.expander("⬇️ Exportar resultados filtrados"):
+    tabela_exp = TABELAS_EXPORTACAO[st.selectbox("Tabela:", options=list(TABELAS_EXPORTACAO))]
+    formato_exp = st.radio(
+        "Formato:",
+        options=list(exportacao.FORMATOS),
+        format_func=lambda f: exportacao.FORMATOS[f]["rotulo"],
+        horizontal=True,
     )
-    fig2.update_traces(
-        marker=dict(color="#1f77b4"),
-        hovertemplate="<b>Natureza Jurídica:</b> %{y}<br><b>Receita:</b> R$ %{x:,.2f}<extra></extra>"
+
+    st.download_button(
+        "Baixar arquivo",
+        # Gerado só no clique, numa thread separada da execução da página
+        data=partial(
+            exportar_tabela, agregacoes.versao_dados(), tabela_exp, formato_exp,
+            ano_inicio, ano_fim, tuple(meses_selecionado), nj_sel,
+            nivel if tabela_exp == "serie" else "",
+        ),
+        file_name=exportacao.nome_arquivo(f"natureza_{tabela_exp}_{ano_inicio}_{ano_fim}", formato_exp),
+        mime=exportacao.FORMATOS[formato_exp]["mime"],
+        on_click="ignore",
     )
-    st.plotly_chart(fig2, use_container_width=True)
 
 # --------------------------------------------------
-# 7) Observações e próximos passos
+# 8) Observações e próximos passos
 # --------------------------------------------------
 
 st.markdown("---")
@@ -252,6 +202,7 @@ Nesta página (“Carga por Natureza Jurídica”), você pode:
 - Alternar entre visão **Mensal** e **Anual** na série temporal.  
 - Ver o **ranking completo** (barras horizontais) de todas as naturezas jurídicas, ordenado da menor para a maior receita total.  
   - Como definimos `height=1200` no gráfico, toda a lista fica visível e a página exibirá a barra de rolagem do próprio Streamlit quando necessário.
+- **Exportar** a série, o ranking ou os dados filtrados em CSV, Parquet ou Excel — e também a quarentena das verificações de qualidade da planilha.  
 
 Em futuras versões, poderemos:
 1. Incluir um **mapa** por natureza jurídica.  
@@ -0,0 +1,390 @@
+# previsao.py
+
+"""
+Sazonalidade e previsão de 12 meses de todas as séries UF × tributo de uma vez.
+
+As linhas de `arrecadacao_federal` viram uma matriz (série × mês), com uma
+série para cada UF e cada região (agregacoes.REGIOES) em cada tributo, e todas
+as contas abaixo rodam em NumPy sobre a matriz inteira, sem laço por série:
+
+1. decomposição sazonal: tendência pela média móvel centrada 2×12 e índice
+   sazonal de cada mês do ano pela mediana, entre os anos, da série sem a
+   tendência (a mediana, como os pesos robustos do STL, não se deixa levar por
+   meses atípicos, como estornos e parcelamentos). A série dessazonalizada é a
+   série menos o índice do seu mês;
+2. previsão por Holt-Winters aditivo com tendência amortecida: os parâmetros
+   de suavização saem de uma grade, avaliada para todas as séries ao mesmo
+   tempo, e cada série fica com a combinação de menor erro um passo à frente.
+
+O resultado fica num cache do processo, por versão dos dados e backend; quem
+o recebe não deve modificá-lo. Para ver o tempo de ajuste e o erro da
+previsão nos últimos 12 meses observados (ajustando sem eles):
+
+    python previsao.py
+"""
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+import agregacoes
+from backends import CacheResultados, chave_de_cache
+
+MESES_NO_ANO = 12
+HORIZONTE = 12
+
+# Grade dos parâmetros do Holt-Winters: nível (alfa), tendência (beta) e
+# sazonalidade (gama); PHI amortece a tendência ao projetar
+GRADE_ALFA = (0.1, 0.3, 0.5, 0.8)
+GRADE_BETA = (0.01, 0.05, 0.2)
+GRADE_GAMA = (0.05, 0.2, 0.4)
+PHI = 0.98
+
+_cache = CacheResultados(max_itens=4)
+
+# --------------------------------------------------
+# 1) Matriz (série × mês)
+# --------------------------------------------------
+
+def nomes_das_series():
+    """Séries da matriz, na ordem das linhas: as UFs de SIGLAS_UF e depois as regiões."""
+    return agregacoes.SIGLAS_UF + agregacoes.NOMES_REGIOES
+
+
+def montar_matriz(df_linhas, tributos):
+    """
+    Monta a matriz das linhas (formato de `Backend.linhas_arrecadacao`) por
+    série, tributo e mês. Devolve (periodos, matriz): `periodos` são os meses
+    (ano * 12 + mes - 1) do primeiro ao último da base, e `matriz` tem forma
+    (séries, tributos, meses), em reais. Cada série segue a linha que o seu
+    gráfico desenha: a UF fica com um valor por mês (de linhas repetidas para
+    a mesma (UF, mês), vale a primeira, o mesmo ponto do gráfico mensal; ver
+    qualidade.chaves_duplicadas), e a região soma todas as linhas das suas
+    UFs no mês, como agregacoes.serie_regiao. Mês sem nenhuma linha fica NaN.
+    """
+    siglas = df_linhas["sigla_uf"].to_numpy()
+    uf = pd.Index(agregacoes.SIGLAS_UF).get_indexer(siglas)
+    periodo = (
+        df_linhas["ano"].to_numpy().astype("int64") * 12
+        + df_linhas["mes"].to_numpy().astype("int64") - 1
+    )
+    conhecidas = uf >= 0
+    uf, periodo = uf[conhecidas], periodo[conhecidas]
+    valores = df_linhas[list(tributos)].to_numpy(dtype="float64")[conhecidas]
+
+    inicio = periodo.min()
+    periodos = np.arange(inicio, periodo.max() + 1)
+    n_ufs = len(agregacoes.SIGLAS_UF)
+
+    # A primeira linha de cada (UF, mês), para todos os tributos de uma vez;
+    # somar as repetidas dobraria os meses duplicados da base
+    _, primeiras = np.unique(uf * len(periodos) + (periodo - inicio), return_index=True)
+    somas = np.full((n_ufs, len(periodos), len(tributos)), np.nan)
+    somas[uf[primeiras], periodo[primeiras] - inicio] = valores[primeiras]
+
+    # As regiões somam todas as linhas, inclusive as repetidas, no mesmo
+    # código de grupo (período, região) de agregacoes.serie_regiao
+    n_regioes = len(agregacoes.NOMES_REGIOES)
+    grupos = (periodo - inicio) * n_regioes + agregacoes.REGIAO_DA_UF[uf]
+    regioes = np.full((len(periodos) * n_regioes, len(tributos)), np.nan)
+    presentes = np.unique(grupos)
+    regioes[presentes] = 0.0
+    np.add.at(regioes, grupos, valores)
+    regioes = regioes.reshape(len(periodos), n_regioes, len(tributos)).transpose(1, 0, 2)
+
+    matriz = np.concatenate([somas, regioes]).transpose(0, 2, 1)
+    return periodos, np.ascontiguousarray(matriz)
+
+# --------------------------------------------------
+# 2) Decomposição sazonal
+# --------------------------------------------------
+
+def _tendencia(y):
+    """
+    Média móvel centrada 2×12 ao longo do último eixo (meio peso nas pontas da
+    janela de 13 meses), por somas acumuladas. NaN nos 6 primeiros e 6 últimos
+    meses e nas janelas com mês faltando.
+    """
+    faltando = np.isnan(y)
+    acumulado = np.concatenate([np.zeros(y.shape[:-1] + (1,)), np.cumsum(np.where(faltando, 0.0, y), axis=-1)], axis=-1)
+    faltas = np.concatenate([np.zeros(y.shape[:-1] + (1,)), np.cumsum(faltando, axis=-1)], axis=-1)
+
+    soma_12 = acumulado[..., MESES_NO_ANO:] - acumulado[..., :-MESES_NO_ANO]
+    soma_12[(faltas[..., MESES_NO_ANO:] - faltas[..., :-MESES_NO_ANO]) > 0] = np.nan
+
+    tendencia = np.full(y.shape, np.nan)
+    meio = MESES_NO_ANO // 2
+    if y.shape[-1] > MESES_NO_ANO:
+        tendencia[..., meio:y.shape[-1] - meio] = (soma_12[..., :-1] + soma_12[..., 1:]) / (2 * MESES_NO_ANO)
+    return tendencia
+
+
+def _por_mes_do_ano(y, periodos):
+    """Reorganiza o último eixo em (anos, 12), alinhado ao calendário, com NaN onde não há mês."""
+    deslocamento = periodos[0] % MESES_NO_ANO
+    total = deslocamento + y.shape[-1]
+    n_anos = -(-total // MESES_NO_ANO)
+    grade = np.full(y.shape[:-1] + (n_anos * MESES_NO_ANO,), np.nan)
+    grade[..., deslocamento:total] = y
+    return grade.reshape(y.shape[:-1] + (n_anos, MESES_NO_ANO))
+
+
+def indices_sazonais(y, periodos):
+    """
+    Índice sazonal aditivo de cada mês do ano (forma (..., 12), janeiro
+    primeiro), com soma zero: mediana entre os anos da série menos a tendência.
+    Meses sem nenhum valor ficam com índice 0.
+    """
+    sem_tendencia = _por_mes_do_ano(y - _tendencia(y), periodos)
+    with np.errstate(all="ignore"):
+        indices = np.nan_to_num(np.nanmedian(sem_tendencia, axis=-2))
+    return indices - indices.mean(axis=-1, keepdims=True)
+
+# --------------------------------------------------
+# 3) Holt-Winters em lote
+# --------------------------------------------------
+
+def _grade():
+    """Combinações (alfa, beta, gama) da grade, como colunas de forma (combinações, 1)."""
+    combinacoes = np.array(list(itertools.product(GRADE_ALFA, GRADE_BETA, GRADE_GAMA)))
+    return [combinacoes[:, [i]] for i in range(3)]
+
+
+def holt_winters(y, periodos, sazonal, horizonte=HORIZONTE):
+    """
+    Holt-Winters aditivo amortecido de todas as séries de `y` (forma (séries,
+    meses)), para cada combinação da grade ao mesmo tempo: o laço é só no
+    tempo, e cada passo atualiza uma matriz (combinações × séries). A
+    sazonalidade começa em `sazonal` (índices de `indices_sazonais`) e o nível
+    e a tendência nos dois primeiros anos. Mês faltando (NaN) não atualiza o
+    estado. Devolve (previsão de forma (séries, horizonte), parâmetros
+    escolhidos de forma (séries, 3)).
+    """
+    alfa, beta, gama = _grade()
+    n_series, n_meses = y.shape
+    formato = (alfa.shape[0], n_series)
+
+    primeiro, segundo = np.nanmean(y[:, :MESES_NO_ANO], axis=1), np.nanmean(y[:, MESES_NO_ANO:2 * MESES_NO_ANO], axis=1)
+    nivel = np.broadcast_to(np.nan_to_num(primeiro), formato).copy()
+    tendencia = np.broadcast_to(np.nan_to_num((segundo - primeiro) / MESES_NO_ANO), formato).copy()
+    # Mês do ano no primeiro eixo: cada passo lê e grava um bloco contíguo
+    estacao = np.broadcast_to(sazonal.T[:, None, :], (MESES_NO_ANO,) + formato).copy()
+    erro_quadratico = np.zeros(formato)
+
+    for t in range(n_meses):
+        mes = (periodos[0] + t) % MESES_NO_ANO
+        s = estacao[mes]
+        previsto = nivel + PHI * tendencia + s
+        observado = np.where(np.isnan(y[:, t]), previsto, y[:, t])
+        if t >= MESES_NO_ANO:  # o primeiro ano só assenta o estado inicial
+            erro_quadratico += (observado - previsto) ** 2
+
+        novo_nivel = alfa * (observado - s) + (1 - alfa) * (nivel + PHI * tendencia)
+        tendencia = beta * (novo_nivel - nivel) + (1 - beta) * PHI * tendencia
+        estacao[mes] = gama * (observado - novo_nivel) + (1 - gama) * s
+        nivel = novo_nivel
+
+    melhor = np.argmin(erro_quadratico, axis=0)
+    colunas = np.arange(n_series)
+    nivel, tendencia, estacao = nivel[melhor, colunas], tendencia[melhor, colunas], estacao[:, melhor, colunas]
+
+    passos = np.arange(1, horizonte + 1)
+    amortecimento = np.cumsum(PHI ** passos)
+    meses = (periodos[-1] + passos) % MESES_NO_ANO
+    previsao = nivel[:, None] + amortecimento * tendencia[:, None] + estacao[meses].T
+
+    parametros = np.column_stack([alfa[melhor, 0], beta[melhor, 0], gama[melhor, 0]])
+    return previsao, parametros
+
+# --------------------------------------------------
+# 4) Resultado e cache
+# --------------------------------------------------
+
+def _datas(periodos):
+    return pd.Series((periodos - 1970 * 12).astype("datetime64[M]").astype("datetime64[us]"))
+
+
+class Previsoes:
+    """
+    Decomposição e previsão de todas as séries, com forma (séries, tributos,
+    ...): `observado` e `dessazonalizada` nos `periodos`, `sazonal` por mês do
+    ano e `previsao` nos HORIZONTE meses seguintes (`periodos_previsao`).
+    """
+
+    def __init__(self, nomes, tributos, periodos, observado, sazonal, previsao, parametros):
+        self.nomes = tuple(nomes)
+        self.tributos = tuple(tributos)
+        self.periodos = periodos
+        self.observado = observado
+        self.sazonal = sazonal
+        self.dessazonalizada = observado - sazonal[..., periodos % MESES_NO_ANO]
+        self.previsao = previsao
+        self.periodos_previsao = periodos[-1] + np.arange(1, previsao.shape[-1] + 1)
+        self.parametros = parametros
+        self._serie = {nome: i for i, nome in enumerate(self.nomes)}
+        self._tributo = {tributo: i for i, tributo in enumerate(self.tributos)}
+
+    def tem(self, nome, tributo):
+        return nome in self._serie and tributo in self._tributo
+
+    def _indice(self, nome, tributo):
+        return self._serie[nome], self._tributo[tributo]
+
+    def dessazonalizada_no_periodo(self, nome, tributo, ano_inicio, ano_fim):
+        """Série dessazonalizada entre ano_inicio e ano_fim: colunas (ano_mes, valor)."""
+        i, j = self._indice(nome, tributo)
+        no_periodo = (self.periodos >= ano_inicio * 12) & (self.periodos < (ano_fim + 1) * 12)
+        return pd.DataFrame({
+            "ano_mes": _datas(self.periodos[no_periodo]),
+            "valor": self.dessazonalizada[i, j, no_periodo],
+        })
+
+    def previsao_de(self, nome, tributo):
+        """
+        Previsão dos próximos HORIZONTE meses, precedida do último mês
+        observado (para a linha sair do fim da série): colunas (ano_mes, valor).
+        """
+        i, j = self._indice(nome, tributo)
+        return pd.DataFrame({
+            "ano_mes": _datas(np.concatenate([self.periodos[-1:], self.periodos_previsao])),
+            "valor": np.concatenate([self.observado[i, j, -1:], self.previsao[i, j]]),
+        })
+
+
+def ajustar(periodos, matriz, tributos, horizonte=HORIZONTE):
+    """Decompõe e prevê todas as séries de `matriz` (ver montar_matriz)."""
+    n_series, n_tributos, n_meses = matriz.shape
+    planas = matriz.reshape(n_series * n_tributos, n_meses)
+
+    sazonal = indices_sazonais(planas, periodos)
+    previsao, parametros = holt_winters(planas, periodos, sazonal, horizonte)
+
+    return Previsoes(
+        nomes_das_series(), tributos, periodos, matriz,
+        sazonal.reshape(n_series, n_tributos, MESES_NO_ANO),
+        previsao.reshape(n_series, n_tributos, horizonte),
+        parametros.reshape(n_series, n_tributos, 3),
+    )
+
+
+def _dados(backend):
+    tributos = backend.colunas_tributos() + ["receita_total"]
+    anos = backend.anos()
+    df_linhas = backend.linhas_arrecadacao("Todas", min(anos), max(anos))
+    return montar_matriz(df_linhas, tributos) + (tributos,)
+
+
+def previsoes(backend):
+    """Previsoes de todas as séries da base do backend (calculadas uma vez por versão dos dados)."""
+    chave = chave_de_cache(agregacoes.versao_dados(), id(backend))
+    return _cache.obter(chave, lambda: ajustar(*_dados(backend)))
+
+
+def estatisticas_cache():
+    return _cache.estatisticas()
+
+
+def _grade_desenhada(serie, coluna, nomes, periodos):
+    """Série de um gráfico (colunas ano_mes, `coluna`, valor_agrupado) como matriz (nomes × periodos)."""
+    return (
+        # ano_mes chega como texto do SQLite no backend pandas
+        serie.assign(ano_mes=pd.to_datetime(serie["ano_mes"]))
+        .drop_duplicates(["ano_mes", coluna])
+        .pivot(index=coluna, columns="ano_mes", values="valor_agrupado")
+        .reindex(index=nomes, columns=_datas(periodos))
+        .to_numpy(dtype="float64")
+    )
+
+
+def verificar_nivel(backend, resultado, rtol=1e-5):
+    """
+    Confere as séries com a linha mensal dos gráficos: as UFs com
+    `Backend.serie_tributo` e as regiões com `Backend.serie_regiao`.
+    `observado` deve ser o ponto desenhado em cada mês e, como os índices
+    sazonais somam zero no ano, a soma de cada ano completo da dessazonalizada
+    deve ser a mesma da série. Devolve a lista de (série, tributo, o que
+    divergiu).
+    """
+    ano_do_periodo = resultado.periodos // MESES_NO_ANO
+    primeiro, ultimo = int(ano_do_periodo[0]), int(ano_do_periodo[-1])
+    anos_completos = [ano for ano in np.unique(ano_do_periodo) if (ano_do_periodo == ano).sum() == MESES_NO_ANO]
+    divergentes = []
+    for j, tributo in enumerate(resultado.tributos):
+        desenhada = np.concatenate([
+            _grade_desenhada(
+                backend.serie_tributo("Todas", primeiro, ultimo, tributo, "Mensal", top=None),
+                "sigla_uf", agregacoes.SIGLAS_UF, resultado.periodos,
+            ),
+            _grade_desenhada(
+                backend.serie_regiao("Todas", primeiro, ultimo, tributo, "Mensal"),
+                "regiao", agregacoes.NOMES_REGIOES, resultado.periodos,
+            ),
+        ])
+        for i, nome in enumerate(resultado.nomes):
+            if not np.allclose(resultado.observado[i, j], desenhada[i], rtol=rtol, equal_nan=True):
+                divergentes.append((nome, tributo, "observado"))
+                continue
+            # Tolerância absoluta na escala da série: há anos com soma zero
+            escala = np.nanmax(np.abs(desenhada[i]), initial=0.0)
+            for ano in anos_completos:
+                no_ano = ano_do_periodo == ano
+                if not np.isclose(resultado.dessazonalizada[i, j, no_ano].sum(), desenhada[i, no_ano].sum(),
+                                  rtol=rtol, atol=rtol * escala):
+                    divergentes.append((nome, tributo, f"dessazonalizada em {ano}"))
+                    break
+    return divergentes
+
+# --------------------------------------------------
+# 5) Linha de comando: tempo de ajuste e erro nos últimos 12 meses
+# --------------------------------------------------
+
+def _erro_percentual(previsto, real):
+    """Erro absoluto médio da previsão, em % do total real do período, por série."""
+    with np.errstate(all="ignore"):
+        return np.abs(previsto - real).sum(axis=-1) / np.abs(real).sum(axis=-1) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de ajuste e erro da previsão de todas as séries UF × tributo.")
+    parser.add_argument("--tributo", default="receita_total", help="tributo do resumo por série (padrão: receita_total)")
+    args = parser.parse_args()
+
+    from backends import backend_padrao
+
+    backend = backend_padrao()
+    periodos, matriz, tributos = _dados(backend)
+    inicio = time.perf_counter()
+    resultado = ajustar(periodos, matriz, tributos)
+    segundos = time.perf_counter() - inicio
+    n_series, n_tributos, n_meses = matriz.shape
+    print(f"{n_series * n_tributos} séries × {n_meses} meses ajustadas em {segundos * 1000:.0f} ms")
+
+    divergentes = verificar_nivel(backend, resultado)
+    print(f"Nível conferido com a série mensal dos gráficos: {len(divergentes)} séries divergentes")
+    for nome, tributo, onde in divergentes[:10]:
+        print(f"    divergente: {nome} {tributo} ({onde})")
+
+    # Ajusta sem os últimos 12 meses e compara com o que de fato foi arrecadado
+    teste = ajustar(periodos[:-HORIZONTE], matriz[..., :-HORIZONTE], tributos)
+    real = matriz[..., -HORIZONTE:]
+    ingenua = matriz[..., -2 * HORIZONTE:-HORIZONTE]  # mesmo mês do ano anterior
+    erro_hw = _erro_percentual(teste.previsao, real)
+    erro_ingenuo = _erro_percentual(ingenua, real)
+
+    j = resultado._tributo[args.tributo]
+    print(f"\nErro nos últimos {HORIZONTE} meses ({args.tributo}), em % do total arrecadado:")
+    print(f"{'Série':<16}{'Holt-Winters':>14}{'ano anterior':>14}   alfa  beta  gama")
+    for i, nome in enumerate(resultado.nomes):
+        alfa, beta, gama = resultado.parametros[i, j]
+        print(f"{nome:<16}{erro_hw[i, j]:13.1f}%{erro_ingenuo[i, j]:13.1f}%   {alfa:4.2f}  {beta:4.2f}  {gama:4.2f}")
+
+    validas = np.isfinite(erro_hw) & np.isfinite(erro_ingenuo)
+    print(f"\nMediana em todas as séries: Holt-Winters {np.median(erro_hw[validas]):.1f}%, "
+          f"ano anterior {np.median(erro_ingenuo[validas]):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# qualidade.py
+
+"""
+Verificações de qualidade das bases, feitas na própria carga (ver
+`agregacoes.load_arrecadacao` e `agregacoes.load_natureza`).
+
+Todas as verificações são vetorizadas sobre a tabela inteira, sem laço por
+linha nem group-by, e custam poucos milissegundos perto da leitura do arquivo:
+
+- conversão: valores não vazios que não viram número (ex.: células que o
+  Excel transformou em data) e que, como sempre, entram como 0;
+- vazio: células NULL ou em branco, que também entram como 0 (comuns na
+  planilha de Natureza Jurídica, onde o tributo não incide; por isso só um
+  aviso);
+- chave duplicada: mais de uma linha para a mesma série (UF ou natureza
+  jurídica) no mesmo mês, achadas ordenando uma chave inteira única
+  (série × período) e comparando vizinhos;
+- lacuna: meses sem nenhuma linha de uma série entre o primeiro e o último
+  mês da base, pelas diferenças entre períodos (ano * 12 + mes - 1)
+  consecutivos da chave ordenada;
+- negativo: valores abaixo de zero (em geral restituições e estornos, por
+  isso só um aviso).
+
+No backend DuckDB as mesmas verificações rodam em SQL sobre a fonte (ver
+`backends.BackendDuckDB.relatorio_qualidade`), sem carregar a base no
+pandas; só as que precisam do valor original (VERIFICACOES_DA_FONTE) são
+feitas pelo loader ao gravar a cópia Parquet, e gravadas ao lado dela.
+
+Nada é removido da base: os números das páginas não mudam. As linhas com
+problema vão para a tabela de quarentena do relatório, para revisão, e as
+páginas mostram um selo com o resumo. Para gravar a quarentena e as lacunas
+das duas bases em `base_de_dados/cache/quarentena/`:
+
+    python qualidade.py
+    python qualidade.py --formato xlsx
+"""
+
+import argparse
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+# Verificações, na ordem do resumo: nome -> (descrição, é só um aviso)
+VERIFICACOES = {
+    "conversao": ("valores não numéricos (lidos como 0)", False),
+    "vazio": ("células vazias (lidas como 0)", True),
+    "duplicada": ("linhas com chave duplicada", False),
+    "lacuna": ("meses faltando", False),
+    "negativo": ("valores negativos", True),
+}
+
+# Verificações que dependem do valor original da célula, perdido nas cópias
+# Parquet (que já saem convertidas)
+VERIFICACOES_DA_FONTE = ("conversao", "vazio")
+
+COLUNAS_QUARENTENA = ["linha", "verificacao", "coluna", "valor_original"]
+
+# --------------------------------------------------
+# 1) Conversão numérica
+# --------------------------------------------------
+
+def converter_numericos(df, colunas):
+    """
+    Converte `colunas` de `df` (no lugar) para número, com vazios e valores
+    não numéricos virando 0. Devolve a tabela de quarentena das células
+    vazias (NULL ou só espaços) e das falhas de conversão (linha, coluna e
+    valor original como texto). Colunas que já chegam numéricas (ex.: REAL do
+    SQLite) só podem ter vazios.
+    """
+    falhas, vazias = [], []
+    for col in colunas:
+        bruto = df[col]
+        vazio = bruto.isna().to_numpy().copy()
+        if pd.api.types.is_numeric_dtype(bruto.dtype):
+            convertido = bruto
+        else:
+            vazio |= (bruto.astype(str).str.strip() == "").to_numpy()
+            convertido = pd.to_numeric(bruto, errors="coerce")
+            falhou = np.flatnonzero(convertido.isna().to_numpy() & ~vazio)
+            if len(falhou):
+                falhas.append(pd.DataFrame({
+                    "linha": falhou,
+                    "coluna": col,
+                    "valor_original": bruto.iloc[falhou].astype(str).to_numpy(),
+                }))
+        linhas_vazias = np.flatnonzero(vazio)
+        if len(linhas_vazias):
+            vazias.append(pd.DataFrame({"linha": linhas_vazias, "coluna": col, "valor_original": ""}))
+        df[col] = convertido.fillna(0)
+    return pd.concat([_quarentena(falhas, "conversao"), _quarentena(vazias, "vazio")], ignore_index=True)
+
+
+def _quarentena(partes, verificacao):
+    if not partes:
+        return pd.DataFrame({c: pd.Series(dtype="int64" if c == "linha" else "str") for c in COLUNAS_QUARENTENA})
+    tabela = pd.concat(partes, ignore_index=True)
+    tabela["verificacao"] = verificacao
+    return tabela[COLUNAS_QUARENTENA]
+
+# --------------------------------------------------
+# 2) Chaves e períodos
+# --------------------------------------------------
+
+def _chave_ordenada(serie, periodo):
+    """
+    Chave inteira única de cada linha (série × período, com o período
+    deslocado para começar em 0) e a ordem que a ordena (argsort estável).
+    """
+    inicio, fim = periodo.min(), periodo.max()
+    chave = serie * (fim - inicio + 1) + (periodo - inicio)
+    return chave, np.argsort(chave, kind="stable"), inicio, fim
+
+
+def chaves_duplicadas(serie, periodo):
+    """Máscara das linhas cuja (série, período) aparece mais de uma vez, pela chave ordenada."""
+    chave, ordem, _, _ = _chave_ordenada(serie, periodo)
+    ordenada = chave[ordem]
+    repetida = ordenada[1:] == ordenada[:-1]
+    duplicada = np.zeros(len(chave), dtype=bool)
+    duplicada[ordem[1:][repetida]] = True
+    duplicada[ordem[:-1][repetida]] = True
+    return duplicada
+
+
+def lacunas(serie, periodo):
+    """
+    Intervalos de meses sem nenhuma linha, por série, entre o primeiro e o
+    último período da base inteira: arrays (série, primeiro período faltando,
+    último período faltando). Cada série ganha um período sentinela antes do
+    início e outro depois do fim, de modo que as faltas nas pontas saem da
+    mesma diferença entre vizinhos que as do meio.
+    """
+    chave, ordem, inicio, fim = _chave_ordenada(serie, periodo)
+    n_periodos = fim - inicio + 1
+    unicas = np.unique(chave[ordem])  # já ordenada: só tira as repetidas
+    series = np.unique(unicas // n_periodos)
+
+    # Sentinelas em períodos -1 e n_periodos de cada série, numa escala com
+    # folga de dois períodos para não colidirem com a série vizinha
+    largura = n_periodos + 2
+    pontos = np.concatenate([
+        (unicas // n_periodos) * largura + (unicas % n_periodos) + 1,
+        series * largura,
+        series * largura + n_periodos + 1,
+    ])
+    pontos.sort()
+    salto = np.flatnonzero(np.diff(pontos) > 1)
+    de, ate = pontos[salto] + 1, pontos[salto + 1] - 1
+    return de // largura, (de % largura) - 1 + inicio, (ate % largura) - 1 + inicio
+
+# --------------------------------------------------
+# 3) Relatório
+# --------------------------------------------------
+
+class RelatorioQualidade:
+    """
+    Resultado das verificações de uma base. Na carga só se guardam as
+    posições encontradas (arrays NumPy) e as `contagens` por verificação (ver
+    VERIFICACOES); as tabelas são montadas no primeiro acesso:
+    - `quarentena`: uma linha por problema (linha da base, verificação,
+      coluna, valor original e as colunas de chave);
+    - `lacunas`: série, primeiro e último mês faltando e quantidade de meses.
+    """
+
+    def __init__(self, base, linhas, coluna_serie, chaves, conversao, duplicadas, negativos, lacunas):
+        self.base = base
+        self.linhas = linhas
+        self.coluna_serie = coluna_serie
+        self._chaves = chaves          # {coluna de chave: array por linha da base}
+        self._conversao = conversao    # quarentena de converter_numericos (conversão e vazios)
+        self._duplicadas = duplicadas  # linhas
+        self._negativos = negativos    # (linhas, colunas, valores)
+        self._lacunas = lacunas        # (séries, primeiro período, último período)
+        self.contagens = {
+            "conversao": int((conversao["verificacao"] == "conversao").sum()),
+            "vazio": int((conversao["verificacao"] == "vazio").sum()),
+            "duplicada": len(duplicadas),
+            "lacuna": int((lacunas[2] - lacunas[1] + 1).sum()),
+            "negativo": len(negativos[0]),
+        }
+
+    @classmethod
+    def de_tabelas(cls, base, linhas, coluna_serie, quarentena, lacunas):
+        """
+        Relatório a partir das tabelas `quarentena` e `lacunas` já montadas,
+        no formato das propriedades de mesmo nome (ex.: por SQL, no backend
+        DuckDB).
+        """
+        relatorio = cls.__new__(cls)
+        relatorio.base = base
+        relatorio.linhas = linhas
+        relatorio.coluna_serie = coluna_serie
+        relatorio.__dict__.update(quarentena=quarentena, lacunas=lacunas)
+        contagens = quarentena["verificacao"].value_counts()
+        relatorio.contagens = {nome: int(contagens.get(nome, 0)) for nome in VERIFICACOES}
+        relatorio.contagens["lacuna"] = int(lacunas["meses"].sum())
+        return relatorio
+
+    def quarentena_da_fonte(self):
+        """Linhas da quarentena das VERIFICACOES_DA_FONTE, só com COLUNAS_QUARENTENA."""
+        tabela = self.quarentena
+        return tabela.loc[tabela["verificacao"].isin(VERIFICACOES_DA_FONTE), COLUNAS_QUARENTENA].reset_index(drop=True)
+
+    @property
+    def problemas(self):
+        """Total de ocorrências que não são só avisos."""
+        return sum(n for nome, n in self.contagens.items() if not VERIFICACOES[nome][1])
+
+    def itens(self):
+        """(descrição, quantidade, é só um aviso) de cada verificação com ocorrências."""
+        return [
+            (descricao, self.contagens[nome], aviso)
+            for nome, (descricao, aviso) in VERIFICACOES.items()
+            if self.contagens.get(nome)
+        ]
+
+    def resumo(self):
+        itens = self.itens()
+        if not itens:
+            return f"{self.linhas:,} linhas sem problemas".replace(",", ".")
+        return " · ".join(f"{n:,} {descricao}".replace(",", ".") for descricao, n, _ in itens)
+
+    def selo(self):
+        """(texto, ícone, cor) do selo de resumo das páginas (st.badge)."""
+        if self.problemas:
+            return f"{self.problemas:,} problemas na base".replace(",", "."), ":material/warning:", "orange"
+        return "Base verificada", ":material/verified:", "green"
+
+    @functools.cached_property
+    def quarentena(self):
+        linhas_neg, colunas_neg, valores_neg = self._negativos
+        tabela = pd.concat([
+            self._conversao,
+            _quarentena([pd.DataFrame({"linha": self._duplicadas, "coluna": "", "valor_original": ""})], "duplicada"),
+            _quarentena([pd.DataFrame({
+                "linha": linhas_neg, "coluna": colunas_neg, "valor_original": valores_neg.astype(str),
+            })], "negativo"),
+        ], ignore_index=True)
+        linhas = tabela["linha"].to_numpy()
+        return tabela.assign(**{coluna: valores[linhas] for coluna, valores in self._chaves.items()})
+
+    @functools.cached_property
+    def lacunas(self):
+        return tabela_lacunas(self.coluna_serie, *self._lacunas)
+
+
+def tabela_lacunas(coluna_serie, series, de, ate):
+    """Tabela de lacunas do relatório a partir de (séries, primeiro período, último período)."""
+    return pd.DataFrame({
+        coluna_serie: series,
+        "primeiro_mes": _meses(de),
+        "ultimo_mes": _meses(ate),
+        "meses": ate - de + 1,
+    })
+
+
+def verificar(base, df, colunas_valores, coluna_serie, conversao):
+    """
+    Roda as verificações de chave, lacunas e negativos em `df` (já com os
+    valores convertidos por `converter_numericos`, cuja quarentena é
+    `conversao`). A série de cada linha é `coluna_serie` e o período sai de
+    ano e mes. Devolve o RelatorioQualidade.
+    """
+    codigos, nomes = pd.factorize(df[coluna_serie])
+    ano = df["ano"].to_numpy().astype("int64")
+    mes = df["mes"].to_numpy().astype("int64")
+    periodo = ano * 12 + mes - 1
+
+    duplicadas = np.flatnonzero(chaves_duplicadas(codigos, periodo))
+    serie_lacuna, de, ate = lacunas(codigos, periodo)
+
+    valores = df[colunas_valores].to_numpy()
+    linhas_neg, colunas_neg = np.nonzero(valores < 0)
+
+    return RelatorioQualidade(
+        base, len(df), coluna_serie,
+        {"ano": ano, "mes": mes, coluna_serie: df[coluna_serie].to_numpy()},
+        conversao,
+        duplicadas,
+        (linhas_neg, np.asarray(colunas_valores, dtype=object)[colunas_neg], valores[linhas_neg, colunas_neg]),
+        (np.asarray(nomes, dtype=object)[serie_lacuna], de, ate),
+    )
+
+
+def _meses(periodo):
+    return [f"{p // 12}-{p % 12 + 1:02d}" for p in periodo]
+
+# --------------------------------------------------
+# 4) Linha de comando: grava a quarentena das duas bases
+# --------------------------------------------------
+
+def main():
+    import agregacoes
+    import exportacao
+
+    parser = argparse.ArgumentParser(description="Verifica as bases e grava a quarentena e as lacunas.")
+    parser.add_argument("--formato", choices=list(exportacao.FORMATOS), default="csv")
+    parser.add_argument("--pasta", default=os.path.join(agregacoes.PASTA_PROJETO, "base_de_dados", "cache", "quarentena"))
+    args = parser.parse_args()
+
+    relatorios = [
+        agregacoes.load_arrecadacao(com_relatorio=True)[2],
+        agregacoes.load_natureza(com_relatorio=True)[1],
+    ]
+    os.makedirs(args.pasta, exist_ok=True)
+    for relatorio in relatorios:
+        print(f"{relatorio.base}: {relatorio.linhas} linhas")
+        for descricao, n, aviso in relatorio.itens():
+            print(f"  {n:>8}  {descricao}" + ("  (aviso)" if aviso else ""))
+        for nome, tabela in (("quarentena", relatorio.quarentena), ("lacunas", relatorio.lacunas)):
+            caminho = os.path.join(args.pasta, exportacao.nome_arquivo(f"{nome}_{relatorio.base}", args.formato))
+            with open(caminho, "wb") as f:
+                f.write(exportacao.exportar(tabela, args.formato, nome_planilha=nome))
+            print(f"  -> {os.path.relpath(caminho, agregacoes.PASTA_PROJETO)} ({len(tabela)} linhas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+# simulador_carga.py
+
+"""
+Simulador de carga: várias sessões simultâneas do dashboard, sem navegador.
+
+Cada sessão abre uma página com o AppTest do Streamlit (a mesma execução de
+script de uma aba de navegador, sem o front-end) e faz uma sequência aleatória
+de mudanças nos filtros da barra lateral (incluindo as caixas de seleção, como
+a da previsão) e de seleções de UFs no mapa (injetadas no session_state, como
+o front-end faria), medindo o tempo de cada reexecução.
+As sessões rodam em threads no mesmo processo, como num servidor Streamlit, e
+por isso compartilham o backend, os caches e o aquecimento.
+
+Ao final, o relatório mostra:
+- latência p50/p95/p99 da primeira execução e das reexecuções, por página;
+- crescimento do RSS do processo por sessão (as sessões continuam abertas até
+  a medição final, como abas que o usuário não fechou);
+- taxa de acerto dos caches de agregações (backend) e de figuras.
+
+Para rodar sessões simultâneas, o script troca partes internas do Streamlit
+(ver `preparar_apptest_concorrente`) e por isso fica preso à versão com que
+foi escrito (STREAMLIT_TESTADO); em outra versão, avisa antes de começar.
+
+Uso:
+    python simulador_carga.py --sessoes 40 --concorrencia 8 --passos 6
+    python simulador_carga.py --aquecer-antes --saida resultado.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+# Versão (maior.menor) do Streamlit cujas partes internas o script troca
+STREAMLIT_TESTADO = "1.66"
+
+# Chave do mapa com seleção na página principal (1_Tributos_Federais.CHAVE_SELECAO_MAPA)
+CHAVE_SELECAO_MAPA = "mapa_selecao"
+
+PAGINAS = {
+    "tributos": os.path.join(PASTA_PROJETO, "1_Tributos_Federais.py"),
+    "natureza": os.path.join(PASTA_PROJETO, "pages", "2_Carga_por_CNAE.py"),
+}
+
+# --------------------------------------------------
+# 1) Medidas do processo
+# --------------------------------------------------
+
+def rss_mb():
+    """RSS atual do processo em MB (Linux); fora do Linux, o pico (ru_maxrss)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def estatisticas_caches():
+    from backends import backend_padrao
+    import figuras
+
+    return {
+        "agregacoes": backend_padrao().cache.estatisticas(),
+        "figuras": figuras.estatisticas_cache(),
+    }
+
+# --------------------------------------------------
+# 2) AppTest em várias threads
+# --------------------------------------------------
+
+def preparar_apptest_concorrente():
+    """
+    O AppTest foi feito para rodar uma sessão por vez: a cada execução ele
+    troca o singleton global `Runtime._instance` (e o zera no fim) e compila o
+    script num ScriptCache novo; além disso, liga a opção `global.appTest`
+    trocando `config.get_option` só durante a execução. Com sessões
+    simultâneas, uma execução que termina derruba o runtime e a opção de outra
+    que ainda está rodando, e compilações paralelas esbarram num bug do
+    CPython 3.11 (`SystemError: AST constructor recursion depth mismatch`).
+    Aqui:
+    - `Runtime.instance()` passa a devolver o último runtime criado quando o
+      singleton foi zerado por outra sessão;
+    - `global.appTest` fica ligada no processo inteiro;
+    - todas as sessões compartilham um único ScriptCache (com lock), como as
+      sessões de um servidor Streamlit de verdade.
+
+    São atributos privados (`Runtime._instance`, `app_test.ScriptCache`,
+    `config.get_option`...), válidos no Streamlit STREAMLIT_TESTADO; outra
+    versão pode mudá-los sem aviso.
+    """
+    import streamlit
+
+    if not streamlit.__version__.startswith(STREAMLIT_TESTADO + "."):
+        print(f"Aviso: simulador escrito para o Streamlit {STREAMLIT_TESTADO}, "
+              f"mas o instalado é o {streamlit.__version__}.", file=sys.stderr)
+
+    import contextlib
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    ultimo = {"runtime": None}
+    instancia_original = Runtime.instance.__func__
+
+    def instance(cls):
+        if cls._instance is not None:
+            ultimo["runtime"] = cls._instance
+            return cls._instance
+        if ultimo["runtime"] is not None:
+            return ultimo["runtime"]
+        return instancia_original(cls)
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or ultimo["runtime"] is not None)
+
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+    app_test.patch_config_options = lambda _opcoes: contextlib.nullcontext()
+
+    cache_compartilhado = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache_compartilhado
+
+# --------------------------------------------------
+# 3) Uma sessão
+# --------------------------------------------------
+
+def _valores(opcoes):
+    """Opções de um select_slider de anos vêm como texto; converte de volta para int."""
+    try:
+        return [int(o) for o in opcoes]
+    except ValueError:
+        return list(opcoes)
+
+
+def selecionar_no_mapa(at, rng):
+    """
+    Seleção aleatória no mapa (de 1 a 4 UFs, ou nenhuma para limpar), no
+    formato que o front-end grava no session_state: `location` com a sigla e,
+    como no mapa por região, `customdata` com a região.
+    """
+    import agregacoes
+
+    regiao_da_uf = {sigla: regiao for regiao, siglas in agregacoes.REGIOES.items() for sigla in siglas}
+    siglas = rng.sample(agregacoes.SIGLAS_UF, rng.randint(0, 4))
+    at.session_state[CHAVE_SELECAO_MAPA] = {"selection": {
+        "points": [{"location": s, "customdata": [regiao_da_uf[s]]} for s in siglas],
+        "point_indices": [], "box": [], "lasso": [],
+    }}
+    return f"seleção no mapa {','.join(siglas) or '(limpa)'}"
+
+
+def mudar_um_filtro(at, rng):
+    """
+    Escolhe um widget da barra lateral (ou, na página com o mapa, a seleção
+    de UFs nele) e dá a ele um valor aleatório. Devolve None se a última
+    execução não desenhou a barra lateral (ex.: erro na página).
+    """
+    widgets = [
+        w for w in at.sidebar
+        if type(w).__name__ in ("Selectbox", "Radio", "SelectSlider", "Multiselect", "Checkbox")
+        and not getattr(w, "disabled", False)
+    ]
+    if not widgets:
+        return None
+    if CHAVE_SELECAO_MAPA in at.session_state and rng.random() < 1 / (len(widgets) + 1):
+        return selecionar_no_mapa(at, rng)
+    w = rng.choice(widgets)
+    tipo = type(w).__name__
+    if tipo == "Checkbox":
+        w.set_value(not w.value)
+    elif tipo == "SelectSlider":
+        opcoes = _valores(w.options)
+        inicio, fim = sorted(rng.sample(range(len(opcoes)), 2))
+        w.set_range(opcoes[inicio], opcoes[fim])
+    elif tipo == "Multiselect":
+        escolhidos = set(rng.sample(list(w.options), rng.randint(1, len(w.options))))
+        w.set_value([o for o in w.options if o in escolhidos])
+    else:
+        w.set_value(rng.choice(list(w.options)))
+    return f"{w.label} {tipo}"
+
+
+def sessao(numero, pagina, passos, semente, pausa, timeout):
+    """
+    Abre `pagina` e faz `passos` mudanças de filtro. Devolve o AppTest (para
+    manter a sessão viva) e a lista de medições (página, tipo, segundos, erro).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(semente + numero)
+    at = AppTest.from_file(PAGINAS[pagina], default_timeout=timeout)
+    medicoes = []
+
+    for passo in range(passos + 1):
+        if passo:
+            if mudar_um_filtro(at, rng) is None:
+                medicoes.append((pagina, "rerun", 0.0, "barra lateral vazia"))
+                break
+            if pausa:
+                time.sleep(rng.uniform(0, pausa))
+        inicio = time.perf_counter()
+        at.run()
+        segundos = time.perf_counter() - inicio
+        erro = at.exception[0].value if at.exception else None
+        medicoes.append((pagina, "primeira" if passo == 0 else "rerun", segundos, erro))
+    return at, medicoes
+
+# --------------------------------------------------
+# 4) Relatório
+# --------------------------------------------------
+
+def percentis(valores):
+    if not valores:
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {"n": len(valores), "p50": p50, "p95": p95, "p99": p99, "max": max(valores)}
+
+
+def _taxa(depois, antes):
+    acertos = depois["acertos"] - antes["acertos"]
+    faltas = depois["faltas"] - antes["faltas"]
+    total = acertos + faltas
+    return {"acertos": acertos, "faltas": faltas, "taxa": acertos / total if total else None}
+
+
+def montar_resultado(medicoes, rss, caches_antes, caches_depois, n_sessoes, segundos):
+    latencias = {}
+    for pagina in PAGINAS:
+        for tipo in ("primeira", "rerun"):
+            valores = [s for p, t, s, _ in medicoes if p == pagina and t == tipo]
+            if valores:
+                latencias[f"{pagina}/{tipo}"] = percentis(valores)
+    return {
+        "sessoes": n_sessoes,
+        "execucoes": len(medicoes),
+        "erros": [e for *_, e in medicoes if e],
+        "duracao_s": segundos,
+        "execucoes_por_s": len(medicoes) / segundos if segundos else None,
+        "latencia_s": latencias,
+        "rss_mb": dict(rss, por_sessao=(rss["final"] - rss["referencia"]) / max(1, n_sessoes)),
+        "caches": {nome: _taxa(caches_depois[nome], caches_antes[nome]) for nome in caches_depois},
+    }
+
+
+def imprimir_resultado(r):
+    print(f"\n{r['sessoes']} sessões, {r['execucoes']} execuções em {r['duracao_s']:.1f} s "
+          f"({r['execucoes_por_s']:.1f} execuções/s), {len(r['erros'])} com erro")
+
+    print("\nLatência (s)             n      p50      p95      p99      max")
+    for nome, p in r["latencia_s"].items():
+        print(f"  {nome:<20}{p['n']:5d}{p['p50']:9.3f}{p['p95']:9.3f}{p['p99']:9.3f}{p['max']:9.3f}")
+
+    rss = r["rss_mb"]
+    print(f"\nRSS (MB): início {rss['inicio']:.1f}, após sessão de referência {rss['referencia']:.1f}, "
+          f"final {rss['final']:.1f}  ->  {rss['por_sessao']:.2f} MB por sessão")
+
+    print("\nCaches (no período medido)")
+    for nome, c in r["caches"].items():
+        taxa = "-" if c["taxa"] is None else f"{c['taxa']:.1%}"
+        print(f"  {nome:<12} acertos {c['acertos']:6d}   faltas {c['faltas']:6d}   taxa {taxa}")
+
+    for erro in r["erros"][:5]:
+        print("  erro:", erro)
+
+# --------------------------------------------------
+# 5) Linha de comando
+# --------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de carga da Dashboard Tributária.")
+    parser.add_argument("--sessoes", type=int, default=20, help="total de sessões simuladas")
+    parser.add_argument("--concorrencia", type=int, default=8, help="sessões executando ao mesmo tempo")
+    parser.add_argument("--passos", type=int, default=5, help="mudanças de filtro por sessão")
+    parser.add_argument("--paginas", nargs="+", choices=list(PAGINAS), default=list(PAGINAS))
+    parser.add_argument("--pausa", type=float, default=0.0,
+                        help="pausa máxima (s) entre mudanças de filtro, sorteada por passo")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300.0, help="limite por execução de página (s)")
+    parser.add_argument("--aquecer-antes", action="store_true",
+                        help="roda o aquecimento completo antes de medir (servidor já aquecido)")
+    parser.add_argument("--sem-aquecimento", action="store_true",
+                        help="desliga o aquecimento em segundo plano disparado pelas páginas")
+    parser.add_argument("--saida", help="grava o resultado em JSON neste arquivo")
+    args = parser.parse_args()
+
+    # Antes de qualquer import do projeto: configuracao.py lê o ambiente ao ser importado
+    if args.sem_aquecimento:
+        os.environ["DASHBOARD_AQUECER"] = "0"
+    os.chdir(PASTA_PROJETO)
+    sys.path.insert(0, PASTA_PROJETO)
+
+    import streamlit  # noqa: F401  (configura os loggers, que silenciamos em seguida)
+    for nome in list(logging.root.manager.loggerDict):
+        if nome.startswith("streamlit"):
+            logging.getLogger(nome).setLevel(logging.ERROR)
+    preparar_apptest_concorrente()
+
+    rss = {"inicio": rss_mb()}
+    if args.aquecer_antes:
+        import aquecimento
+        print(aquecimento.formatar_relatorio(aquecimento.aquecer()))
+
+    # Uma sessão de referência por página, fora da medição: importa os módulos
+    # e carrega o que é do processo, para que o RSS por sessão meça só as sessões
+    referencia = [sessao(-1, p, 0, args.semente, 0, args.timeout)[0] for p in args.paginas]
+    gc.collect()
+    rss["referencia"] = rss_mb()
+    caches_antes = estatisticas_caches()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        futuros = [
+            executor.submit(
+                sessao, i, args.paginas[i % len(args.paginas)], args.passos,
+                args.semente, args.pausa, args.timeout,
+            )
+            for i in range(args.sessoes)
+        ]
+        resultados = [f.result() for f in futuros]
+    duracao = time.perf_counter() - inicio
+
+    gc.collect()
+    rss["final"] = rss_mb()
+    caches_depois = estatisticas_caches()
+
+    medicoes = [m for _, lista in resultados for m in lista]
+    resultado = montar_resultado(medicoes, rss, caches_antes, caches_depois, args.sessoes, duracao)
+    imprimir_resultado(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(dict(resultado, parametros=vars(args)), f, ensure_ascii=False, indent=2)
+
+    del referencia
+    sys.exit(1 if resultado["erros"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+# site_estatico.py
+
+"""
+Versão estática das duas páginas, pré-calculada para uma grade de filtros.
+
+A maior parte dos acessos só olha as visões padrão, e cada sessão Streamlit
+custa um processo Python vivo. Este script monta de antemão as figuras e
+tabelas das páginas para os filtros mais comuns e as grava como arquivos
+estáticos, que qualquer servidor HTTP (ou CDN) entrega sem Python:
+
+- Tributos Federais: todas as UFs, cada região e "Todas", no intervalo de anos
+  padrão, para a Receita Total e os tributos de maior arrecadação (o mesmo
+  tributo na série e no mapa), com a série mensal e a anual, o mapa com a sua
+  tabela e o crescimento percentual;
+- Natureza Jurídica: "Todas" e cada natureza jurídica, nos anos e meses
+  padrão, com a série mensal e a anual e o ranking.
+
+Cada combinação vira um pacote JSON comprimido com gzip (figuras serializadas
+como o st.plotly_chart as envia, e tabelas como nas páginas). O `indice.json`
+lista os pacotes e os filtros de cada um, e o `index.html` é um visualizador
+mínimo que lê o índice e desenha os pacotes com o plotly.js copiado para a
+pasta; o GeoJSON das UFs vai uma vez só, referenciado pelos mapas (como com
+DASHBOARD_GEOJSON_URL). Os pacotes são montados em paralelo, num pool de
+processos, cada um com o seu backend.
+
+Uso:
+    python site_estatico.py
+    python site_estatico.py --tributos 8 --processos 4 --pasta /tmp/site
+    python -m http.server -d base_de_dados/cache/site   # para ver o resultado
+"""
+
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import agregacoes
+import configuracao
+
+PASTA_SITE = os.path.join(agregacoes.PASTA_PROJETO, "base_de_dados", "cache", "site")
+ARQUIVO_GEOJSON = os.path.basename(agregacoes.CAMINHO_GEOJSON)
+ARQUIVO_PLOTLYJS = "plotly.min.js"
+
+# --------------------------------------------------
+# 1) Grade de filtros
+# --------------------------------------------------
+
+def tributos_principais(backend, ano_inicio, ano_fim, quantos):
+    """Receita Total e os `quantos` tributos de maior arrecadação no intervalo: [(coluna, nome limpo)]."""
+    colunas = backend.colunas_tributos()
+    totais = backend.linhas_arrecadacao("Todas", ano_inicio, ano_fim)[colunas].sum()
+    principais = totais.sort_values(ascending=False).index[:quantos]
+    return [("receita_total", "Receita Total")] + [(c, agregacoes.limpar_nome(c)) for c in principais]
+
+
+def filtros_de_uf():
+    return ["Todas", *agregacoes.NOMES_REGIOES, *agregacoes.SIGLAS_UF]
+
+# --------------------------------------------------
+# 2) Pacotes (rodam nos processos do pool)
+# --------------------------------------------------
+
+def _iniciar_processo():
+    # Os mapas apontam para o GeoJSON gravado ao lado do index.html, em vez de
+    # levá-lo embutido em cada pacote
+    configuracao.GEOJSON_URL = ARQUIVO_GEOJSON
+    # Tema do Streamlit, para que as figuras fiquem como nas páginas (ver figuras.main)
+    import streamlit.elements.plotly_chart  # noqa: F401
+
+
+def _figura(fig):
+    import plotly.io as pio
+
+    return None if fig is None else json.loads(pio.to_json(fig, validate=False))
+
+
+def _tabela(df):
+    return None if df is None else df.to_dict(orient="split", index=False)
+
+
+def _gravar_pacote(pasta, relativo, conteudo):
+    """Grava o pacote comprimido (sem data no cabeçalho gzip, para que dados iguais gerem bytes iguais)."""
+    dados = json.dumps(conteudo, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    comprimido = gzip.compress(dados, compresslevel=9, mtime=0)
+    caminho = os.path.join(pasta, relativo)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "wb") as f:
+        f.write(comprimido)
+    return len(dados), len(comprimido)
+
+
+def pacotes_tributos(pasta, uf, ano_inicio, ano_fim, tributos):
+    """Pacotes da página Tributos Federais de uma UF (ou região), um por tributo. Devolve as entradas do índice."""
+    import figuras
+    from backends import backend_padrao
+
+    backend = backend_padrao()
+    filtros = (uf, ano_inicio, ano_fim)
+    entradas = []
+    for tributo, tributo_limpo in tributos:
+        df_mapa, fig_mapa = figuras.figura_mapa(backend, *filtros, tributo, tributo_limpo)
+        crescimento = backend.crescimento_percentual(*filtros, tributo)
+        conteudo = {
+            "filtros": {"uf": uf, "ano_inicio": ano_inicio, "ano_fim": ano_fim, "tributo": tributo_limpo},
+            "figuras": {
+                "serie_mensal": _figura(figuras.figura_serie(backend, *filtros, tributo, tributo_limpo, "Mensal")),
+                "serie_anual": _figura(figuras.figura_serie(backend, *filtros, tributo, tributo_limpo, "Anual")),
+                "mapa": _figura(fig_mapa),
+            },
+            "tabelas": {
+                "mapa": _tabela(df_mapa),
+                "crescimento": None if crescimento is None else {
+                    "columns": ["UF", "Crescimento (%)"],
+                    "data": [[sigla, f"{valor:.2f}%"] for sigla, valor in crescimento.items()],
+                },
+            },
+        }
+        relativo = f"tributos/{uf}/{tributo}.json.gz"
+        bytes_json, bytes_gzip = _gravar_pacote(pasta, relativo, conteudo)
+        entradas.append({
+            "pagina": "tributos", "filtros": conteudo["filtros"], "arquivo": relativo,
+            "bytes_json": bytes_json, "bytes_gzip": bytes_gzip,
+        })
+    return entradas
+
+
+def pacotes_natureza(pasta, naturezas, ano_inicio, ano_fim, meses):
+    """Pacotes da página Natureza Jurídica, um por natureza de `naturezas` [(número, nome)]."""
+    import figuras
+    from backends import backend_padrao
+
+    backend = backend_padrao()
+    entradas = []
+    for numero, natureza in naturezas:
+        filtros = (ano_inicio, ano_fim, meses, natureza)
+        conteudo = {
+            "filtros": {"natureza": natureza, "ano_inicio": ano_inicio, "ano_fim": ano_fim, "meses": meses},
+            "figuras": {
+                "serie_mensal": _figura(figuras.figura_serie_natureza(backend, *filtros, "Mensal")),
+                "serie_anual": _figura(figuras.figura_serie_natureza(backend, *filtros, "Anual")),
+                "ranking": _figura(figuras.figura_ranking_natureza(backend, *filtros)),
+            },
+            "tabelas": {},
+        }
+        # Os nomes das naturezas têm barras e acentos: o arquivo leva só o número
+        relativo = f"natureza/{numero:03d}.json.gz"
+        bytes_json, bytes_gzip = _gravar_pacote(pasta, relativo, conteudo)
+        entradas.append({
+            "pagina": "natureza", "filtros": conteudo["filtros"], "arquivo": relativo,
+            "bytes_json": bytes_json, "bytes_gzip": bytes_gzip,
+        })
+    return entradas
+
+# --------------------------------------------------
+# 3) Visualizador
+# --------------------------------------------------
+
+# Lê o índice, monta os seletores e desenha o pacote escolhido. Os pacotes
+# são descomprimidos no navegador (DecompressionStream), a menos que o
+# servidor já os entregue descomprimidos (Content-Encoding: gzip).
+VISUALIZADOR = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Dashboard Tributária (versão estática)</title>
+<script src="plotly.min.js"></script>
+<style>
+  body { font-family: sans-serif; margin: 1rem 2rem; }
+  select { margin: 0 1rem 1rem 0.3rem; }
+  table { border-collapse: collapse; margin: 0.5rem 0 1.5rem; }
+  td, th { border: 1px solid #ddd; padding: 0.2rem 0.6rem; }
+</style>
+</head>
+<body>
+<h1>📊 Dashboard Tributária</h1>
+<p id="versao"></p>
+<div id="seletores"></div>
+<div id="conteudo"></div>
+<script>
+const ROTULOS = {uf: "UF", tributo: "Tributo", natureza: "Natureza jurídica", pagina: "Página"};
+let indice;
+
+async function lerPacote(arquivo) {
+  const bytes = new Uint8Array(await (await fetch(arquivo)).arrayBuffer());
+  if (bytes[0] !== 0x1f || bytes[1] !== 0x8b) return JSON.parse(new TextDecoder().decode(bytes));
+  const fluxo = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  return await new Response(fluxo).json();
+}
+
+function seletor(nome, opcoes) {
+  const rotulo = document.createElement("label");
+  rotulo.textContent = ROTULOS[nome];
+  const select = document.createElement("select");
+  select.id = nome;
+  for (const opcao of opcoes) select.add(new Option(opcao, opcao));
+  select.onchange = desenhar;
+  rotulo.append(select);
+  return rotulo;
+}
+
+function tabela(titulo, dados) {
+  const bloco = document.createElement("div");
+  if (!dados) return bloco;
+  bloco.innerHTML = `<h3>${titulo}</h3>`;
+  const t = document.createElement("table");
+  t.insertRow().append(...dados.columns.map(c => Object.assign(document.createElement("th"), {textContent: c})));
+  for (const linha of dados.data) {
+    const tr = t.insertRow();
+    for (const valor of linha) tr.insertCell().textContent = valor;
+  }
+  bloco.append(t);
+  return bloco;
+}
+
+async function desenhar() {
+  const pagina = document.getElementById("pagina").value;
+  const campos = pagina === "tributos" ? ["uf", "tributo"] : ["natureza"];
+  const seletores = document.getElementById("seletores");
+  for (const nome of ["uf", "tributo", "natureza"]) {
+    const atual = document.getElementById(nome);
+    if (atual && !campos.includes(nome)) atual.parentElement.remove();
+    if (!atual && campos.includes(nome)) {
+      const opcoes = [...new Set(indice.pacotes.filter(p => p.pagina === pagina).map(p => p.filtros[nome]))];
+      seletores.append(seletor(nome, opcoes));
+    }
+  }
+  const pacote = indice.pacotes.find(p => p.pagina === pagina &&
+    campos.every(c => p.filtros[c] === document.getElementById(c).value));
+  const conteudo = document.getElementById("conteudo");
+  conteudo.replaceChildren();
+  const dados = await lerPacote(pacote.arquivo);
+  const filtros = dados.filtros;
+  const anos = `${filtros.ano_inicio}–${filtros.ano_fim}`;
+  const figuras = Object.entries(dados.figuras).filter(([, fig]) => fig);
+  for (const [nome, fig] of figuras) {
+    const div = document.createElement("div");
+    conteudo.append(div);
+    Plotly.newPlot(div, fig.data, fig.layout, {responsive: true});
+    if (nome === "mapa") conteudo.append(tabela(`Média mensal por UF (${anos})`, dados.tabelas.mapa));
+  }
+  if (pagina === "tributos") conteudo.append(tabela(`Crescimento percentual (${anos})`, dados.tabelas.crescimento));
+}
+
+fetch("indice.json").then(r => r.json()).then(dados => {
+  indice = dados;
+  document.getElementById("versao").textContent =
+    `Dados: versão ${indice.versao_dados}, gerado em ${indice.gerado_em}.`;
+  const paginas = document.getElementById("seletores");
+  paginas.append(seletor("pagina", [...new Set(indice.pacotes.map(p => p.pagina))]));
+  desenhar();
+});
+</script>
+</body>
+</html>
+"""
+
+# --------------------------------------------------
+# 4) Montagem do site
+# --------------------------------------------------
+
+def gravar_arquivos_fixos(pasta):
+    """GeoJSON compacto das UFs, plotly.js e o visualizador."""
+    import plotly.offline
+
+    agregacoes.publicar_geojson(pasta)
+    with open(os.path.join(pasta, ARQUIVO_PLOTLYJS), "w", encoding="utf-8") as f:
+        f.write(plotly.offline.get_plotlyjs())
+    with open(os.path.join(pasta, "index.html"), "w", encoding="utf-8") as f:
+        f.write(VISUALIZADOR)
+
+
+def tarefas(backend, pasta, quantos_tributos, naturezas_por_tarefa=8):
+    """(função, args) de cada tarefa do pool: uma por UF ou região, e uma por lote de naturezas."""
+    from aquecimento import PADRAO_ARRECADACAO, PADRAO_NATUREZA
+
+    _, ano_inicio, ano_fim = PADRAO_ARRECADACAO
+    tributos = tributos_principais(backend, ano_inicio, ano_fim, quantos_tributos)
+    lista = [(pacotes_tributos, (pasta, uf, ano_inicio, ano_fim, tributos)) for uf in filtros_de_uf()]
+
+    meses = [m for m in backend.meses_natureza() if 1 <= m <= 12]
+    naturezas = list(enumerate(["Todas", *backend.naturezas()]))
+    for i in range(0, len(naturezas), naturezas_por_tarefa):
+        lista.append((pacotes_natureza, (pasta, naturezas[i:i + naturezas_por_tarefa], *PADRAO_NATUREZA, meses)))
+    return lista
+
+
+def _conferir_destino(pasta):
+    """
+    Só substitui uma pasta vazia ou um site gerado antes (com indice.json):
+    um `--pasta` errado (ex.: `.` ou `~`) não pode apagar outra coisa.
+    """
+    if os.path.exists(pasta) and not os.path.isdir(pasta):
+        raise SystemExit(f"{pasta} existe e não é uma pasta.")
+    if os.path.isdir(pasta) and os.listdir(pasta) and not os.path.isfile(os.path.join(pasta, "indice.json")):
+        raise SystemExit(
+            f"{pasta} não está vazia e não tem indice.json de um site gerado antes; "
+            "escolha outra pasta com --pasta."
+        )
+
+
+def construir(pasta=PASTA_SITE, quantos_tributos=5, processos=None):
+    """
+    Monta o site numa pasta temporária ao lado de `pasta` e, só no fim, a
+    troca pela anterior (ver _conferir_destino). Uma falha no meio deixa o
+    site anterior intacto. Devolve o índice.
+    """
+    pasta = os.path.abspath(pasta)
+    _conferir_destino(pasta)
+    os.makedirs(os.path.dirname(pasta), exist_ok=True)
+    temporaria = tempfile.mkdtemp(prefix=f".{os.path.basename(pasta)}.", dir=os.path.dirname(pasta))
+    os.chmod(temporaria, 0o755)  # mkdtemp cria só para o dono; o servidor HTTP precisa ler
+    try:
+        indice = _construir_em(temporaria, quantos_tributos, processos)
+        _trocar_pasta(temporaria, pasta)
+    except BaseException:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        raise
+    return indice
+
+
+def _trocar_pasta(nova, pasta):
+    # os.replace não sobrescreve uma pasta com conteúdo: a anterior sai do
+    # caminho primeiro, e só é apagada depois que a nova está no lugar
+    antiga = None
+    if os.path.isdir(pasta):
+        antiga = tempfile.mkdtemp(prefix=f".{os.path.basename(pasta)}.antiga.", dir=os.path.dirname(pasta))
+        os.replace(pasta, os.path.join(antiga, "site"))
+    os.replace(nova, pasta)
+    if antiga:
+        shutil.rmtree(antiga)
+
+
+def _construir_em(pasta, quantos_tributos, processos):
+    from backends import backend_padrao
+
+    backend = backend_padrao()
+    lista = tarefas(backend, pasta, quantos_tributos)
+    gravar_arquivos_fixos(pasta)
+
+    # spawn (e não fork): o processo principal já tem o backend carregado, e
+    # o DuckDB não se dá bem com fork depois de abrir as suas threads
+    contexto = multiprocessing.get_context("spawn")
+    pacotes = []
+    executor = ProcessPoolExecutor(processos, mp_context=contexto, initializer=_iniciar_processo)
+    try:
+        futuros = [executor.submit(funcao, *args) for funcao, args in lista]
+        for feitos, futuro in enumerate(as_completed(futuros), start=1):
+            pacotes.extend(futuro.result())
+            print(f"\r  {feitos}/{len(futuros)} tarefas", end="", flush=True)
+    finally:
+        # numa falha (ou Ctrl+C) as tarefas da fila são canceladas e só as que
+        # já rodam terminam: ninguém escreve na pasta depois de ela ser apagada
+        executor.shutdown(wait=True, cancel_futures=True)
+    print()
+
+    pacotes.sort(key=lambda p: p["arquivo"])
+    indice = {
+        "versao_dados": agregacoes.versao_dados(),
+        "gerado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "backend": backend.nome,
+        "pacotes": pacotes,
+    }
+    with open(os.path.join(pasta, "indice.json"), "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False, separators=(",", ":"))
+    return indice
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera a versão estática das páginas para uma grade de filtros.")
+    parser.add_argument("--pasta", default=PASTA_SITE, help="pasta de saída (substituída se vazia ou de um site gerado antes)")
+    parser.add_argument("--tributos", type=int, default=5,
+                        help="quantos tributos de maior arrecadação, além da Receita Total")
+    parser.add_argument("--processos", type=int, default=None, help="processos do pool (padrão: um por núcleo)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    indice = construir(args.pasta, args.tributos, args.processos)
+    segundos = time.perf_counter() - inicio
+
+    pacotes = indice["pacotes"]
+    bytes_json = sum(p["bytes_json"] for p in pacotes)
+    bytes_gzip = sum(p["bytes_gzip"] for p in pacotes)
+    for pagina in ("tributos", "natureza"):
+        print(f"  {pagina:<10}{sum(p['pagina'] == pagina for p in pacotes):>6} pacotes")
+    print(f"  {len(pacotes)} pacotes em {segundos:.1f} s: {bytes_json / 2**20:.1f} MB de JSON, "
+          f"{bytes_gzip / 2**20:.1f} MB comprimidos")
+    print(f"  -> {os.path.join(args.pasta, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# tempo_inicializacao.py
+
+"""
+Relatório de tempo de importação (partida a frio) de cada página.
+
+Para cada página, roda num interpretador novo, com `python -X importtime`:
+1. os imports de nível de módulo da página (pagos antes de qualquer coisa
+   aparecer na tela);
+2. os imports feitos sob demanda dentro das seções (ex.: `plotly.express`),
+   pagos só quando a seção é de fato desenhada. Além dos da própria página,
+   entram os feitos dentro das funções dos módulos do projeto que a página
+   usa (figuras.py, previsao.py etc., seguidos recursivamente), que é onde
+   ficam os imports pesados; os das funções `main` (linha de comando) não.
+
+O tempo de cada fase é somado por pacote (tempo próprio de cada módulo), de
+modo que dá para ver quem pesa: streamlit, pandas, plotly etc. Com `--render`,
+mede também a primeira execução completa da página (AppTest), como no primeiro
+acesso depois de um deploy.
+
+Uso:
+    python tempo_inicializacao.py
+    python tempo_inicializacao.py --top 5 --render
+"""
+
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+MARCADOR = "-- fase --"
+
+# --------------------------------------------------
+# 1) Imports de cada página
+# --------------------------------------------------
+
+def paginas():
+    return sorted(glob.glob(os.path.join(PASTA_PROJETO, "[0-9]_*.py"))) + sorted(
+        glob.glob(os.path.join(PASTA_PROJETO, "pages", "*.py"))
+    )
+
+
+_TIPOS_IMPORT = (ast.Import, ast.ImportFrom)
+
+
+def _modulo_do_projeto(nome):
+    """Caminho do módulo `nome` se ele for um arquivo .py da raiz do projeto; senão None."""
+    caminho = os.path.join(PASTA_PROJETO, nome.split(".")[0] + ".py")
+    return caminho if os.path.isfile(caminho) else None
+
+
+def _modulos_importados(no):
+    if isinstance(no, ast.Import):
+        return [a.name for a in no.names]
+    return [no.module] if no.module and not no.level else []
+
+
+def _eh_linha_de_comando(no):
+    """`def main` ou `if __name__ == "__main__"`: código que as páginas não executam."""
+    if isinstance(no, ast.FunctionDef):
+        return no.name == "main"
+    return isinstance(no, ast.If) and "__main__" in ast.unparse(no.test)
+
+
+def _imports(arvore):
+    """(imports de nível de módulo, imports dentro de funções e blocos), sem os da linha de comando."""
+    no_inicio = [n for n in arvore.body if isinstance(n, _TIPOS_IMPORT)]
+    sob_demanda = []
+    pendentes = [n for n in arvore.body if not isinstance(n, _TIPOS_IMPORT)]
+    while pendentes:
+        no = pendentes.pop()
+        if _eh_linha_de_comando(no):
+            continue
+        if isinstance(no, _TIPOS_IMPORT):
+            sob_demanda.append(no)
+        else:
+            pendentes.extend(ast.iter_child_nodes(no))
+    return no_inicio, sob_demanda
+
+
+def imports_da_pagina(caminho):
+    """
+    Devolve (imports de nível de módulo, imports sob demanda), como
+    código-fonte. Os sob demanda incluem os dos módulos do projeto alcançados
+    a partir da página, por qualquer import (de nível de módulo ou não).
+    """
+    def analisar(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            return _imports(ast.parse(f.read(), filename=caminho))
+
+    no_inicio, sob_demanda = analisar(caminho)
+    visitados = set()
+    pendentes = [*no_inicio, *sob_demanda]
+    while pendentes:
+        for nome in _modulos_importados(pendentes.pop()):
+            modulo = _modulo_do_projeto(nome)
+            if modulo is None or modulo in visitados or modulo == caminho:
+                continue
+            visitados.add(modulo)
+            do_modulo, do_modulo_sob_demanda = analisar(modulo)
+            sob_demanda.extend(do_modulo_sob_demanda)
+            pendentes.extend([*do_modulo, *do_modulo_sob_demanda])
+
+    def fonte(nos):
+        return list(dict.fromkeys(ast.unparse(n) for n in nos))
+
+    return fonte(no_inicio), fonte(sob_demanda)
+
+# --------------------------------------------------
+# 2) Medição com -X importtime
+# --------------------------------------------------
+
+def medir(no_inicio, sob_demanda):
+    """
+    Roda os imports num interpretador novo e devolve, para cada fase
+    ("no_inicio", "sob_demanda"), um dict pacote -> microssegundos.
+    """
+    marcador = f"import sys; sys.stderr.write({MARCADOR!r} + '\\n')"
+    # Dependências opcionais (ex.: openpyxl, só na exportação) podem faltar
+    opcionais = [f"try:\n    {fonte}\nexcept ImportError:\n    pass" for fonte in sob_demanda]
+    codigo = "\n".join([marcador, *no_inicio, marcador, *opcionais])
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=PASTA_PROJETO, capture_output=True, text=True, check=True,
+    ).stderr
+
+    fases = [defaultdict(int), defaultdict(int), defaultdict(int)]  # interpretador, início, demanda
+    fase = 0
+    for linha in saida.splitlines():
+        if linha == MARCADOR:
+            fase += 1
+            continue
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, _, nome = linha[len("import time:"):].split("|")
+        fases[fase][nome.strip().split(".")[0]] += int(proprio)
+    return {"no_inicio": fases[1], "sob_demanda": fases[2]}
+
+
+def medir_render(caminho):
+    """Segundos da primeira execução completa da página, num interpretador novo."""
+    codigo = (
+        "import time\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        "inicio = time.perf_counter()\n"
+        f"AppTest.from_file({caminho!r}, default_timeout=300).run()\n"
+        "print(time.perf_counter() - inicio)\n"
+    )
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=PASTA_PROJETO, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(saida.strip().splitlines()[-1])
+
+# --------------------------------------------------
+# 3) Relatório
+# --------------------------------------------------
+
+def _imprimir_fase(titulo, tempos, top):
+    total = sum(tempos.values())
+    print(f"  {titulo}: {total / 1000:8.1f} ms")
+    for pacote, us in sorted(tempos.items(), key=lambda t: -t[1])[:top]:
+        print(f"      {pacote:<24}{us / 1000:8.1f} ms  ({us / total:5.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação por página.")
+    parser.add_argument("--top", type=int, default=8, help="pacotes listados por fase")
+    parser.add_argument("--repeticoes", type=int, default=3,
+                        help="medições por página (vale a mais rápida, já com .pyc em disco)")
+    parser.add_argument("--render", action="store_true", help="mede também a primeira execução da página")
+    args = parser.parse_args()
+
+    for caminho in paginas():
+        no_inicio, sob_demanda = imports_da_pagina(caminho)
+        medicoes = [medir(no_inicio, sob_demanda) for _ in range(max(1, args.repeticoes))]
+        melhor = min(medicoes, key=lambda m: sum(m["no_inicio"].values()))
+
+        print(f"== {os.path.relpath(caminho, PASTA_PROJETO)}")
+        _imprimir_fase("imports no início da página", melhor["no_inicio"], args.top)
+        if sob_demanda:
+            _imprimir_fase("imports sob demanda (seções e módulos do projeto)", melhor["sob_demanda"], args.top)
+        if args.render:
+            print(f"  primeira execução completa: {medir_render(caminho):8.2f} s")
+        print()
+
+
+if __name__ == "__main__":
+    main()
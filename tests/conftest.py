@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+# Os módulos do dashboard ficam na raiz do projeto, sem pacote instalável
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,53 @@
+# tests/test_agregacoes.py
+
+"""
+Formato compacto de agregacoes.py contra a tabela completa, e somas do modo
+exato (centavos inteiros) contra as somas em float arredondadas a centavos.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agregacoes
+import backends
+
+pytestmark = pytest.mark.skipif(not os.path.isfile(agregacoes.DB_PATH), reason="base de dados ausente")
+
+
+def test_compacto_guarda_os_centavos():
+    df, colunas = agregacoes.load_arrecadacao()
+    compacto = agregacoes.compactar_arrecadacao(df, colunas)
+    assert compacto.memory_usage(deep=True).sum() < 0.6 * df.memory_usage(deep=True).sum()
+
+    linhas = agregacoes.linhas_para_exibicao(compacto, colunas + ["receita_total"])
+    for coluna in colunas + ["receita_total"]:
+        np.testing.assert_array_equal(linhas[coluna].to_numpy(), np.round(df[coluna].to_numpy() * 100) / 100)
+
+
+def _centavos(valores):
+    return np.round(np.asarray(valores, dtype="float64") * 100).astype("int64")
+
+
+@pytest.mark.parametrize("consulta", [
+    lambda b: b.serie_tributo("Todas", 2000, 2024, "receita_total", "Mensal", top=None),
+    lambda b: b.serie_tributo("Nordeste", 2010, 2020, "irpf", "Anual", top=None),
+    lambda b: b.serie_regiao("Todas", 2000, 2024, "receita_total", "Mensal"),
+    lambda b: b.serie_natureza(2016, 2024, list(range(1, 13)), "Todas", "Mensal"),
+    lambda b: b.ranking_natureza(2016, 2024, list(range(1, 13)), "Todas"),
+], ids=["serie_uf", "serie_uf_anual", "serie_regiao", "serie_natureza", "ranking_natureza"])
+def test_exato_igual_ao_float_arredondado(consulta):
+    if not os.path.isfile(agregacoes.EXCEL_CNAE):
+        pytest.skip("planilha de natureza jurídica ausente")
+    float_ = consulta(backends.BackendPandas())
+    exato = consulta(backends.BackendPandas(exato=True))
+    valores = [c for c in float_.columns if c in ("valor_agrupado", "receita_total")]
+    assert len(float_) == len(exato) > 0
+    # Centavos exatos, e nunca mais que meio centavo longe da soma em float
+    chaves = [c for c in float_.columns if c not in valores]
+    float_, exato = (df.sort_values(chaves).reset_index(drop=True) for df in (float_, exato))
+    pd.testing.assert_frame_equal(float_[chaves], exato[chaves])
+    for coluna in valores:
+        np.testing.assert_array_equal(_centavos(exato[coluna]), _centavos(float_[coluna]))
@@ -0,0 +1,76 @@
+# tests/test_api.py
+
+"""
+Respostas HTTP da API: ETag e Last-Modified com 304 nas requisições
+condicionais, e 400 com a mensagem de ErroParametro.
+"""
+
+import json
+import os
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+import agregacoes
+
+pytestmark = pytest.mark.skipif(
+    not (os.path.isfile(agregacoes.DB_PATH) and os.path.isfile(agregacoes.EXCEL_CNAE)),
+    reason="bases de dados ausentes",
+)
+
+
+@pytest.fixture(scope="module")
+def endereco():
+    import api
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), api.Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _get(url, **cabecalhos):
+    try:
+        with urlopen(Request(url, headers=cabecalhos), timeout=120) as resposta:
+            return resposta.status, resposta.headers, resposta.read()
+    except HTTPError as erro:
+        return erro.code, erro.headers, erro.read()
+
+
+def test_requisicao_condicional_devolve_304(endereco):
+    url = f"{endereco}/serie?uf=SP&ano_inicio=2020&ano_fim=2024&nivel=Anual"
+    status, cabecalhos, corpo = _get(url)
+    assert status == 200
+    assert json.loads(corpo)["colunas"]
+    etag, modificado = cabecalhos["ETag"], cabecalhos["Last-Modified"]
+    assert etag.startswith(f'"{agregacoes.versao_dados()}-')
+
+    status, cabecalhos, corpo = _get(url, **{"If-None-Match": etag})
+    assert (status, corpo) == (304, b"")
+    assert cabecalhos["ETag"] == etag
+
+    status, _, corpo = _get(url, **{"If-Modified-Since": modificado})
+    assert (status, corpo) == (304, b"")
+
+    # Outra consulta (ou outro formato) tem outra ETag: a antiga não vale para ela
+    status, cabecalhos, _ = _get(url + "&formato=csv", **{"If-None-Match": etag})
+    assert status == 200
+    assert cabecalhos["ETag"] != etag
+
+
+@pytest.mark.parametrize("consulta, trecho", [
+    ("/serie?ano_inicio=2024&ano_fim=2020", "'ano_inicio' (2024)"),
+    ("/serie?uf=XX", "UF desconhecida"),
+    ("/serie?top=0", "'top'"),
+    ("/natureza/ranking?meses=1,a", "'meses'"),
+    ("/serie?formato=pdf", "'formato'"),
+])
+def test_parametro_invalido_devolve_400(endereco, consulta, trecho):
+    status, cabecalhos, corpo = _get(endereco + consulta)
+    assert status == 400
+    assert cabecalhos["Content-Type"].startswith("application/json")
+    assert trecho in json.loads(corpo)["erro"]
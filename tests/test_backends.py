@@ -0,0 +1,45 @@
+# tests/test_backends.py
+
+"""
+Equivalência entre os backends pandas e DuckDB (a mesma grade de filtros de
+`python backends.py --verificar`), nos modos float e exato, e relatórios de
+qualidade iguais.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+import agregacoes  # noqa: E402
+import backends  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    not (os.path.isfile(agregacoes.DB_PATH) and os.path.isfile(agregacoes.EXCEL_CNAE)),
+    reason="bases de dados ausentes",
+)
+
+
+@pytest.mark.parametrize("exato", [False, True], ids=["float", "exato"])
+def test_backends_equivalentes(exato):
+    divergentes, total = backends.verificar_equivalencia(
+        backends.BackendPandas(exato=exato), backends.BackendDuckDB(exato=exato),
+    )
+    assert total > 0
+    assert divergentes == []
+
+
+@pytest.mark.parametrize("base", ["arrecadacao", "natureza"])
+def test_relatorio_qualidade_igual(base):
+    # O DuckDB roda as verificações em SQL; o resultado deve ser o do loader do pandas
+    pandas_ = backends.BackendPandas().relatorio_qualidade(base)
+    duckdb_ = backends.BackendDuckDB().relatorio_qualidade(base)
+    assert (duckdb_.linhas, duckdb_.contagens) == (pandas_.linhas, pandas_.contagens)
+    for tabela in ("quarentena", "lacunas"):
+        a, b = (getattr(r, tabela).astype(str) for r in (pandas_, duckdb_))
+        colunas = list(a.columns)
+        pd.testing.assert_frame_equal(
+            a.sort_values(colunas).reset_index(drop=True), b.sort_values(colunas).reset_index(drop=True),
+        )
@@ -0,0 +1,58 @@
+# tests/test_exportacao.py
+
+"""
+Exportação: CSV gerado em blocos (e igual ao CSV inteiro), e Parquet/XLSX
+que, relidos, devolvem a mesma tabela.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import exportacao
+
+
+@pytest.fixture
+def tabela():
+    n = 45
+    return pd.DataFrame({
+        "sigla_uf": np.resize(["SP", "RJ", "MG"], n),
+        "ano": np.arange(n, dtype="int64") // 12 + 2020,
+        "valor": np.round(np.linspace(-10.5, 1e9, n), 2),
+    })
+
+
+def test_csv_em_blocos(tabela):
+    blocos = list(exportacao.gerar_csv(tabela, linhas_por_bloco=10))
+    assert len(blocos) == 5
+    # Só o primeiro bloco leva o cabeçalho
+    assert blocos[0].startswith(b"sigla_uf,ano,valor\n")
+    assert not any(b.startswith(b"sigla_uf") for b in blocos[1:])
+    assert b"".join(blocos) == tabela.to_csv(index=False).encode("utf-8")
+    assert exportacao.exportar(tabela, "csv") == b"".join(blocos)
+
+    relida = pd.read_csv(io.BytesIO(b"".join(blocos)), dtype={"sigla_uf": str})
+    pd.testing.assert_frame_equal(relida, tabela, check_dtype=False)
+
+
+def test_csv_de_tabela_vazia(tabela):
+    assert list(exportacao.gerar_csv(tabela.iloc[:0])) == [b"sigla_uf,ano,valor\n"]
+
+
+def test_parquet_ida_e_volta(tabela):
+    pytest.importorskip("pyarrow")
+    relida = pd.read_parquet(io.BytesIO(exportacao.exportar(tabela, "parquet")))
+    pd.testing.assert_frame_equal(relida, tabela, check_dtype=False)
+
+
+def test_xlsx_ida_e_volta(tabela):
+    pytest.importorskip("openpyxl")
+    tabela = tabela.assign(valor=tabela["valor"].where(tabela.index != 3, np.nan))
+    conteudo = exportacao.exportar(tabela, "xlsx", nome_planilha="um nome de planilha longo demais")
+    relida = pd.read_excel(io.BytesIO(conteudo), sheet_name=None)
+    # O nome da planilha é cortado no limite do Excel (31 caracteres)
+    assert list(relida) == ["um nome de planilha longo demai"]
+    # NaN vira célula vazia, que volta como NaN
+    pd.testing.assert_frame_equal(relida["um nome de planilha longo demai"], tabela, check_dtype=False)
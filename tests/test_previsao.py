@@ -0,0 +1,57 @@
+# tests/test_previsao.py
+
+"""
+Séries de previsao.py contra a série mensal dos gráficos: um valor por UF e
+mês (linhas repetidas da base não se somam), regiões somadas como em
+agregacoes.serie_regiao e dessazonalizada no mesmo nível.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agregacoes
+import backends
+import previsao
+
+pytestmark = pytest.mark.skipif(not os.path.isfile(agregacoes.DB_PATH), reason="base de dados ausente")
+
+
+def test_linhas_repetidas_nao_somam():
+    df = pd.DataFrame({
+        "sigla_uf": ["SP", "SP", "SP", "RJ"],
+        "ano": [2022, 2022, 2022, 2022],
+        "mes": [1, 1, 2, 1],
+        "irpf": [10.0, 10.0, 7.0, 3.0],
+    })
+    periodos, matriz = previsao.montar_matriz(df, ["irpf"])
+    sp, rj = agregacoes.SIGLAS_UF.index("SP"), agregacoes.SIGLAS_UF.index("RJ")
+    np.testing.assert_array_equal(periodos, [2022 * 12, 2022 * 12 + 1])
+    np.testing.assert_array_equal(matriz[sp, 0], [10.0, 7.0])
+    np.testing.assert_array_equal(matriz[rj, 0], [3.0, np.nan])  # RJ sem linha em fevereiro
+
+
+def test_regiao_soma_como_serie_regiao():
+    df = pd.DataFrame({
+        "sigla_uf": ["SP", "SP", "SP", "RJ", "AM"],
+        "ano": [2022, 2022, 2022, 2022, 2022],
+        "mes": [1, 1, 2, 1, 2],
+        "irpf": [10.0, 10.0, 7.0, 3.0, 1.0],
+    })
+    _, matriz = previsao.montar_matriz(df, ["irpf"])
+    esperada = (
+        agregacoes.serie_regiao(df, "irpf", "Mensal")
+        .pivot(index="regiao", columns="ano_mes", values="valor_agrupado")
+        .reindex(agregacoes.NOMES_REGIOES)
+        .to_numpy()
+    )
+    regioes = matriz[len(agregacoes.SIGLAS_UF):, 0]
+    np.testing.assert_array_equal(regioes, esperada)
+    np.testing.assert_array_equal(regioes[agregacoes.NOMES_REGIOES.index("Sudeste")], [23.0, 7.0])
+
+
+def test_nivel_igual_ao_do_grafico():
+    backend = backends.BackendPandas()
+    assert previsao.verificar_nivel(backend, previsao.previsoes(backend)) == []
@@ -0,0 +1,42 @@
+# tests/test_qualidade.py
+
+"""Conversão numérica de qualidade.py: vazios e falhas viram 0, mas entram na quarentena."""
+
+import numpy as np
+import pandas as pd
+
+import qualidade
+
+
+def test_vazios_e_falhas_na_quarentena():
+    df = pd.DataFrame({
+        "irpf": ["10", None, " ", "2021-03-01 00:00:00", "5,5"],
+        "ipi": [1.0, np.nan, 2.0, 3.0, 4.0],
+    })
+    quarentena = qualidade.converter_numericos(df, ["irpf", "ipi"])
+
+    np.testing.assert_array_equal(df["irpf"], [10.0, 0.0, 0.0, 0.0, 0.0])
+    np.testing.assert_array_equal(df["ipi"], [1.0, 0.0, 2.0, 3.0, 4.0])
+    linhas = {
+        (verificacao, coluna): sorted(grupo["linha"])
+        for (verificacao, coluna), grupo in quarentena.groupby(["verificacao", "coluna"])
+    }
+    assert linhas == {
+        ("conversao", "irpf"): [3, 4],
+        ("vazio", "irpf"): [1, 2],
+        ("vazio", "ipi"): [1],
+    }
+
+
+def test_contagens_do_relatorio():
+    df = pd.DataFrame({
+        "sigla_uf": ["SP", "SP", "SP", "RJ"],
+        "ano": [2022, 2022, 2022, 2022],
+        "mes": [1, 1, 3, 3],
+        "irpf": ["1", None, "x", "-2"],
+    })
+    conversao = qualidade.converter_numericos(df, ["irpf"])
+    relatorio = qualidade.verificar("arrecadacao", df, ["irpf"], "sigla_uf", conversao)
+    # SP: janeiro duplicado e fevereiro faltando; RJ: janeiro e fevereiro faltando
+    assert relatorio.contagens == {"conversao": 1, "vazio": 1, "duplicada": 2, "lacuna": 3, "negativo": 1}
+    assert relatorio.problemas == 1 + 2 + 3
@@ -0,0 +1,77 @@
+# tests/test_regioes.py
+
+"""
+Agregações por região (serie_regiao e media_mensal_por_regiao) nos dois
+backends contra um groupby simples do pandas sobre a tabela carregada.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import agregacoes
+import backends
+
+pytestmark = pytest.mark.skipif(not os.path.isfile(agregacoes.DB_PATH), reason="base de dados ausente")
+
+FILTROS = [("Todas", 2000, 2024), ("Nordeste", 2010, 2015), (("SP", "RJ", "AM"), 2020, 2024)]
+
+
+@pytest.fixture(scope="module")
+def tabela():
+    df, _ = agregacoes.load_arrecadacao()
+    regiao_da_sigla = {sigla: regiao for regiao, siglas in agregacoes.REGIOES.items() for sigla in siglas}
+    return df.assign(
+        regiao=df["sigla_uf"].map(regiao_da_sigla),
+        ano_mes=pd.to_datetime(df["ano_mes"]),
+    ).dropna(subset=["regiao"])
+
+
+@pytest.fixture(scope="module", params=["pandas", "duckdb"])
+def backend(request):
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+        return backends.BackendDuckDB()
+    return backends.BackendPandas()
+
+
+def _filtrar(tabela, uf, ano_inicio, ano_fim):
+    siglas = uf if isinstance(uf, tuple) else agregacoes.REGIOES.get(uf, agregacoes.SIGLAS_UF)
+    return tabela[tabela["sigla_uf"].isin(siglas) & tabela["ano"].between(ano_inicio, ano_fim)]
+
+
+def _ordenar(df, chaves):
+    return df.sort_values(chaves).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("nivel", ["Mensal", "Anual"])
+@pytest.mark.parametrize("filtro", FILTROS, ids=["todas", "nordeste", "tupla"])
+def test_serie_regiao_igual_ao_groupby(tabela, backend, filtro, nivel):
+    eixo_x = "ano_mes" if nivel == "Mensal" else "ano"
+    # Todas as linhas entram na soma, inclusive as repetidas da base
+    esperado = (
+        _filtrar(tabela, *filtro)
+        .groupby([eixo_x, "regiao"], as_index=False)["irpf"].sum()
+        .rename(columns={"irpf": "valor_agrupado"})
+    )
+    obtido = backend.serie_regiao(*filtro, "irpf", nivel)
+    pd.testing.assert_frame_equal(
+        _ordenar(obtido, [eixo_x, "regiao"]), _ordenar(esperado, [eixo_x, "regiao"]),
+        check_dtype=False, check_exact=False, rtol=1e-9,
+    )
+
+
+@pytest.mark.parametrize("filtro", FILTROS, ids=["todas", "nordeste", "tupla"])
+def test_media_mensal_por_regiao_igual_ao_groupby(tabela, backend, filtro):
+    # Soma da região dividida pelo número de meses em que ela tem dados
+    por_regiao = _filtrar(tabela, *filtro).groupby("regiao")
+    esperado = (
+        (por_regiao["receita_total"].sum() / por_regiao["ano_mes"].nunique())
+        .rename("valor_medio").reset_index()
+    )
+    obtido = backend.media_mensal_por_regiao(*filtro, "receita_total")
+    pd.testing.assert_frame_equal(
+        _ordenar(obtido, ["regiao"]), _ordenar(esperado, ["regiao"]),
+        check_dtype=False, check_exact=False, rtol=1e-9,
+    )
@@ -7,6 +7,8 @@ from sqlalchemy import create_engine, inspect
 import os
 import json
 
+import qualidade
+
 # --------------------------------------------------
 # 1) Configuração inicial do Streamlit e do título
 # --------------------------------------------------
@@ -60,9 +62,10 @@ def load_arrecadacao():
     todas_colunas = set(df.columns)
     colunas_tributos = sorted(list(todas_colunas - colunas_fixas))
 
-    # Converter todas as colunas de tributos para numérico e criar 'receita_total'
-    for col in colunas_tributos:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    # Converter todas as colunas de tributos para numérico (vazios e inválidos
+    # viram 0, mas entram na quarentena) e verificar chaves, lacunas e negativos
+    conversao = qualidade.converter_numericos(df, colunas_tributos)
+    relatorio = qualidade.verificar("arrecadacao", df, colunas_tributos, "sigla_uf", conversao)
 
     if "receita_total" not in df.columns:
         df["receita_total"] = df[colunas_tributos].sum(axis=1)
@@ -75,9 +78,9 @@ def load_arrecadacao():
             errors="coerce"
         )
 
-    return df, colunas_tributos
+    return df, colunas_tributos, relatorio
 
-df_arrec, colunas_tributos = load_arrecadacao()
+df_arrec, colunas_tributos, relatorio_qualidade = load_arrecadacao()
 
 # --------------------------------------------------
 # 4) “Limpeza” de nomes: cria dicionários para exibir nomes legíveis e mapear de volta
@@ -104,6 +107,7 @@ opcoes_tributos_limpos.sort()  # Ordena alfabeticamente
 # --------------------------------------------------
 
 st.sidebar.header("Filtros de Análise")
+st.sidebar.caption(f"Qualidade da base: {relatorio_qualidade.resumo()} (ver `python qualidade.py`)")
 
 # 5.1) Filtro de UF
 ufs = sorted(df_arrec["sigla_uf"].unique().tolist())